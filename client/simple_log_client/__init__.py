@@ -0,0 +1,5 @@
+# Client library for the Simple Log Service: a signed batch client and a buffering logging handler
+from .client import LogServiceClient, LogServiceError
+from .handler import LogServiceHandler
+
+__all__ = ['LogServiceClient', 'LogServiceError', 'LogServiceHandler']
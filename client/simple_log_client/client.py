@@ -0,0 +1,181 @@
+"""
+Signed batch client for the ingest Function URL.
+
+Sends log entries as NDJSON batches (Content-Type application/x-ndjson,
+at most MAX_BATCH_SIZE entries per request), signed with SigV4 for the
+"lambda" service. Credentials are resolved once from the botocore
+credential chain and refreshed by botocore when they are temporary.
+
+Each calling thread keeps one keep-alive HTTP session, so a client can be
+shared by several sending threads.
+
+Retries use exponential backoff with full jitter: the delay before retry n
+is drawn uniformly from [0, min(max_delay, base_delay * 2**n)], or the
+Retry-After header if that is longer. Throttling (429), server errors and
+connection failures retry the whole batch; after a partial success (207)
+only the entries the service reports as "failed" are resent. Entries it
+"rejected" as invalid are counted and dropped.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import botocore.session
+import requests
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from requests.adapters import HTTPAdapter
+
+# Largest batch the ingest function accepts
+MAX_BATCH_SIZE = 500
+
+# Request bodies stay well below the 6 MB Function URL payload limit
+MAX_BATCH_BYTES = 1024 * 1024
+
+# Ingest rejects longer messages and these characters
+MAX_MESSAGE_LENGTH = 10240
+INVALID_CHARACTERS = '<>{}\\\x00'
+
+# clean_message maps the invalid characters to full-width lookalikes and drops NUL
+REPLACEMENTS = {ord(character): chr(ord(character) + 0xFEE0) for character in INVALID_CHARACTERS}
+REPLACEMENTS[0] = None
+INVALID_PATTERN = re.compile('[' + re.escape(INVALID_CHARACTERS) + ']')
+
+# Statuses of entries the service has stored (or queued for storage)
+STORED_STATUSES = frozenset({'created', 'accepted'})
+
+
+class LogServiceError(Exception):
+    """The service refused a request in a way retrying cannot fix."""
+
+
+class LogServiceClient:
+    """Signs and posts batches of log entries to the ingest function."""
+
+    def __init__(self, ingest_url: str, region: Optional[str] = None, credentials: Any = None,
+                 timeout: float = 10.0, max_retries: int = 8, base_delay: float = 0.5,
+                 max_delay: float = 30.0):
+        """
+        Args:
+            ingest_url: Function URL of the ingest function
+            region: Region of the function (default: from the AWS configuration)
+            credentials: botocore credentials (default: the credential chain)
+            timeout: Seconds to wait for each request
+            max_retries: Retries of a batch before its entries count as failed
+            base_delay: Backoff before the first retry, in seconds
+            max_delay: Longest backoff between retries, in seconds
+
+        Raises:
+            LogServiceError: If no credentials can be found
+        """
+        session = botocore.session.get_session()
+        self.ingest_url = ingest_url
+        self.region = region or session.get_config_variable('region') or 'us-east-1'
+        self.credentials = credentials or session.get_credentials()
+        if self.credentials is None:
+            raise LogServiceError('No AWS credentials found')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+
+    def sign(self, method: str, url: str, body: Optional[bytes] = None) -> Dict[str, str]:
+        """Return the SigV4 headers for a request."""
+        request = AWSRequest(method=method, url=url, data=body)
+        SigV4Auth(self.credentials, 'lambda', self.region).add_auth(request)
+        return dict(request.headers.items())
+
+    def http(self) -> requests.Session:
+        """Return the calling thread's keep-alive session."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+            self._sessions.append(session)
+        return session
+
+    def send(self, entries: List[Dict[str, str]]) -> Dict[str, int]:
+        """Send entries ({"severity", "message"}) as one batch; see send_lines."""
+        return self.send_lines([json.dumps(entry, ensure_ascii=False) for entry in entries])
+
+    def send_lines(self, lines: List[str]) -> Dict[str, int]:
+        """
+        Send one batch of NDJSON-encoded entries, retrying what can be retried.
+
+        Returns:
+            Counts of entries "created" (stored or queued), "rejected" and
+            "failed" (retries exhausted), and of "requests", "retries" and
+            request "bytes"
+
+        Raises:
+            LogServiceError: On a response retrying cannot fix, such as 403
+        """
+        counts = {'created': 0, 'rejected': 0, 'failed': 0, 'requests': 0, 'retries': 0, 'bytes': 0}
+        delay = 0.0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                counts['retries'] += 1
+                time.sleep(delay)
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+            body = '\n'.join(lines).encode('utf-8')
+            headers = self.sign('POST', self.ingest_url, body)
+            headers['Content-Type'] = 'application/x-ndjson'
+            counts['requests'] += 1
+            counts['bytes'] += len(body)
+            try:
+                response = self.http().post(self.ingest_url, headers=headers, data=body, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                continue
+
+            if response.status_code in (200, 202):
+                counts['created'] += len(lines)
+                return counts
+            if response.status_code == 429 or response.status_code >= 500:
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                continue
+
+            try:
+                results = response.json().get('results')
+            except (ValueError, AttributeError):
+                results = None
+            if response.status_code not in (207, 400) or results is None:
+                raise LogServiceError(f'Ingest returned {response.status_code}: {response.text[:200]}')
+
+            statuses = [result.get('status') for result in results]
+            counts['created'] += sum(status in STORED_STATUSES for status in statuses)
+            counts['rejected'] += statuses.count('rejected')
+            lines = [lines[result['index']] for result in results if result.get('status') == 'failed']
+            if not lines:
+                return counts
+
+        counts['failed'] += len(lines)
+        return counts
+
+    def close(self) -> None:
+        """Close the keep-alive sessions of every thread."""
+        for session in self._sessions:
+            session.close()
+        self._sessions.clear()
+
+
+def clean_message(message: str) -> str:
+    """
+    Make a message acceptable to ingest: characters it rejects become
+    their full-width forms (NUL is removed) and the length is capped.
+    """
+    # Most messages are clean, and searching is much cheaper than translating
+    if INVALID_PATTERN.search(message):
+        message = message.translate(REPLACEMENTS)
+    return message[:MAX_MESSAGE_LENGTH]
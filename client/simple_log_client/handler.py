@@ -0,0 +1,227 @@
+"""
+Buffering logging handler for the Simple Log Service.
+
+emit() never touches the network: it formats the record, appends it to an
+in-memory queue and returns, so logging from a hot loop costs a few
+microseconds. A background thread drains the queue in batches, sending
+when batch_size records are waiting or flush_interval seconds have
+passed, whichever comes first.
+
+The queue is bounded by max_queue records. When the service cannot keep
+up the overflow policy decides what is lost:
+    drop_newest - discard the record being logged (the default)
+    drop_oldest - discard the oldest queued record
+    block       - wait up to block_timeout seconds for room, then drop
+Dropped records are counted in stats["dropped"].
+
+flush() sends what is queued and waits for it, for at most
+shutdown_timeout seconds (plus the batch in flight). close() stops the
+thread after a final flush bounded the same way. logging.shutdown()
+calls both at interpreter exit, so an unreachable service delays exit
+by seconds, not by every retry of every queued batch.
+"""
+
+import collections
+import json
+import logging
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from .client import MAX_BATCH_BYTES, MAX_BATCH_SIZE, LogServiceClient, clean_message
+
+# Python levels mapped to the service's severities (by threshold)
+SEVERITY_LEVELS = ((logging.ERROR, 'error'), (logging.WARNING, 'warning'))
+
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+# json.dumps builds a new encoder per call when given options
+encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def severity_for(levelno: int) -> str:
+    """Return the service severity for a logging level."""
+    for threshold, severity in SEVERITY_LEVELS:
+        if levelno >= threshold:
+            return severity
+    return 'info'
+
+
+class LogServiceHandler(logging.Handler):
+    """Queues log records and ships them to the ingest function in batches."""
+
+    def __init__(self, ingest_url: Optional[str] = None, client: Optional[LogServiceClient] = None,
+                 level: int = logging.NOTSET, batch_size: int = MAX_BATCH_SIZE,
+                 flush_interval: float = 2.0, max_queue: int = 10000, overflow: str = 'drop_newest',
+                 block_timeout: float = 0.1, shutdown_timeout: float = 10.0):
+        """
+        Args:
+            ingest_url: Function URL of the ingest function
+            client: Client to send with (default: LogServiceClient(ingest_url))
+            level: Minimum level handled
+            batch_size: Records per request, at most MAX_BATCH_SIZE
+            flush_interval: Longest time a record waits in the queue, in seconds
+            max_queue: Records held before the overflow policy applies
+            overflow: "drop_newest", "drop_oldest" or "block"
+            block_timeout: Longest wait for room under the "block" policy
+            shutdown_timeout: Longest time flush() and close() spend sending what is queued
+        """
+        if client is None and ingest_url is None:
+            raise ValueError('ingest_url or client is required')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow must be one of: {", ".join(OVERFLOW_POLICIES)}')
+        super().__init__(level)
+        self.client = client or LogServiceClient(ingest_url)
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.max_queue = max(max_queue, self.batch_size)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.shutdown_timeout = shutdown_timeout
+
+        # deque appends and pops are atomic, so emit() only takes
+        # _room_lock when the queue is full
+        self._queue: collections.deque = collections.deque()
+        self._room_lock = threading.Lock()
+        self._room = threading.Condition(self._room_lock)
+        self._wakeup = threading.Event()
+        self._send_lock = threading.Lock()
+        self._sending = threading.local()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.stats = {'dropped': 0, 'sent': 0, 'created': 0, 'rejected': 0,
+                      'failed': 0, 'requests': 0, 'retries': 0, 'bytes': 0}
+        self._thread = threading.Thread(target=self._run, name='LogServiceHandler', daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of records waiting to be sent."""
+        return len(self._queue)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Queue a record; it is sent by the background thread."""
+        # Records logged while sending (by requests or botocore) would
+        # feed back into the queue
+        if getattr(self._sending, 'active', False) or self._closed:
+            return
+        try:
+            item = (record.levelno, self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+
+        queue = self._queue
+        if len(queue) >= self.max_queue and not self._make_room():
+            self._count(dropped=1)
+            return
+        queue.append(item)
+        if len(queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """Send queued records, waiting at most shutdown_timeout."""
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._drain(everything=True, deadline=time.monotonic() + self.shutdown_timeout)
+
+    def close(self) -> None:
+        """Stop the background thread after sending what is queued."""
+        if not self._closed:
+            self._closed = True
+            self._wakeup.set()
+            self._thread.join(self.shutdown_timeout)
+            self.client.close()
+        super().close()
+
+    def _make_room(self) -> bool:
+        """Apply the overflow policy to a full queue; True if the record may be queued."""
+        self._wakeup.set()
+        if self.overflow == 'drop_newest':
+            return False
+        if self.overflow == 'drop_oldest':
+            try:
+                self._queue.popleft()
+            except IndexError:
+                pass
+            self._count(dropped=1)
+            return True
+        deadline = time.monotonic() + self.block_timeout
+        with self._room:
+            while len(self._queue) >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._room.wait(remaining):
+                    return len(self._queue) < self.max_queue
+        return True
+
+    def _run(self) -> None:
+        """Background thread: send full batches as they fill, the rest on each tick."""
+        self._sending.active = True
+        next_tick = time.monotonic() + self.flush_interval
+        while not self._closed:
+            woken = self._wakeup.wait(max(0.0, next_tick - time.monotonic()))
+            self._wakeup.clear()
+            if woken and not self._closed and time.monotonic() < next_tick:
+                self._drain(everything=False)
+                continue
+            self._drain(everything=True)
+            next_tick = time.monotonic() + self.flush_interval
+        self._drain(everything=True, deadline=time.monotonic() + self.shutdown_timeout)
+
+    def _drain(self, everything: bool, deadline: Optional[float] = None) -> None:
+        """Send queued records: full batches only, or everything."""
+        active = getattr(self._sending, 'active', False)
+        self._sending.active = True
+        try:
+            timeout = -1 if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._send_lock.acquire(timeout=timeout):
+                return
+            try:
+                while len(self._queue) >= (1 if everything else self.batch_size):
+                    if deadline is not None and time.monotonic() > deadline:
+                        return
+                    self._send(self._take())
+            finally:
+                self._send_lock.release()
+        finally:
+            self._sending.active = active
+
+    def _take(self) -> List[str]:
+        """Remove up to one batch from the queue, as NDJSON lines."""
+        lines: List[str] = []
+        size = 0
+        queue = self._queue
+        while len(lines) < self.batch_size:
+            try:
+                levelno, message = queue.popleft()
+            except IndexError:
+                break
+            line = encode({'severity': severity_for(levelno), 'message': clean_message(message)})
+            length = (len(line) if line.isascii() else len(line.encode('utf-8'))) + 1
+            if lines and size + length > MAX_BATCH_BYTES:
+                queue.appendleft((levelno, message))
+                break
+            lines.append(line)
+            size += length
+        if self.overflow == 'block':
+            with self._room:
+                self._room.notify_all()
+        return lines
+
+    def _send(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            counts = self.client.send_lines(lines)
+        except Exception as e:
+            counts = {'failed': len(lines)}
+            print(f'LogServiceHandler: {e}', file=sys.stderr)
+        self._count(sent=len(lines), **counts)
+        if counts.get('failed') or counts.get('rejected'):
+            print(f"LogServiceHandler: {counts.get('rejected', 0)} rejected, "
+                  f"{counts.get('failed', 0)} failed of {len(lines)} records", file=sys.stderr)
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
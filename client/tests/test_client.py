@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+from botocore.credentials import Credentials
+
+# Ensure simple_log_client can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from simple_log_client.client import LogServiceClient, LogServiceError, clean_message
+
+URL = 'https://ingest.lambda-url.us-east-1.on.aws/'
+
+
+def response(status, body=None, headers=None):
+    mock = MagicMock()
+    mock.status_code = status
+    mock.headers = headers or {}
+    mock.text = json.dumps(body or {})
+    mock.json.return_value = body or {}
+    return mock
+
+
+def make_client(*responses):
+    """Return a client whose requests get the given responses, and the mock session."""
+    client = LogServiceClient(URL, region='us-east-1', credentials=Credentials('AKID', 'SECRET'), max_retries=3)
+    session = MagicMock()
+    session.post.side_effect = list(responses)
+    client.http = lambda: session
+    return client, session
+
+
+def sent_lines(session, call=-1):
+    return session.post.call_args_list[call].kwargs['data'].decode('utf-8').split('\n')
+
+
+@patch('simple_log_client.client.time.sleep')
+class TestLogServiceClient(unittest.TestCase):
+
+    def test_send_signs_ndjson_batch(self, mock_sleep):
+        """Test that a batch is posted as signed NDJSON in one request."""
+        client, session = make_client(response(200))
+        counts = client.send([{'severity': 'info', 'message': 'one'}, {'severity': 'error', 'message': 'two'}])
+
+        self.assertEqual(counts['created'], 2)
+        self.assertEqual(counts['requests'], 1)
+        headers = session.post.call_args.kwargs['headers']
+        self.assertEqual(headers['Content-Type'], 'application/x-ndjson')
+        self.assertIn('/us-east-1/lambda/aws4_request', headers['Authorization'])
+        self.assertEqual([json.loads(line)['message'] for line in sent_lines(session)], ['one', 'two'])
+
+    def test_throttled_batch_is_retried(self, mock_sleep):
+        """Test that 429 and 5xx responses and connection errors retry the whole batch."""
+        client, session = make_client(response(429, headers={'Retry-After': '3'}),
+                                      requests.exceptions.ConnectionError(), response(503), response(202))
+        counts = client.send_lines(['{"severity":"info","message":"a"}'])
+
+        self.assertEqual(counts['created'], 1)
+        self.assertEqual(counts['retries'], 3)
+        self.assertEqual(session.post.call_count, 4)
+        self.assertGreaterEqual(mock_sleep.call_args_list[0].args[0], 3)
+
+    def test_partial_success_resends_failed_entries_only(self, mock_sleep):
+        """Test that after a 207 only failed entries are resent and rejected ones are counted."""
+        lines = [json.dumps({'severity': 'info', 'message': str(i)}) for i in range(3)]
+        client, session = make_client(
+            response(207, {'results': [{'index': 0, 'status': 'created'}, {'index': 1, 'status': 'rejected'},
+                                       {'index': 2, 'status': 'failed'}]}),
+            response(200))
+        counts = client.send_lines(lines)
+
+        self.assertEqual(counts['created'], 2)
+        self.assertEqual(counts['rejected'], 1)
+        self.assertEqual(counts['failed'], 0)
+        self.assertEqual(sent_lines(session), [lines[2]])
+
+    def test_exhausted_retries_count_as_failed(self, mock_sleep):
+        """Test that entries still unsent after max_retries are counted as failed."""
+        client, session = make_client(*[response(500)] * 4)
+        counts = client.send_lines(['{}', '{}'])
+
+        self.assertEqual(counts['failed'], 2)
+        self.assertEqual(counts['requests'], 4)
+
+    def test_forbidden_raises(self, mock_sleep):
+        """Test that a response retrying cannot fix raises LogServiceError."""
+        client, session = make_client(response(403, {'message': 'Forbidden'}))
+        with self.assertRaises(LogServiceError):
+            client.send_lines(['{}'])
+
+    def test_clean_message(self, mock_sleep):
+        """Test that characters ingest rejects are replaced and long messages truncated."""
+        self.assertEqual(clean_message('{"a": <b>}\\\x00'), '｛"a": ＜b＞｝＼')
+        self.assertEqual(len(clean_message('x' * 20000)), 10240)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import unittest
+import weakref
+from unittest.mock import MagicMock
+
+# Ensure simple_log_client can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from simple_log_client.handler import LogServiceHandler, severity_for
+
+
+class FakeClient:
+    """Records batches instead of sending them; optionally blocks until released."""
+
+    def __init__(self, blocked=False):
+        self.batches = []
+        self.release = threading.Event()
+        if not blocked:
+            self.release.set()
+        self.close = MagicMock()
+
+    def send_lines(self, lines):
+        self.release.wait(5)
+        self.batches.append([json.loads(line) for line in lines])
+        return {'created': len(lines), 'requests': 1}
+
+    @property
+    def messages(self):
+        return [entry['message'] for batch in self.batches for entry in batch]
+
+
+def make_logger(handler):
+    logger = logging.getLogger(f'test_handler.{id(handler)}')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+
+class TestLogServiceHandler(unittest.TestCase):
+
+    def test_severity_mapping(self):
+        """Test that logging levels map onto the service's three severities."""
+        self.assertEqual(severity_for(logging.DEBUG), 'info')
+        self.assertEqual(severity_for(logging.INFO), 'info')
+        self.assertEqual(severity_for(logging.WARNING), 'warning')
+        self.assertEqual(severity_for(logging.CRITICAL), 'error')
+
+    def test_full_batch_is_sent_without_waiting_for_the_interval(self):
+        """Test that reaching batch_size wakes the flush thread."""
+        client = FakeClient()
+        handler = LogServiceHandler(client=client, batch_size=10, flush_interval=60)
+        logger = make_logger(handler)
+        for i in range(25):
+            logger.error('failure %d', i)
+
+        for _ in range(100):
+            if len(client.messages) >= 20:
+                break
+            time.sleep(0.02)
+        self.assertEqual([len(batch) for batch in client.batches], [10, 10])
+        self.assertEqual(handler.pending, 5)
+        self.assertEqual(client.batches[0][0], {'severity': 'error', 'message': 'failure 0'})
+        handler.close()
+
+    def test_flush_interval_sends_partial_batch(self):
+        """Test that records are sent after flush_interval even when the batch is not full."""
+        client = FakeClient()
+        handler = LogServiceHandler(client=client, batch_size=100, flush_interval=0.05)
+        make_logger(handler).warning('slow <trickle>')
+
+        for _ in range(100):
+            if client.batches:
+                break
+            time.sleep(0.02)
+        self.assertEqual(client.batches, [[{'severity': 'warning', 'message': 'slow ＜trickle＞'}]])
+        handler.close()
+
+    def test_flush_and_close_send_everything(self):
+        """Test that flush() drains the queue and close() sends the rest and stops the thread."""
+        client = FakeClient()
+        handler = LogServiceHandler(client=client, batch_size=100, flush_interval=60)
+        logger = make_logger(handler)
+        logger.info('first')
+        handler.flush()
+        self.assertEqual(client.messages, ['first'])
+
+        logger.info('second')
+        handler.close()
+        self.assertEqual(client.messages, ['first', 'second'])
+        self.assertFalse(handler._thread.is_alive())
+        client.close.assert_called_once()
+
+        logger.info('after close')
+        self.assertEqual(handler.pending, 0)
+
+    def test_drop_newest_when_queue_is_full(self):
+        """Test that the default policy discards new records once max_queue is reached."""
+        client = FakeClient(blocked=True)
+        handler = LogServiceHandler(client=client, batch_size=10, max_queue=20, flush_interval=60)
+        logger = make_logger(handler)
+        for i in range(40):
+            logger.info('record %d', i)
+        client.release.set()
+        handler.close()
+
+        self.assertGreater(handler.stats['dropped'], 0)
+        self.assertEqual(handler.stats['dropped'] + handler.stats['sent'], 40)
+        self.assertEqual(client.messages[0], 'record 0')
+        self.assertNotIn('record 39', client.messages)
+
+    def test_drop_oldest_when_queue_is_full(self):
+        """Test that drop_oldest keeps the most recent records."""
+        client = FakeClient(blocked=True)
+        handler = LogServiceHandler(client=client, batch_size=10, max_queue=20, flush_interval=60,
+                                    overflow='drop_oldest')
+        logger = make_logger(handler)
+        for i in range(40):
+            logger.info('record %d', i)
+        client.release.set()
+        handler.close()
+
+        self.assertGreater(handler.stats['dropped'], 0)
+        self.assertEqual(handler.stats['dropped'] + handler.stats['sent'], 40)
+        self.assertEqual(client.messages[-1], 'record 39')
+
+    def test_block_waits_for_room(self):
+        """Test that the block policy loses nothing when the sender catches up in time."""
+        client = FakeClient()
+        handler = LogServiceHandler(client=client, batch_size=10, max_queue=10, flush_interval=60,
+                                    overflow='block', block_timeout=5)
+        logger = make_logger(handler)
+        for i in range(100):
+            logger.info('record %d', i)
+        handler.close()
+
+        self.assertEqual(handler.stats['dropped'], 0)
+        self.assertEqual(client.messages, [f'record {i}' for i in range(100)])
+
+    def test_records_logged_while_sending_are_ignored(self):
+        """Test that logging from inside the send path does not feed back into the queue."""
+        client = FakeClient()
+        handler = LogServiceHandler(client=client, batch_size=100, flush_interval=60)
+        logger = make_logger(handler)
+        send_lines = client.send_lines
+
+        def noisy_send(lines):
+            logger.debug('sending %d records', len(lines))
+            return send_lines(lines)
+
+        client.send_lines = noisy_send
+        logger.info('payload')
+        handler.flush()
+        handler.close()
+        self.assertEqual(client.messages, ['payload'])
+
+    def test_send_errors_are_counted_not_raised(self):
+        """Test that a failing client marks records failed instead of raising into the app."""
+        client = FakeClient()
+        client.send_lines = MagicMock(side_effect=RuntimeError('boom'))
+        handler = LogServiceHandler(client=client, flush_interval=60)
+        make_logger(handler).error('lost')
+        handler.close()
+        self.assertEqual(handler.stats['failed'], 1)
+
+    def test_shutdown_is_bounded_by_shutdown_timeout(self):
+        """Test that logging.shutdown() gives up after shutdown_timeout when sending is slow."""
+        client = FakeClient()
+        send_lines = client.send_lines
+
+        def slow_send(lines):
+            time.sleep(1)
+            return send_lines(lines)
+
+        client.send_lines = slow_send
+        handler = LogServiceHandler(client=client, batch_size=10, flush_interval=60, shutdown_timeout=0.5)
+        logger = make_logger(handler)
+        for i in range(45):
+            logger.info('record %d', i)
+
+        started = time.monotonic()
+        logging.shutdown([weakref.ref(handler)])
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertLess(len(client.messages), 45)
+
+    def test_invalid_overflow_policy(self):
+        """Test that an unknown overflow policy is rejected."""
+        with self.assertRaises(ValueError):
+            LogServiceHandler(client=FakeClient(), overflow='spill')
+
+
+if __name__ == '__main__':
+    unittest.main()
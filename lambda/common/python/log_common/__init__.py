@@ -0,0 +1 @@
+# Shared code for the Simple Log Service Lambda functions (deployed as a layer)
@@ -0,0 +1,63 @@
+"""
+Lazily created, cached AWS clients.
+
+The handlers use the low-level botocore client instead of the boto3
+resource layer, which saves the import of boto3 and the construction of
+resource classes on every cold start. The botocore session (credentials,
+loaded service models, endpoint resolution) and each client are built on
+first use and then reused for the life of the container, so an
+invocation that fails validation never pays for them at all.
+"""
+
+import os
+from functools import lru_cache
+from typing import Any
+
+import botocore.session
+from botocore.config import Config
+
+# Shared by every client; bounded timeouts keep a stuck connection from
+# consuming the whole Lambda timeout. The pool must cover the largest
+# thread pool of the handler so parallel requests never wait for a
+# connection. Retries are left to botocore's defaults for the service
+# (about 10 attempts for DynamoDB), which is what the read handlers rely on.
+CLIENT_CONFIG = Config(
+    connect_timeout=2,
+    read_timeout=5,
+    tcp_keepalive=True,
+    max_pool_connections=int(os.environ.get('MAX_POOL_CONNECTIONS', '32'))
+)
+
+# For the ingest write path only: botocore makes at most one quick retry
+# itself, and throttling is retried by log_common.retry with jitter, a
+# token bucket and a per-invocation budget.
+WRITE_CLIENT_CONFIG = CLIENT_CONFIG.merge(Config(
+    retries={
+        'mode': os.environ.get('SDK_RETRY_MODE', 'standard'),
+        'total_max_attempts': int(os.environ.get('SDK_MAX_ATTEMPTS', '2'))
+    }
+))
+
+
+@lru_cache(maxsize=None)
+def session() -> botocore.session.Session:
+    """Return the container-wide botocore session."""
+    return botocore.session.get_session()
+
+
+@lru_cache(maxsize=None)
+def client(service_name: str, write: bool = False) -> Any:
+    """
+    Return the container-wide low-level client for a service.
+
+    write=True returns the client for callers that retry through
+    log_common.retry themselves (WRITE_CLIENT_CONFIG).
+    """
+    region = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION')
+    config = WRITE_CLIENT_CONFIG if write else CLIENT_CONFIG
+    return session().create_client(service_name, region_name=region, config=config)
+
+
+def dynamodb(write: bool = False) -> Any:
+    """Return the container-wide low-level DynamoDB client (see client)."""
+    return client('dynamodb', write)
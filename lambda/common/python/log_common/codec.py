@@ -0,0 +1,189 @@
+"""
+Storage encoding of log entries.
+
+Read and write capacity are billed per KB of item, and an item is billed
+for its attribute names as well as its values. Version 2 rows are stored
+as compactly as the key schema allows:
+
+- the severity is not stored on its own; it is the prefix of
+  severity_bucket, which every row carries for the severity index
+- the message is stored under "m", or, once its UTF-8 encoding reaches
+  COMPRESSION_THRESHOLD bytes and compression actually saves space, as a
+  compressed Binary under "mz"
+- "v" holds the version tag
+
+Version 3 rows are version 2 rows whose message is stored as a mined
+template (log_common.templates): the template id under "t" and its
+parameters, null-separated, under "p". Decoding them needs the template
+texts, which the caller loads into a mapping first.
+
+Entries that collapse repeated messages (ingest dedup mode) also carry
+"count" and "last_seen" in every version. Ingest maintains them with
+UpdateItem, so encode() leaves them out.
+
+id, datetime, bucket and severity_bucket are table and index keys and
+keep their names and formats. Rows without "v" are version 1 rows, with
+the plain attributes written before this codec existed. decode() reads
+both, so old and new rows coexist in the same partitions and no backfill
+is needed.
+
+The first byte of a compressed message names its algorithm. zlib is always
+available; zstd needs the optional zstandard package in the common layer
+of every function that reads the table.
+"""
+
+import base64
+import os
+import zlib
+from typing import Any, Dict, Iterable, Mapping, Optional, Set
+
+from log_common import keys, templates as message_templates
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Version written by ingest; set STORAGE_CODEC_VERSION=1 to write plain rows
+WRITE_VERSION = int(os.environ.get('STORAGE_CODEC_VERSION', '2'))
+
+# Messages at least this long (UTF-8 bytes) are compressed
+COMPRESSION_THRESHOLD = int(os.environ.get('STORAGE_COMPRESSION_THRESHOLD', '512'))
+COMPRESSION = os.environ.get('STORAGE_COMPRESSION', 'zlib')
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Attribute names of version 2 rows
+VERSION_ATTRIBUTE = 'v'
+MESSAGE_ATTRIBUTE = 'm'
+COMPRESSED_MESSAGE_ATTRIBUTE = 'mz'
+
+# Attribute names added by version 3 rows
+TEMPLATE_ATTRIBUTE = 't'
+PARAMS_ATTRIBUTE = 'p'
+TEMPLATE_VERSION = 3
+
+# Every attribute decode() may need, for ProjectionExpression
+STORED_FIELDS = keys.PUBLIC_FIELDS + keys.COLLAPSED_FIELDS + (
+    keys.SEVERITY_BUCKET_ATTRIBUTE, VERSION_ATTRIBUTE,
+    MESSAGE_ATTRIBUTE, COMPRESSED_MESSAGE_ATTRIBUTE,
+    TEMPLATE_ATTRIBUTE, PARAMS_ATTRIBUTE
+)
+
+# ProjectionExpression and its placeholders for reading STORED_FIELDS;
+# index keys are never fetched or parsed
+PROJECTION_NAMES = {f'#{field}': field for field in STORED_FIELDS}
+PROJECTION_EXPRESSION = ', '.join(PROJECTION_NAMES)
+
+# Leading byte of a compressed message
+ZLIB_MARKER = b'\x01'
+ZSTD_MARKER = b'\x02'
+
+
+def compress(data: bytes) -> bytes:
+    """Compress a message with the configured algorithm, prefixed with its marker."""
+    if COMPRESSION == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('STORAGE_COMPRESSION=zstd requires the zstandard package')
+        return ZSTD_MARKER + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return ZLIB_MARKER + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(blob: bytes) -> bytes:
+    """Decompress a message written by compress()."""
+    marker, data = blob[:1], blob[1:]
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(data)
+    if marker == ZSTD_MARKER:
+        if zstandard is None:
+            raise RuntimeError('Reading zstd-compressed messages requires the zstandard package')
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f'Unknown compression marker: {marker!r}')
+
+
+def encode(entry: Dict[str, Any], version: int = WRITE_VERSION) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert a log entry built by ingest into a typed DynamoDB item.
+
+    Args:
+        entry: id, datetime, bucket, severity_bucket, severity and message,
+            plus template_id and params when ingest mined a template
+        version: Row version to write (1 writes the plain attributes)
+    """
+    item = {
+        'id': {'S': entry['id']},
+        'datetime': {'S': entry['datetime']},
+        keys.BUCKET_ATTRIBUTE: {'S': entry[keys.BUCKET_ATTRIBUTE]},
+        keys.SEVERITY_BUCKET_ATTRIBUTE: {'S': entry[keys.SEVERITY_BUCKET_ATTRIBUTE]},
+    }
+    if version == 1:
+        item['severity'] = {'S': entry['severity']}
+        item['message'] = {'S': entry['message']}
+        return item
+
+    if entry.get('template_id'):
+        item[VERSION_ATTRIBUTE] = {'N': str(TEMPLATE_VERSION)}
+        item[TEMPLATE_ATTRIBUTE] = {'S': entry['template_id']}
+        if entry['params']:
+            item[PARAMS_ATTRIBUTE] = {'S': message_templates.PARAM_SEPARATOR.join(entry['params'])}
+        return item
+
+    item[VERSION_ATTRIBUTE] = {'N': str(version)}
+    message = entry['message']
+    raw = message.encode('utf-8')
+    if len(raw) >= COMPRESSION_THRESHOLD:
+        blob = compress(raw)
+        if len(blob) < len(raw):
+            item[COMPRESSED_MESSAGE_ATTRIBUTE] = {'B': blob}
+            return item
+    item[MESSAGE_ATTRIBUTE] = {'S': message}
+    return item
+
+
+def template_ids(items: Iterable[Dict[str, Dict[str, Any]]]) -> Set[str]:
+    """Return the template ids that decoding these typed items needs."""
+    return {item[TEMPLATE_ATTRIBUTE]['S'] for item in items if TEMPLATE_ATTRIBUTE in item}
+
+
+def decode(item: Dict[str, Dict[str, Any]],
+           templates: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    """
+    Return the public fields of a typed item of any version.
+
+    count and last_seen are included for collapsed entries only.
+
+    Fields missing from the item (e.g. projected away) are left out.
+
+    Raises:
+        KeyError: If a version 3 item's template is not in `templates`
+    """
+    entry = {}
+    if 'id' in item:
+        entry['id'] = item['id']['S']
+    if 'datetime' in item:
+        entry['datetime'] = item['datetime']['S']
+    if 'count' in item:
+        entry['count'] = int(item['count']['N'])
+        entry['last_seen'] = item['last_seen']['S']
+
+    if VERSION_ATTRIBUTE not in item:
+        for field in ('severity', 'message'):
+            if field in item:
+                entry[field] = item[field]['S']
+        return entry
+
+    if keys.SEVERITY_BUCKET_ATTRIBUTE in item:
+        entry['severity'] = item[keys.SEVERITY_BUCKET_ATTRIBUTE]['S'].split(keys.SHARD_SEPARATOR, 1)[0]
+    if TEMPLATE_ATTRIBUTE in item:
+        params = item[PARAMS_ATTRIBUTE]['S'].split(message_templates.PARAM_SEPARATOR) \
+            if PARAMS_ATTRIBUTE in item else []
+        entry['message'] = message_templates.render((templates or {})[item[TEMPLATE_ATTRIBUTE]['S']], params)
+    elif MESSAGE_ATTRIBUTE in item:
+        entry['message'] = item[MESSAGE_ATTRIBUTE]['S']
+    elif COMPRESSED_MESSAGE_ATTRIBUTE in item:
+        blob = item[COMPRESSED_MESSAGE_ATTRIBUTE]['B']
+        if isinstance(blob, str):
+            # Stream records in Lambda events carry Binary values base64-encoded
+            blob = base64.b64decode(blob)
+        entry['message'] = decompress(bytes(blob)).decode('utf-8')
+    return entry
@@ -0,0 +1,70 @@
+"""
+Opaque, signed continuation cursors.
+
+A cursor is base64url(JSON payload) + "." + base64url(HMAC-SHA256 tag).
+The payload is not secret, but the tag stops clients from forging or
+editing a position. The key comes from CURSOR_SECRET; without it a random
+per-container key is used, so cursors only survive on the same container.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+from typing import Any, Dict
+
+# HMAC key for cursor signatures
+_SECRET = os.environ.get('CURSOR_SECRET', '').encode() or os.urandom(32)
+
+# Truncated tag length in bytes
+TAG_LENGTH = 16
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor is malformed or its signature does not match."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(data: bytes) -> bytes:
+    return hmac.new(_SECRET, data, hashlib.sha256).digest()[:TAG_LENGTH]
+
+
+def encode(payload: Dict[str, Any]) -> str:
+    """Serialize and sign a cursor payload."""
+    data = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+    return f'{_b64encode(data)}.{_b64encode(_sign(data))}'
+
+
+def decode(token: str) -> Dict[str, Any]:
+    """
+    Verify and deserialize a cursor.
+    
+    Raises:
+        InvalidCursor: If the cursor is malformed or was not signed by us
+    """
+    try:
+        data_part, tag_part = token.split('.')
+        data = _b64decode(data_part)
+        tag = _b64decode(tag_part)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    
+    if not hmac.compare_digest(tag, _sign(data)):
+        raise InvalidCursor('Invalid cursor signature')
+    
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        raise InvalidCursor('Malformed cursor')
+    
+    if not isinstance(payload, dict):
+        raise InvalidCursor('Malformed cursor')
+    return payload
@@ -0,0 +1,82 @@
+"""
+Key layout for the log entries table.
+
+Entries are indexed by time bucket on the bucket-datetime-index GSI: the
+bucket (one UTC day) is the partition key and the entry datetime is the
+sort key. Readers walk buckets newest-first and stop once they have enough
+entries, so read cost depends on the page size rather than the table size.
+
+To spread write load, each bucket can be split into write shards. Shard 0
+uses the bare bucket value, shard N > 0 appends "#N". Readers query every
+shard of a bucket and merge the results by datetime. Raising the shard
+count needs no migration; when lowering it, keep readers on the old count
+until the lookback window has passed.
+
+The severity-datetime-index uses the same buckets and shards prefixed with
+the severity ("error#2026-01-29#1"), so the newest entries of one severity
+can be read without touching entries of the others.
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+# GSI with the time bucket as partition key and datetime as sort key
+TIME_INDEX_NAME = 'bucket-datetime-index'
+BUCKET_ATTRIBUTE = 'bucket'
+
+# GSI with severity + time bucket as partition key and datetime as sort key
+SEVERITY_INDEX_NAME = 'severity-datetime-index'
+SEVERITY_BUCKET_ATTRIBUTE = 'severity_bucket'
+
+# Attributes returned to API clients; everything else is internal layout
+PUBLIC_FIELDS = ('id', 'datetime', 'severity', 'message')
+
+# Public fields of entries that collapse repeated messages (ingest dedup mode)
+COLLAPSED_FIELDS = ('count', 'last_seen')
+
+# Separator between the bucket and its write shard number
+SHARD_SEPARATOR = '#'
+
+# One bucket per UTC day
+BUCKET_FORMAT = '%Y-%m-%d'
+BUCKET_SPAN = timedelta(days=1)
+
+# Most keys one BatchGetItem request may name
+BATCH_GET_SIZE = 100
+
+
+def bucket_for(timestamp: datetime) -> str:
+    """Return the time bucket that a timestamp belongs to."""
+    return timestamp.strftime(BUCKET_FORMAT)
+
+
+def shard_key(bucket: str, shard: int) -> str:
+    """Return the partition key value for one write shard of a bucket."""
+    if shard == 0:
+        return bucket
+    return f'{bucket}{SHARD_SEPARATOR}{shard}'
+
+
+def shard_keys(bucket: str, shard_count: int) -> List[str]:
+    """Return the partition key values of every write shard of a bucket."""
+    return [shard_key(bucket, shard) for shard in range(shard_count)]
+
+
+def severity_key(severity: str, partition: str) -> str:
+    """Return the severity index partition key for a bucket shard."""
+    return f'{severity}{SHARD_SEPARATOR}{partition}'
+
+
+def buckets_newest_first(newest: datetime, oldest: datetime) -> Iterator[str]:
+    """
+    Yield the buckets covering [oldest, newest], newest bucket first.
+    
+    Args:
+        newest: Most recent timestamp of the range
+        oldest: Earliest timestamp of the range
+    """
+    current = datetime.strptime(bucket_for(newest), BUCKET_FORMAT)
+    stop = datetime.strptime(bucket_for(oldest), BUCKET_FORMAT)
+    while current >= stop:
+        yield current.strftime(BUCKET_FORMAT)
+        current -= BUCKET_SPAN
@@ -0,0 +1,124 @@
+"""
+Per-invocation hot-path metrics in CloudWatch Embedded Metric Format.
+
+A handler starts a recorder at the top of each invocation, wraps its
+stages (parse, validate, dynamodb, serialize, ...) in `stage()` and emits
+one JSON log line at the end. CloudWatch extracts the metrics from that
+line asynchronously, so there is no PutMetricData call on the hot path
+and no sampling. Stage durations become `<stage>_ms` metrics with a
+Function dimension, and can be charted at p99.
+
+The recorder is module-level: Lambda runs one invocation per container
+at a time, and helper functions (including worker threads) record into
+the active recorder without it being passed around. Outside an
+invocation every call is a no-op.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'SimpleLogService')
+
+# With metrics disabled the line is still logged, without the EMF envelope
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+_cold_start = True
+_active: Optional['Recorder'] = None
+
+
+class Recorder:
+    """Stage timings, counters and properties of one invocation."""
+
+    def __init__(self, function: str, cold_start: bool):
+        self.function = function
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.metrics: Dict[str, Tuple[float, str]] = {}
+        self.properties: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float, unit: str) -> None:
+        """Add to a metric (metrics recorded twice are summed)."""
+        with self._lock:
+            current = self.metrics.get(name, (0.0, unit))[0]
+            self.metrics[name] = (current + value, unit)
+
+    def document(self) -> Dict[str, Any]:
+        """Build the EMF document for this invocation."""
+        self.add('total_ms', (time.perf_counter() - self.started) * 1000, 'Milliseconds')
+        self.add('cold_start', 1 if self.cold_start else 0, 'Count')
+
+        document: Dict[str, Any] = dict(self.properties)
+        document['Function'] = self.function
+        for name, (value, _) in self.metrics.items():
+            document[name] = int(value) if float(value).is_integer() else round(value, 3)
+
+        if METRICS_ENABLED:
+            document['_aws'] = {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': NAMESPACE,
+                    'Dimensions': [['Function']],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in self.metrics.items()]
+                }]
+            }
+        return document
+
+
+def start(function: str) -> Recorder:
+    """Begin recording an invocation; the first one in a container is the cold start."""
+    global _active, _cold_start
+    _active = Recorder(function, _cold_start)
+    _cold_start = False
+    return _active
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as `<name>_ms`; repeated stages accumulate."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _active is not None:
+            _active.add(f'{name}_ms', (time.perf_counter() - started) * 1000, 'Milliseconds')
+
+
+def count(name: str, value: float = 1, unit: str = 'Count') -> None:
+    """Add to a counter metric of the active invocation."""
+    if _active is not None:
+        _active.add(name, value, unit)
+
+
+def record_capacity(response: Dict[str, Any], name: str) -> None:
+    """
+    Add the ConsumedCapacity of a response (requested with
+    ReturnConsumedCapacity) to the `name` metric.
+    """
+    if _active is None:
+        return
+    consumed = response.get('ConsumedCapacity')
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    units = sum(float(entry.get('CapacityUnits', 0)) for entry in consumed or [])
+    if units:
+        _active.add(name, units, 'Count')
+
+
+def set_property(name: str, value: Any) -> None:
+    """Attach a searchable, non-metric field to the invocation's log line."""
+    if _active is not None:
+        _active.properties[name] = value
+
+
+def emit() -> None:
+    """Print the active invocation's EMF line and end the invocation."""
+    global _active
+    if _active is None:
+        return
+    recorder, _active = _active, None
+    print(json.dumps(recorder.document(), default=str))
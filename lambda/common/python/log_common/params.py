@@ -0,0 +1,33 @@
+"""
+Query string parameters shared by the read functions.
+
+Each parser raises ValueError with a message naming the parameter, which
+the handlers return to the caller as a 400.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def parse_limit(value: Optional[str], default: int, maximum: int) -> int:
+    """Parse a page size between 1 and `maximum`, or return `default` when absent."""
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= maximum:
+        raise ValueError(f'limit must be between 1 and {maximum}')
+    return limit
+
+
+def parse_timestamp(value: str, name: str) -> datetime:
+    """Parse an ISO 8601 timestamp into an aware UTC datetime; naive ones are taken as UTC."""
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an ISO 8601 timestamp')
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
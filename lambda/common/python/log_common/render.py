@@ -0,0 +1,74 @@
+"""
+JSON rendering of read responses straight from low-level typed items.
+
+Each page is built by decoding the typed maps the client returned
+(log_common.codec) into their public string fields. No Decimals are built
+for numeric attributes, and internal attributes (index keys, the version
+tag) are never converted at all.
+
+The body is encoded with orjson when it is installed (for example
+bundled into the common layer) and with the C-accelerated standard
+library encoder otherwise. Both backends produce compact UTF-8 JSON, so
+clients see the same body whichever one ran.
+"""
+
+import json
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from log_common import codec, metrics, templates as message_templates
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Name of the JSON backend in use, reported by the serialization benchmark
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def public_entries(items: Iterable[Dict[str, Dict[str, Any]]],
+                   templates: Optional[Mapping[str, str]] = None) -> List[Dict[str, str]]:
+    """
+    Return the client-facing fields of each typed item, in order.
+
+    Items stored as templates are re-rendered from `templates`, which must
+    already hold every template they use (codec.template_ids).
+    """
+    return [codec.decode(item, templates) for item in items]
+
+
+def decode_items(items: List[Dict[str, Dict[str, Any]]], template_store: message_templates.TemplateStore,
+                 client: Any, views_table_name: Optional[str]) -> List[Dict[str, str]]:
+    """
+    Like public_entries(), but first loads the templates the items use.
+
+    Templates `template_store` has not seen yet are fetched from the views
+    table first and counted in the template_loads metric.
+
+    Args:
+        items: Typed items, in the order to return them
+        template_store: Templates cached by this container
+        client: Low-level DynamoDB client
+        views_table_name: Name of the views table; None when templates are off
+    """
+    identifiers = codec.template_ids(items)
+    if identifiers and views_table_name is not None:
+        metrics.count('template_loads', template_store.load(client, views_table_name, identifiers))
+    return public_entries(items, template_store)
+
+
+def _default(value: Any) -> Any:
+    """Encode values JSON has no type for (Decimal, sets)."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(body: Any) -> str:
+    """Encode a response body as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(body, default=_default).decode('utf-8')
+    return json.dumps(body, separators=(',', ':'), ensure_ascii=False, default=_default)
@@ -0,0 +1,240 @@
+"""
+Retry policy for DynamoDB writes.
+
+Three pieces work together:
+
+- Exponential backoff with full jitter: the delay before retry n is drawn
+  uniformly from [0, min(MAX_DELAY, BASE_DELAY * 2**n)]. Concurrent
+  containers that were throttled together do not retry together.
+- RetryBudget: a per-invocation cap on retries and total sleep time, also
+  bounded by the Lambda deadline. A throttled invocation gives up in time
+  to return a clean 429 instead of timing out.
+- TokenBucket: an in-container rate limiter that stays idle until
+  DynamoDB throttles. It then paces writes at a rate that shrinks
+  multiplicatively on every throttle signal and grows additively on
+  success. Once the rate has recovered to the ceiling, pacing switches off.
+
+botocore itself is limited to one quick retry in "standard" mode (see
+log_common.clients). Its retries are visible in ResponseMetadata and are
+reported alongside ours.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+# Backoff shape (seconds)
+BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', '0.025'))
+MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY', '1.0'))
+
+# Per-invocation retry budget
+MAX_RETRIES = int(os.environ.get('RETRY_MAX_RETRIES', '10'))
+MAX_SLEEP_SECONDS = float(os.environ.get('RETRY_MAX_SLEEP_SECONDS', '3.0'))
+
+# Token bucket pacing (items per second)
+PACING_MIN_RATE = 10.0
+PACING_MAX_RATE = float(os.environ.get('PACING_MAX_RATE', '2000'))
+PACING_DECREASE = 0.7  # multiplicative decrease per throttle signal
+PACING_INCREASE = 50.0  # additive increase per successful request
+PACING_MAX_WAIT = 1.0  # longest a single acquire may wait (seconds)
+
+# Error codes that mean "slow down"
+THROTTLE_CODES = frozenset({
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+})
+
+# Error codes worth retrying besides throttling
+TRANSIENT_CODES = frozenset({
+    'InternalServerError',
+    'ServiceUnavailable',
+})
+
+
+def is_throttle(error: ClientError) -> bool:
+    """Return True if the error is a throttling signal."""
+    return error.response.get('Error', {}).get('Code') in THROTTLE_CODES
+
+
+def is_retryable(error: ClientError) -> bool:
+    """Return True if the request may succeed when retried."""
+    code = error.response.get('Error', {}).get('Code')
+    return code in THROTTLE_CODES or code in TRANSIENT_CODES
+
+
+def full_jitter(attempt: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    """Delay before retry `attempt` (0-based), drawn with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RetryBudget:
+    """Retries and sleep time allowed to one invocation, shared by its threads."""
+
+    def __init__(self, max_retries: int = MAX_RETRIES, max_sleep: float = MAX_SLEEP_SECONDS,
+                 deadline: Optional[float] = None):
+        self.max_retries = max_retries
+        self.max_sleep = max_sleep
+        self.deadline = deadline
+        self.retries = 0
+        self.sdk_retries = 0
+        self.throttles = 0
+        self.slept = 0.0
+        self.paced = 0.0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> bool:
+        """
+        Sleep before retry `attempt` if the budget allows it.
+
+        Returns:
+            True after sleeping, False if the caller should give up
+        """
+        delay = full_jitter(attempt)
+        with self._lock:
+            over_deadline = self.deadline is not None and time.monotonic() + delay > self.deadline
+            if (self.retries >= self.max_retries or self.slept + delay > self.max_sleep
+                    or over_deadline):
+                self.exhausted = True
+                return False
+            self.retries += 1
+            self.slept += delay
+        time.sleep(delay)
+        return True
+
+    def record(self, response: Dict[str, Any]) -> None:
+        """Count the retries botocore made inside one call."""
+        attempts = response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        if attempts:
+            with self._lock:
+                self.sdk_retries += attempts
+
+    def record_throttle(self) -> None:
+        """Count one throttling signal."""
+        with self._lock:
+            self.throttles += 1
+
+    def record_pacing(self, seconds: float) -> None:
+        """Count time spent waiting on the token bucket."""
+        if seconds:
+            with self._lock:
+                self.paced += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary for the per-invocation log line."""
+        return {
+            'retries': self.retries,
+            'sdk_retries': self.sdk_retries,
+            'throttles': self.throttles,
+            'retry_sleep_ms': round(self.slept * 1000, 1),
+            'pacing_ms': round(self.paced * 1000, 1),
+            'retry_budget_exhausted': self.exhausted
+        }
+
+
+class TokenBucket:
+    """
+    Container-wide pacing of writes after throttling (AIMD).
+
+    Idle until the first throttle signal; the rate then starts from the
+    recently observed send rate and adapts on every signal.
+    """
+
+    def __init__(self, min_rate: float = PACING_MIN_RATE, max_rate: float = PACING_MAX_RATE):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.enabled = False
+        self.rate = max_rate
+        self.tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._window_start = time.monotonic()
+        self._window_count = 0.0
+        self._observed_rate = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Take `amount` tokens, waiting for them if pacing is active.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._observe(now, amount)
+            if not self.enabled:
+                return 0.0
+            self.tokens = min(self.rate, self.tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self.tokens -= amount
+            wait = 0.0 if self.tokens >= 0 else min(PACING_MAX_WAIT, -self.tokens / self.rate)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def on_throttle(self) -> None:
+        """Cut the rate after DynamoDB throttled a request."""
+        with self._lock:
+            if not self.enabled:
+                self.enabled = True
+                self.rate = self._observed_rate or self.max_rate
+                self.tokens = 0.0
+                self._last_refill = time.monotonic()
+            self.rate = max(self.min_rate, self.rate * PACING_DECREASE)
+
+    def on_success(self) -> None:
+        """Raise the rate after a request went through unthrottled."""
+        with self._lock:
+            if not self.enabled:
+                return
+            self.rate = min(self.max_rate, self.rate + PACING_INCREASE)
+            if self.rate >= self.max_rate:
+                self.enabled = False
+
+    def _observe(self, now: float, amount: float) -> None:
+        """Track the send rate over half-second windows (EWMA)."""
+        self._window_count += amount
+        elapsed = now - self._window_start
+        if elapsed >= 0.5:
+            rate = self._window_count / elapsed
+            self._observed_rate = rate if not self._observed_rate else 0.8 * self._observed_rate + 0.2 * rate
+            self._window_start = now
+            self._window_count = 0.0
+
+
+def call(operation: Callable[..., Dict[str, Any]], budget: RetryBudget,
+         bucket: Optional[TokenBucket] = None, cost: float = 1.0, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Call a client operation, retrying throttling and transient errors.
+
+    Raises:
+        ClientError: The last error once it is not retryable or the
+            budget is spent
+    """
+    attempt = 0
+    while True:
+        if bucket is not None:
+            budget.record_pacing(bucket.acquire(cost))
+        try:
+            response = operation(**kwargs)
+        except ClientError as e:
+            if not is_retryable(e):
+                raise
+            budget.record(e.response)
+            if is_throttle(e):
+                budget.record_throttle()
+                if bucket is not None:
+                    bucket.on_throttle()
+            if not budget.backoff(attempt):
+                raise
+            attempt += 1
+            continue
+        budget.record(response)
+        if bucket is not None:
+            bucket.on_success()
+        return response
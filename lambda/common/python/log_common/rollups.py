@@ -0,0 +1,153 @@
+"""
+Pre-aggregated entry counts per time period and severity.
+
+Ingest adds the entries it stored to three rollups with atomic UpdateItem
+ADDs: per minute, per hour and per day. The stats function answers
+time-bucketed count queries from them with BatchGetItem, one small item
+per period, instead of reading the entries themselves.
+
+Each rollup is one item in the views table, keyed
+"stats#<resolution>#<period>" with one numeric attribute per severity:
+
+    {"pk": "stats#minute#2026-01-29T08:30", "info": 812, "error": 9}
+
+Periods are prefixes of the ISO 8601 entry datetime, so an entry's
+periods are found by slicing its timestamp. Like the entry partitions
+(log_common.keys), a rollup can be split into write shards when one item
+would receive more updates than DynamoDB accepts per key; readers sum the
+shards. Minute and hour rollups expire through the views table TTL.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from log_common import keys, metrics
+
+# Partition key prefix of rollup items in the views table
+ROLLUP_KEY_PREFIX = 'stats#'
+
+# Resolution -> (length of the period prefix of an ISO datetime, period span)
+RESOLUTIONS = {
+    'minute': (16, timedelta(minutes=1)),
+    'hour': (13, timedelta(hours=1)),
+    'day': (10, timedelta(days=1)),
+}
+
+# How long rollups are kept (TTL attribute expires_at); None keeps them forever
+RETENTION = {
+    'minute': timedelta(days=7),
+    'hour': timedelta(days=400),
+    'day': None,
+}
+TTL_ATTRIBUTE = 'expires_at'
+
+SEVERITIES = ('info', 'warning', 'error')
+
+# Counts of one period: {(resolution, period): {severity: count}}
+Tally = Dict[Tuple[str, str], Dict[str, int]]
+
+
+def rollup_key(resolution: str, period: str, shard: int = 0) -> str:
+    """Partition key of a rollup item (shard suffixes as in log_common.keys)."""
+    return keys.shard_key(f'{ROLLUP_KEY_PREFIX}{resolution}#{period}', shard)
+
+
+def period_of(timestamp: datetime, resolution: str) -> str:
+    """Return the period of a resolution that a UTC timestamp falls in."""
+    return timestamp.isoformat()[:RESOLUTIONS[resolution][0]]
+
+
+def periods(start: datetime, end: datetime, resolution: str) -> Iterator[str]:
+    """Yield the periods from the one holding `start` to the one holding `end`, oldest first."""
+    length, span = RESOLUTIONS[resolution]
+    current = datetime.fromisoformat(_period_start(period_of(start.astimezone(timezone.utc), resolution)))
+    while current <= end:
+        yield current.isoformat()[:length]
+        current += span
+
+
+def tally(entries: Iterable[Dict[str, Any]]) -> Tally:
+    """
+    Count entries per period of every resolution and per severity.
+
+    Entries are counted at their last_seen time when they have one (a
+    collapsed entry's datetime is the start of its dedup window).
+    """
+    counts: Tally = {}
+    for entry in entries:
+        timestamp = entry.get('last_seen') or entry['datetime']
+        for resolution, (length, _) in RESOLUTIONS.items():
+            severities = counts.setdefault((resolution, timestamp[:length]), {})
+            severities[entry['severity']] = severities.get(entry['severity'], 0) + 1
+    return counts
+
+
+def add(client: Any, table_name: str, resolution: str, period: str,
+        severities: Dict[str, int], shard: int = 0) -> Dict[str, Any]:
+    """
+    Add counts to one rollup item with an atomic UpdateItem.
+
+    Returns:
+        The UpdateItem response (with ConsumedCapacity)
+    """
+    names = {f'#{severity}': severity for severity in severities}
+    values = {f':{severity}': {'N': str(count)} for severity, count in severities.items()}
+    expression = 'ADD ' + ', '.join(f'#{severity} :{severity}' for severity in severities)
+
+    retention = RETENTION[resolution]
+    if retention is not None:
+        expires = datetime.fromisoformat(_period_start(period)) + RESOLUTIONS[resolution][1] + retention
+        names['#expires_at'] = TTL_ATTRIBUTE
+        values[':expires_at'] = {'N': str(int(expires.timestamp()))}
+        expression += ' SET #expires_at = :expires_at'
+
+    return client.update_item(
+        TableName=table_name,
+        Key={'pk': {'S': rollup_key(resolution, period, shard)}},
+        UpdateExpression=expression,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        ReturnConsumedCapacity='TOTAL'
+    )
+
+
+def read(client: Any, table_name: str, resolution: str, start: datetime, end: datetime,
+         shard_count: int = 1) -> List[Dict[str, Any]]:
+    """
+    Read the counts of every period from `start` to `end`, oldest first.
+
+    Periods without a rollup item count as zero. Consumed capacity is
+    recorded as the consumed_rcu metric.
+
+    Returns:
+        One point per period: {"period", "info", "warning", "error"}
+    """
+    points = {period: dict.fromkeys(SEVERITIES, 0) for period in periods(start, end, resolution)}
+    by_key = {
+        rollup_key(resolution, period, shard): period
+        for period in points for shard in range(shard_count)
+    }
+
+    key_list = list(by_key)
+    for offset in range(0, len(key_list), keys.BATCH_GET_SIZE):
+        request = {table_name: {
+            'Keys': [{'pk': {'S': key}} for key in key_list[offset:offset + keys.BATCH_GET_SIZE]],
+            'ProjectionExpression': 'pk, #info, #warning, #error',
+            'ExpressionAttributeNames': {f'#{severity}': severity for severity in SEVERITIES}
+        }}
+        while request:
+            response = client.batch_get_item(RequestItems=request, ReturnConsumedCapacity='TOTAL')
+            metrics.record_capacity(response, 'consumed_rcu')
+            for item in response.get('Responses', {}).get(table_name, []):
+                point = points[by_key[item['pk']['S']]]
+                for severity in SEVERITIES:
+                    if severity in item:
+                        point[severity] += int(item[severity]['N'])
+            request = response.get('UnprocessedKeys') or None
+
+    return [{'period': period, **counts} for period, counts in points.items()]
+
+
+def _period_start(period: str) -> str:
+    """Expand a period prefix into a full ISO 8601 UTC timestamp."""
+    return period + '0000-01-01T00:00:00+00:00'[len(period):]
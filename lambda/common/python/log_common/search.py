@@ -0,0 +1,162 @@
+"""
+Token inverted index over log messages.
+
+With the index enabled, ingest splits every stored message into tokens
+and writes one posting per distinct token to the search table:
+
+    pk: "<token>#<partition>"   e.g. "timeout#2026-01-29#2"
+    sk: "<datetime>#<id>"
+
+The partition is the entry's own time bucket and write shard
+(log_common.keys), so a posting list is bounded by one day and hot tokens
+are spread over the same shards as the entries. All postings of an entry
+live in the same shard, which lets a multi-term query intersect the lists
+of each shard independently.
+
+Within a partition, postings sort by datetime, so a query reads them
+newest first. Lists are intersected by leapfrogging: the stream whose head
+is newest seeks to the head of the oldest one with a new key condition,
+so long runs of non-matching postings are skipped without being read.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from log_common import keys, metrics
+
+# Lower-case runs of letters and digits; shorter tokens are not indexed
+TOKEN_PATTERN = re.compile(r'[0-9a-z]+')
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+
+# Distinct tokens indexed per entry, in message order; the rest are not searchable
+MAX_TOKENS_PER_ENTRY = 32
+
+# Too common to narrow a search down
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'was', 'with'
+})
+
+# Postings read per Query while intersecting
+PAGE_SIZE = 100
+
+# Separator between the datetime and the id in a posting sort key
+SORT_KEY_SEPARATOR = '#'
+
+
+def tokenize(message: str) -> List[str]:
+    """Return the distinct indexable tokens of a message, in order of appearance."""
+    tokens: Dict[str, None] = {}
+    for token in TOKEN_PATTERN.findall(message.lower()):
+        if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH and token not in STOP_WORDS:
+            tokens[token] = None
+            if len(tokens) == MAX_TOKENS_PER_ENTRY:
+                break
+    return list(tokens)
+
+
+def posting_key(token: str, partition: str) -> str:
+    """Partition key of a token's posting list in one bucket shard."""
+    return f'{token}#{partition}'
+
+
+def sort_key(datetime_value: str, entry_id: str) -> str:
+    """Sort key of a posting: newest-first order is datetime order."""
+    return f'{datetime_value}{SORT_KEY_SEPARATOR}{entry_id}'
+
+
+def upper_bound(datetime_value: str) -> str:
+    """Sort key above every posting at `datetime_value` ('~' sorts after id characters)."""
+    return sort_key(datetime_value, '~')
+
+
+def parse_sort_key(value: str) -> Tuple[str, str]:
+    """Split a posting sort key into (datetime, id)."""
+    datetime_value, entry_id = value.split(SORT_KEY_SEPARATOR, 1)
+    return datetime_value, entry_id
+
+
+def postings(entry: Dict[str, Any]) -> List[Dict[str, Dict[str, str]]]:
+    """Build the typed posting items of a log entry (one per token)."""
+    position = {'S': sort_key(entry['datetime'], entry['id'])}
+    return [
+        {'pk': {'S': posting_key(token, entry[keys.BUCKET_ATTRIBUTE])}, 'sk': position}
+        for token in tokenize(entry['message'])
+    ]
+
+
+class PostingStream:
+    """One posting list, read newest first in pages, that can seek backwards."""
+
+    def __init__(self, client: Any, table_name: str, key: str, oldest: str):
+        self.client = client
+        self.table_name = table_name
+        self.key = key
+        self.oldest = oldest
+        self.buffer: List[str] = []
+        # True once the buffer holds every posting at or below the last query's bound
+        self.complete = False
+        self.queries = 0
+
+    def seek(self, bound: str, inclusive: bool = True) -> Optional[str]:
+        """
+        Return the newest posting at or below `bound` (below it when not
+        inclusive), or None when the list has no such posting.
+        """
+        while self.buffer and (self.buffer[0] > bound or (not inclusive and self.buffer[0] == bound)):
+            self.buffer.pop(0)
+        if self.buffer or self.complete:
+            return self.buffer[0] if self.buffer else None
+
+        response = self.client.query(
+            TableName=self.table_name,
+            KeyConditionExpression='pk = :pk AND sk BETWEEN :oldest AND :bound',
+            ExpressionAttributeValues={
+                ':pk': {'S': self.key},
+                ':oldest': {'S': self.oldest},
+                ':bound': {'S': bound}
+            },
+            ProjectionExpression='sk',
+            ScanIndexForward=False,
+            Limit=PAGE_SIZE,
+            ReturnConsumedCapacity='TOTAL'
+        )
+        self.queries += 1
+        metrics.record_capacity(response, 'consumed_rcu')
+        self.buffer = [item['sk']['S'] for item in response.get('Items', [])]
+        if not inclusive and self.buffer and self.buffer[0] == bound:
+            self.buffer.pop(0)
+        self.complete = 'LastEvaluatedKey' not in response
+        if not self.buffer and not self.complete:
+            # The page held only the excluded bound; read on past it
+            return self.seek(bound, inclusive=False)
+        return self.buffer[0] if self.buffer else None
+
+
+def intersect(streams: List[PostingStream], newest: str, limit: int,
+              inclusive: bool = True) -> Iterator[str]:
+    """
+    Yield up to `limit` sort keys present in every stream, newest first.
+
+    Args:
+        streams: One stream per query term, all in the same partition shard
+        newest: Upper bound on the sort keys
+        inclusive: Whether `newest` itself may be returned
+    """
+    bound, found = newest, 0
+    while found < limit:
+        heads = []
+        for stream in streams:
+            head = stream.seek(bound, inclusive)
+            if head is None:
+                return
+            heads.append(head)
+        oldest = min(heads)
+        if oldest == max(heads):
+            yield oldest
+            found += 1
+            bound, inclusive = oldest, False
+        else:
+            # No list can match above the oldest head; every stream leaps to it
+            bound, inclusive = oldest, True
@@ -0,0 +1,64 @@
+"""
+Materialized "latest N entries" snapshot.
+
+The snapshot is one item in the views table holding the newest entries,
+pre-sorted newest first, as zlib-compressed JSON in a Binary attribute.
+It is maintained by the snapshot Lambda from the entries table stream and
+read by read_recent with a single GetItem. Entries are dropped from the
+tail when the blob would outgrow the DynamoDB item size limit.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, List, Tuple
+
+from log_common import keys
+
+# Partition key value of the snapshot item in the views table
+SNAPSHOT_KEY = 'snapshot#latest'
+
+# Keep the compressed blob well below the 400 KB item size limit
+MAX_BLOB_BYTES = 350 * 1024
+
+
+def sort_key(entry: Dict[str, Any]) -> Tuple[str, str]:
+    """Ordering used for snapshot entries (newest first when reversed)."""
+    return entry['datetime'], entry['id']
+
+
+def merge(existing: List[Dict[str, Any]], new: List[Dict[str, Any]],
+          size: int) -> List[Dict[str, Any]]:
+    """
+    Merge new entries into the snapshot, keeping the newest `size`.
+    
+    Entries are reduced to their public fields and de-duplicated by id,
+    so replayed stream records do not produce duplicates, and a collapsed
+    entry is replaced by its latest count.
+    """
+    by_id = {entry['id']: entry for entry in existing}
+    for entry in new:
+        by_id[entry['id']] = {field: entry[field] for field in keys.PUBLIC_FIELDS + keys.COLLAPSED_FIELDS
+                              if field in entry}
+    return sorted(by_id.values(), key=sort_key, reverse=True)[:size]
+
+
+def encode(entries: List[Dict[str, Any]]) -> Tuple[bytes, List[Dict[str, Any]]]:
+    """
+    Compress entries into a snapshot blob that fits in one item.
+    
+    Returns:
+        The blob and the entries it holds (oldest entries are dropped
+        until the blob fits within MAX_BLOB_BYTES)
+    """
+    while True:
+        blob = zlib.compress(json.dumps(entries, separators=(',', ':')).encode())
+        if len(blob) <= MAX_BLOB_BYTES or not entries:
+            return blob, entries
+        # Shrink proportionally to the overshoot, dropping at least one entry
+        keep = min(len(entries) - 1, int(len(entries) * MAX_BLOB_BYTES / len(blob)))
+        entries = entries[:keep]
+
+
+def decode(blob: bytes) -> List[Dict[str, Any]]:
+    """Decompress a snapshot blob into its entries, newest first."""
+    return json.loads(zlib.decompress(blob))
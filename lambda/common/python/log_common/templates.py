@@ -0,0 +1,211 @@
+"""
+Message templates for repetitive log streams.
+
+Most messages are a few hundred templates with different values in them
+("User 4711 logged in from 10.0.0.7"). Ingest can mine those templates
+with a Drain-style parse tree and store an entry as a template id plus
+its parameters, instead of the whole message.
+
+Mining (Miner):
+- A message is split into tokens on single spaces, so joining the tokens
+  with spaces gives back the exact message.
+- Messages are routed through a fixed-depth tree: by token count, then
+  by their first tokens (tokens containing digits route as a wildcard).
+- In the leaf, the message joins the most similar template if at least
+  SIMILARITY_THRESHOLD of its positions match. Positions that differ
+  become wildcards. Otherwise the message starts a new template, with
+  its tokens that contain digits already wildcarded.
+
+Parameters are the message tokens at the wildcard positions. Ingest
+rejects "<" and ">" in messages, so the WILDCARD token can never occur
+literally.
+
+Template ids are content hashes of the template text. The same template
+gets the same id in every container without coordination. A template
+that is generalized later gets a new id, and entries written with the
+old one still render. Templates are persisted once in the views table
+(pk "template#<id>") before the first entry that uses them is written,
+and cached in every container that reads them (TemplateStore).
+"""
+
+import base64
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from log_common import keys
+
+# Token standing for one parameter
+WILDCARD = '<*>'
+
+# Separator of the parameters in the stored "p" attribute; ingest rejects
+# null bytes in messages, so it cannot occur inside a parameter
+PARAM_SEPARATOR = '\x00'
+
+# Partition key prefix of template items in the views table
+TEMPLATE_KEY_PREFIX = 'template#'
+
+# Parse tree shape (Drain defaults)
+SIMILARITY_THRESHOLD = float(os.environ.get('TEMPLATE_SIMILARITY', '0.5'))
+TREE_DEPTH = 4  # token count level + 2 first-token levels + leaf
+MAX_CHILDREN = 100
+MAX_TEMPLATES = int(os.environ.get('TEMPLATE_MAX_TEMPLATES', '2000'))
+MAX_TOKENS = 128
+
+
+def has_digits(token: str) -> bool:
+    """Return True if the token contains a digit (likely a variable)."""
+    return any(character.isdigit() for character in token)
+
+
+def template_id(template: str) -> str:
+    """Content-addressed id of a template (12 URL-safe characters)."""
+    digest = hashlib.sha256(template.encode('utf-8')).digest()[:9]
+    return base64.urlsafe_b64encode(digest).decode('ascii')
+
+
+def render(template: str, params: List[str]) -> str:
+    """Rebuild a message from its template and parameters."""
+    remaining = iter(params)
+    return ' '.join(next(remaining) if token == WILDCARD else token for token in template.split(' '))
+
+
+def similarity(template: List[str], tokens: List[str]) -> float:
+    """Fraction of positions where the template has exactly the (masked) message token."""
+    matches = sum(1 for expected, token in zip(template, tokens) if expected == token)
+    return matches / len(tokens)
+
+
+class Miner:
+    """
+    Drain-style template miner, shared by the threads of one container.
+
+    The number of templates is bounded; once MAX_TEMPLATES exist, messages
+    that match none of them are left unencoded.
+    """
+
+    def __init__(self, similarity_threshold: float = SIMILARITY_THRESHOLD,
+                 max_templates: int = MAX_TEMPLATES):
+        self.similarity_threshold = similarity_threshold
+        self.max_templates = max_templates
+        self.template_count = 0
+        self._root: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    def match(self, message: str) -> Optional[Tuple[str, str, List[str]]]:
+        """
+        Add a message to the tree and return how to store it.
+
+        Returns:
+            (template id, template, parameters), or None when the message
+            is not worth encoding (no template, or the id and parameters
+            would not be shorter than the message)
+        """
+        tokens = message.split(' ')
+        if len(tokens) < 2 or len(tokens) > MAX_TOKENS:
+            return None
+
+        # Tokens with digits are variables up front, as in Drain's preprocessing
+        masked = [WILDCARD if has_digits(token) else token for token in tokens]
+
+        with self._lock:
+            leaf = self._leaf(masked)
+            best, best_similarity = None, 0.0
+            for candidate in leaf:
+                score = similarity(candidate, masked)
+                if score > best_similarity:
+                    best, best_similarity = candidate, score
+
+            if best is not None and best_similarity >= self.similarity_threshold:
+                for position, token in enumerate(masked):
+                    if best[position] != token:
+                        best[position] = WILDCARD
+            elif self.template_count < self.max_templates:
+                best = masked
+                leaf.append(best)
+                self.template_count += 1
+            else:
+                return None
+            template = ' '.join(best)
+            wildcards = [position for position, token in enumerate(best) if token == WILDCARD]
+
+        params = [tokens[position] for position in wildcards]
+        identifier = template_id(template)
+        stored = len(identifier) + sum(len(param.encode('utf-8')) + 1 for param in params)
+        if stored >= len(message.encode('utf-8')):
+            return None
+        return identifier, template, params
+
+    def _leaf(self, masked: List[str]) -> List[List[str]]:
+        """Walk (and grow) the tree to the template list for these tokens."""
+        node = self._root.setdefault(len(masked), {})
+        for key in masked[:TREE_DEPTH - 2]:
+            if key not in node and len(node) >= MAX_CHILDREN:
+                key = WILDCARD
+            node = node.setdefault(key, {})
+        return node.setdefault(None, [])
+
+
+class TemplateStore:
+    """In-container cache of persisted templates, by id."""
+
+    def __init__(self):
+        self.templates: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self.templates
+
+    def __getitem__(self, identifier: str) -> str:
+        return self.templates[identifier]
+
+    def persist(self, client: Any, table_name: str, identifier: str, template: str) -> bool:
+        """
+        Write a template to the views table unless this container already has.
+
+        Returns:
+            True once the template is stored, False if the write failed
+            (the entry should then be stored without it)
+        """
+        if identifier in self.templates:
+            return True
+        try:
+            client.put_item(
+                TableName=table_name,
+                Item={'pk': {'S': TEMPLATE_KEY_PREFIX + identifier}, 'template': {'S': template}},
+                ConditionExpression='attribute_not_exists(pk)'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                print(f"Template persist failed: {e.response['Error']['Code']}")
+                return False
+        with self._lock:
+            self.templates[identifier] = template
+        return True
+
+    def load(self, client: Any, table_name: str, identifiers: Iterable[str]) -> int:
+        """
+        Fetch templates that are not cached yet with BatchGetItem.
+
+        Returns:
+            Number of templates fetched
+        """
+        missing = sorted({identifier for identifier in identifiers if identifier not in self.templates})
+        fetched = 0
+        for start in range(0, len(missing), keys.BATCH_GET_SIZE):
+            request = {table_name: {
+                'Keys': [{'pk': {'S': TEMPLATE_KEY_PREFIX + identifier}}
+                         for identifier in missing[start:start + keys.BATCH_GET_SIZE]],
+                'ProjectionExpression': 'pk, template'
+            }}
+            while request:
+                response = client.batch_get_item(RequestItems=request)
+                with self._lock:
+                    for item in response.get('Responses', {}).get(table_name, []):
+                        self.templates[item['pk']['S'][len(TEMPLATE_KEY_PREFIX):]] = item['template']['S']
+                        fetched += 1
+                request = response.get('UnprocessedKeys') or None
+        return fetched
@@ -0,0 +1,61 @@
+"""
+Write watermark for cache validation.
+
+A tiny item in the views table records a horizon: an epoch time that no
+stored entry's datetime exceeds, except for writes still in flight
+(ingest always sets the horizon ahead of the entries it is about to
+write). A reader that built a result at time T can keep serving it while
+the horizon is still below T, because nothing newer can have been written.
+
+Ingest advances the horizon to now + HORIZON_SECONDS at most once per half
+horizon per container, so the watermark costs a small fraction of a write
+per entry instead of one write per entry.
+"""
+
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+# Partition key value of the watermark item in the views table
+WATERMARK_KEY = 'watermark#latest'
+
+# How far ahead of the current time ingest moves the horizon
+HORIZON_SECONDS = 5.0
+
+
+def advance(client: Any, table_name: str, now: float) -> float:
+    """
+    Move the horizon to now + HORIZON_SECONDS unless it is already later.
+    
+    Args:
+        client: Low-level DynamoDB client
+        table_name: Name of the views table
+        now: Current epoch time
+    
+    Returns:
+        The horizon this container may rely on until it writes again
+    """
+    horizon = now + HORIZON_SECONDS
+    try:
+        client.update_item(
+            TableName=table_name,
+            Key={'pk': {'S': WATERMARK_KEY}},
+            UpdateExpression='SET horizon = :horizon',
+            ConditionExpression='attribute_not_exists(horizon) OR horizon < :horizon',
+            ExpressionAttributeValues={':horizon': {'N': str(round(horizon, 3))}}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # Another container already pushed the horizon further out
+    return horizon
+
+
+def read(client: Any, table_name: str) -> float:
+    """Return the current horizon, or 0.0 if no entry was ever written."""
+    item = client.get_item(
+        TableName=table_name,
+        Key={'pk': {'S': WATERMARK_KEY}},
+        ConsistentRead=True
+    ).get('Item')
+    return float(item['horizon']['N']) if item else 0.0
@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import clients
+
+
+class TestClients(unittest.TestCase):
+
+    def test_clients_cached_per_retry_policy(self):
+        """Test that the read and write clients are distinct and each built once."""
+        self.assertIs(clients.dynamodb(), clients.dynamodb())
+        self.assertIs(clients.dynamodb(write=True), clients.dynamodb(write=True))
+        self.assertIsNot(clients.dynamodb(), clients.dynamodb(write=True))
+
+    def test_only_write_client_limits_sdk_retries(self):
+        """Test that reads keep botocore's DynamoDB retries and writes make one quick retry."""
+        self.assertNotIn('total_max_attempts', clients.dynamodb().meta.config.retries)
+        self.assertEqual(clients.dynamodb(write=True).meta.config.retries['total_max_attempts'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import base64
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from boto3.dynamodb.types import TypeSerializer
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import codec
+
+
+def make_entry(message='Disk usage at 91%', severity='warning'):
+    return {
+        'id': 'a1',
+        'datetime': '2026-01-29T10:00:00.123456+00:00',
+        'bucket': '2026-01-29#1',
+        'severity_bucket': f'{severity}#2026-01-29#1',
+        'severity': severity,
+        'message': message
+    }
+
+
+def public(entry):
+    return {field: entry[field] for field in ('id', 'datetime', 'severity', 'message')}
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_short_message_stored_plain_under_short_names(self):
+        """Test that version 2 rows drop severity and store the message under "m"."""
+        entry = make_entry()
+        item = codec.encode(entry, version=2)
+        self.assertEqual(item['v'], {'N': '2'})
+        self.assertEqual(item['m'], {'S': entry['message']})
+        self.assertNotIn('severity', item)
+        self.assertNotIn('message', item)
+        self.assertEqual(codec.decode(item), public(entry))
+
+    def test_long_message_compressed(self):
+        """Test that long messages are stored as a smaller compressed Binary."""
+        entry = make_entry(message='GET /api/v1/logs 200 ' * 400, severity='error')
+        item = codec.encode(entry, version=2)
+        self.assertNotIn('m', item)
+        self.assertLess(len(item['mz']['B']), len(entry['message']) // 4)
+        self.assertEqual(codec.decode(item), public(entry))
+
+    def test_incompressible_message_stored_plain(self):
+        """Test that compression is skipped when it would not save space."""
+        message = 'y' * 1000
+        with patch('log_common.codec.compress', return_value=b'\x01' + b'z' * 1000):
+            item = codec.encode(make_entry(message=message), version=2)
+        self.assertEqual(item['m'], {'S': message})
+        self.assertNotIn('mz', item)
+
+    def test_version_1_rows_decoded(self):
+        """Test that rows written before the codec decode unchanged."""
+        entry = make_entry()
+        serializer = TypeSerializer()
+        legacy = {name: serializer.serialize(value) for name, value in entry.items()}
+        self.assertEqual(codec.decode(legacy), public(entry))
+        self.assertEqual(codec.decode(codec.encode(entry, version=1)), public(entry))
+
+    def test_collapsed_entries_keep_count(self):
+        """Test that count and last_seen of collapsed entries are decoded in every version."""
+        for version in (1, 2):
+            item = codec.encode(make_entry(), version=version)
+            self.assertNotIn('count', item)
+            item['count'] = {'N': '42'}
+            item['last_seen'] = {'S': '2026-01-29T10:00:59.000001+00:00'}
+            decoded = codec.decode(item)
+            self.assertEqual(decoded['count'], 42)
+            self.assertEqual(decoded['last_seen'], '2026-01-29T10:00:59.000001+00:00')
+
+    def test_stream_image_binary_is_base64(self):
+        """Test that base64-encoded Binary values from stream events decode."""
+        entry = make_entry(message='x' * 2000)
+        item = codec.encode(entry, version=2)
+        item['mz'] = {'B': base64.b64encode(item['mz']['B']).decode('ascii')}
+        self.assertEqual(codec.decode(item)['message'], entry['message'])
+
+    def test_templated_rows(self):
+        """Test that version 3 rows store only the template id and parameters."""
+        entry = make_entry(message='User 42 logged in from ')
+        item = codec.encode({**entry, 'template_id': 'abc', 'params': ['42', '']}, version=2)
+        self.assertEqual(item['v'], {'N': '3'})
+        self.assertEqual(item['p'], {'S': '42\x00'})
+        self.assertNotIn('m', item)
+
+        templates = {'abc': 'User <*> logged in from <*>'}
+        self.assertEqual(codec.template_ids([item]), {'abc'})
+        self.assertEqual(codec.decode(item, templates), public(entry))
+        with self.assertRaises(KeyError):
+            codec.decode(item)
+
+    def test_unknown_compression_rejected(self):
+        """Test that unknown markers and unavailable algorithms raise."""
+        with self.assertRaises(ValueError):
+            codec.decompress(b'\x09data')
+        with patch('log_common.codec.zstandard', None):
+            with self.assertRaises(RuntimeError):
+                codec.decompress(codec.ZSTD_MARKER + b'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import cursor
+
+
+class TestCursor(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Test that an encoded cursor decodes to the same payload."""
+        payload = {'until': '2026-01-29T10:00:00+00:00', 'id': 'abc'}
+        self.assertEqual(cursor.decode(cursor.encode(payload)), payload)
+
+    def test_tampered_payload_rejected(self):
+        """Test that editing the payload invalidates the signature."""
+        token = cursor.encode({'id': 'abc'})
+        data, tag = token.split('.')
+        forged = cursor._b64encode(b'{"id":"xyz"}')
+        with self.assertRaises(cursor.InvalidCursor):
+            cursor.decode(f'{forged}.{tag}')
+
+    def test_malformed_cursor_rejected(self):
+        """Test that garbage input raises InvalidCursor."""
+        for token in ['', 'not-a-cursor', 'a.b.c', '!!!.???']:
+            with self.assertRaises(cursor.InvalidCursor):
+                cursor.decode(token)
+
+
+if __name__ == '__main__':
+    unittest.main()
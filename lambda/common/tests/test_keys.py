@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import keys
+
+
+class TestKeys(unittest.TestCase):
+
+    def test_bucket_for(self):
+        """Test that timestamps map to their UTC day bucket."""
+        timestamp = datetime(2026, 1, 29, 23, 59, 59, tzinfo=timezone.utc)
+        self.assertEqual(keys.bucket_for(timestamp), '2026-01-29')
+
+    def test_buckets_newest_first(self):
+        """Test bucket walk order across a month boundary."""
+        newest = datetime(2026, 2, 1, 8, 0, tzinfo=timezone.utc)
+        oldest = datetime(2026, 1, 30, 20, 0, tzinfo=timezone.utc)
+        self.assertEqual(
+            list(keys.buckets_newest_first(newest, oldest)),
+            ['2026-02-01', '2026-01-31', '2026-01-30']
+        )
+
+    def test_buckets_single_day(self):
+        """Test that a range inside one day yields one bucket."""
+        newest = datetime(2026, 1, 29, 10, 0, tzinfo=timezone.utc)
+        oldest = datetime(2026, 1, 29, 1, 0, tzinfo=timezone.utc)
+        self.assertEqual(list(keys.buckets_newest_first(newest, oldest)), ['2026-01-29'])
+
+    def test_shard_keys(self):
+        """Test that shard 0 keeps the bare bucket so unsharded entries stay readable."""
+        self.assertEqual(keys.shard_key('2026-01-29', 0), '2026-01-29')
+        self.assertEqual(
+            keys.shard_keys('2026-01-29', 3),
+            ['2026-01-29', '2026-01-29#1', '2026-01-29#2']
+        )
+
+    def test_severity_key(self):
+        """Test that severity partitions are prefixed bucket shards."""
+        self.assertEqual(keys.severity_key('error', '2026-01-29#2'), 'error#2026-01-29#2')
+
+
+if __name__ == '__main__':
+    unittest.main()
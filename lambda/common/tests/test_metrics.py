@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import metrics
+
+
+def emitted(mock_print):
+    """Parse the EMF line printed by metrics.emit()."""
+    return json.loads(mock_print.call_args.args[0])
+
+
+@patch('builtins.print')
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        cold_start = patch('log_common.metrics._cold_start', True)
+        cold_start.start()
+        self.addCleanup(cold_start.stop)
+
+    def test_emf_document(self, mock_print):
+        """Test that stages, counters and properties end up in one EMF line."""
+        metrics.start('ingest')
+        with metrics.stage('parse'):
+            pass
+        metrics.count('items', 3)
+        metrics.set_property('status_code', 201)
+        metrics.emit()
+
+        document = emitted(mock_print)
+        self.assertEqual(document['Function'], 'ingest')
+        self.assertEqual(document['items'], 3)
+        self.assertEqual(document['status_code'], 201)
+        self.assertIn('parse_ms', document)
+        self.assertIn('total_ms', document)
+
+        directive = document['_aws']['CloudWatchMetrics'][0]
+        self.assertEqual(directive['Namespace'], metrics.NAMESPACE)
+        self.assertEqual(directive['Dimensions'], [['Function']])
+        units = {m['Name']: m['Unit'] for m in directive['Metrics']}
+        self.assertEqual(units['parse_ms'], 'Milliseconds')
+        self.assertEqual(units['items'], 'Count')
+        self.assertNotIn('status_code', units)
+
+    def test_cold_start_only_first_invocation(self, mock_print):
+        """Test that only the first invocation in a container is a cold start."""
+        metrics.start('ingest')
+        metrics.emit()
+        self.assertEqual(emitted(mock_print)['cold_start'], 1)
+
+        metrics.start('ingest')
+        metrics.emit()
+        self.assertEqual(emitted(mock_print)['cold_start'], 0)
+
+    def test_repeated_stages_accumulate(self, mock_print):
+        """Test that a stage entered several times is reported once, summed."""
+        metrics.start('read_recent')
+        with patch('log_common.metrics.time.perf_counter', side_effect=[0.0, 0.010, 1.0, 1.005]):
+            with metrics.stage('dynamodb'):
+                pass
+            with metrics.stage('dynamodb'):
+                pass
+        metrics.emit()
+        self.assertEqual(emitted(mock_print)['dynamodb_ms'], 15)
+
+    def test_record_capacity(self, mock_print):
+        """Test that single and per-table ConsumedCapacity are both summed."""
+        metrics.start('ingest')
+        metrics.record_capacity({'ConsumedCapacity': {'CapacityUnits': 1.0}}, 'consumed_wcu')
+        metrics.record_capacity({'ConsumedCapacity': [{'CapacityUnits': 2.5}]}, 'consumed_wcu')
+        metrics.record_capacity({}, 'consumed_wcu')
+        metrics.emit()
+        self.assertEqual(emitted(mock_print)['consumed_wcu'], 3.5)
+
+    def test_noop_outside_invocation(self, mock_print):
+        """Test that recording without an active invocation does nothing."""
+        metrics.count('items')
+        with metrics.stage('parse'):
+            pass
+        metrics.emit()
+        mock_print.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
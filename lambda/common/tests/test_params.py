@@ -0,0 +1,31 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import params
+
+
+class TestParams(unittest.TestCase):
+
+    def test_parse_limit(self):
+        """Test that the limit defaults when absent and must be an integer in range."""
+        self.assertEqual(params.parse_limit(None, 100, 1000), 100)
+        self.assertEqual(params.parse_limit('1000', 100, 1000), 1000)
+        for value in ('abc', '0', '1001'):
+            with self.assertRaises(ValueError):
+                params.parse_limit(value, 100, 1000)
+
+    def test_parse_timestamp_normalizes_to_utc(self):
+        """Test that offsets are converted to UTC and naive timestamps are taken as UTC."""
+        expected = datetime(2026, 1, 29, 10, 0, tzinfo=timezone.utc)
+        self.assertEqual(params.parse_timestamp('2026-01-29T12:00:00+02:00', 'since'), expected)
+        self.assertEqual(params.parse_timestamp('2026-01-29T10:00:00', 'since'), expected)
+        with self.assertRaisesRegex(ValueError, '^until must be an ISO 8601 timestamp$'):
+            params.parse_timestamp('yesterday', 'until')
+
+
+if __name__ == '__main__':
+    unittest.main()
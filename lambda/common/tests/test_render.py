@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from boto3.dynamodb.types import TypeSerializer
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import codec, render, templates
+
+ENTRY = {
+    'id': 'a1',
+    'datetime': '2026-01-29T10:00:00+00:00',
+    'severity': 'error',
+    'message': 'Disk "full" – café',
+}
+
+
+class TestRender(unittest.TestCase):
+
+    def test_public_entries_from_typed_items(self):
+        """Test that only public string fields are taken from typed items."""
+        serializer = TypeSerializer()
+        item = {name: serializer.serialize(value)
+                for name, value in {**ENTRY, 'bucket': '2026-01-29#1', 'ttl': 1769680800}.items()}
+        self.assertEqual(render.public_entries([item]), [ENTRY])
+        self.assertEqual(codec.decode(item), ENTRY)
+
+    def test_decode_items_loads_missing_templates(self):
+        """Test that templates of the items are fetched once, then served from the store."""
+        item = codec.encode({**ENTRY, 'bucket': '2026-01-29', 'severity_bucket': 'error#2026-01-29',
+                             'message': 'Disk 7 full', 'template_id': 'abc', 'params': ['7']}, version=2)
+        client = MagicMock()
+        client.batch_get_item.return_value = {
+            'Responses': {'views': [{'pk': {'S': 'template#abc'}, 'template': {'S': 'Disk <*> full'}}]}
+        }
+        store = templates.TemplateStore()
+
+        self.assertEqual(render.decode_items([item], store, client, 'views'), [{**ENTRY, 'message': 'Disk 7 full'}])
+        render.decode_items([item], store, client, 'views')
+        client.batch_get_item.assert_called_once()
+
+    def test_backends_produce_same_body(self):
+        """Test that orjson and the standard library encode bodies identically."""
+        body = {'count': 1, 'logs': [ENTRY], 'query_method': 'snapshot', 'scan_truncated': True}
+        with patch('log_common.render.orjson', None):
+            fallback = render.dumps(body)
+        self.assertEqual(json.loads(fallback), body)
+        if render.orjson is not None:
+            self.assertEqual(render.dumps(body), fallback)
+
+    def test_decimals_encoded_as_numbers(self):
+        """Test that Decimal values from the resource layer still encode."""
+        with patch('log_common.render.orjson', None):
+            self.assertEqual(render.dumps({'n': Decimal('1.5')}), '{"n":1.5}')
+        self.assertEqual(json.loads(render.dumps({'n': Decimal('2')})), {'n': 2.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import retry
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'PutItem')
+
+
+@patch('log_common.retry.time.sleep')
+class TestRetry(unittest.TestCase):
+
+    def test_full_jitter_bounds(self, mock_sleep):
+        """Test that delays stay within the exponential envelope and the cap."""
+        for attempt in range(12):
+            delay = retry.full_jitter(attempt, base=0.1, cap=1.0)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(1.0, 0.1 * 2 ** attempt))
+
+    def test_budget_limits_retries_and_sleep(self, mock_sleep):
+        """Test that the budget refuses retries past its count or sleep allowance."""
+        budget = retry.RetryBudget(max_retries=3, max_sleep=10.0)
+        self.assertEqual([budget.backoff(0) for _ in range(4)], [True, True, True, False])
+        self.assertTrue(budget.exhausted)
+
+        with patch('log_common.retry.full_jitter', return_value=0.6):
+            budget = retry.RetryBudget(max_retries=10, max_sleep=1.0)
+            self.assertTrue(budget.backoff(0))
+            self.assertFalse(budget.backoff(1))
+        self.assertEqual(budget.stats()['retry_sleep_ms'], 600.0)
+
+    def test_budget_respects_deadline(self, mock_sleep):
+        """Test that no retry starts after the invocation deadline."""
+        budget = retry.RetryBudget(deadline=time.monotonic() - 1)
+        self.assertFalse(budget.backoff(0))
+        mock_sleep.assert_not_called()
+
+    def test_token_bucket_idle_until_throttled(self, mock_sleep):
+        """Test that pacing starts on throttling, slows down and switches off on recovery."""
+        bucket = retry.TokenBucket(min_rate=10, max_rate=1000)
+        self.assertEqual(bucket.acquire(100), 0.0)
+        self.assertFalse(bucket.enabled)
+
+        bucket.on_throttle()
+        first_rate = bucket.rate
+        bucket.on_throttle()
+        self.assertTrue(bucket.enabled)
+        self.assertLess(bucket.rate, first_rate)
+        self.assertGreater(bucket.acquire(50), 0.0)
+
+        for _ in range(100):
+            bucket.on_success()
+        self.assertFalse(bucket.enabled)
+
+    def test_call_retries_throttles(self, mock_sleep):
+        """Test that throttled calls are retried until they succeed."""
+        operation = MagicMock(side_effect=[client_error('ThrottlingException'), {'ok': True}])
+        budget = retry.RetryBudget()
+        bucket = retry.TokenBucket()
+
+        self.assertEqual(retry.call(operation, budget, bucket, Key='x'), {'ok': True})
+        operation.assert_called_with(Key='x')
+        self.assertEqual(budget.retries, 1)
+        self.assertEqual(budget.throttles, 1)
+        self.assertTrue(bucket.enabled)
+
+    def test_call_does_not_retry_client_errors(self, mock_sleep):
+        """Test that non-retryable errors are raised immediately."""
+        operation = MagicMock(side_effect=client_error('ValidationException'))
+        budget = retry.RetryBudget()
+        with self.assertRaises(ClientError):
+            retry.call(operation, budget)
+        self.assertEqual(operation.call_count, 1)
+        self.assertEqual(budget.retries, 0)
+
+    def test_call_gives_up_when_budget_spent(self, mock_sleep):
+        """Test that the last error is raised once the budget is spent."""
+        operation = MagicMock(side_effect=client_error('ProvisionedThroughputExceededException'))
+        budget = retry.RetryBudget(max_retries=2)
+        with self.assertRaises(ClientError):
+            retry.call(operation, budget)
+        self.assertEqual(operation.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
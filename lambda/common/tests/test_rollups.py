@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import rollups
+
+
+class TestRollups(unittest.TestCase):
+
+    def test_tally_counts_every_resolution(self):
+        """Test that entries are counted per minute, hour and day by severity."""
+        counts = rollups.tally([
+            {'datetime': '2026-01-29T23:59:59.5+00:00', 'severity': 'error'},
+            {'datetime': '2026-01-29T23:59:01+00:00', 'severity': 'error'},
+            {'datetime': '2026-01-30T00:00:00+00:00', 'severity': 'info'},
+        ])
+        self.assertEqual(counts[('minute', '2026-01-29T23:59')], {'error': 2})
+        self.assertEqual(counts[('hour', '2026-01-30T00')], {'info': 1})
+        self.assertEqual(counts[('day', '2026-01-29')], {'error': 2})
+        self.assertEqual(len(counts), 6)
+
+    def test_collapsed_entries_counted_when_last_seen(self):
+        """Test that a collapsed entry is counted at its occurrence time, not its window start."""
+        counts = rollups.tally([{'datetime': '2026-01-29T08:00:00+00:00', 'severity': 'warning',
+                                 'last_seen': '2026-01-29T08:04:59+00:00'}])
+        self.assertIn(('minute', '2026-01-29T08:04'), counts)
+
+    def test_periods_cover_range(self):
+        """Test that periods run from the one holding start to the one holding end."""
+        start = datetime(2026, 1, 29, 22, 59, 30, tzinfo=timezone.utc)
+        end = datetime(2026, 1, 30, 1, 0, tzinfo=timezone.utc)
+        self.assertEqual(list(rollups.periods(start, end, 'hour')),
+                         ['2026-01-29T22', '2026-01-29T23', '2026-01-30T00', '2026-01-30T01'])
+        self.assertEqual(list(rollups.periods(start, end, 'day')), ['2026-01-29', '2026-01-30'])
+
+    def test_sharded_keys(self):
+        """Test that shard 0 uses the bare key, as entry partitions do."""
+        self.assertEqual(rollups.rollup_key('minute', '2026-01-29T08:30'), 'stats#minute#2026-01-29T08:30')
+        self.assertEqual(rollups.rollup_key('day', '2026-01-29', 3), 'stats#day#2026-01-29#3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+from moto import mock_dynamodb2
+import boto3
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import search
+
+
+class TestTokenize(unittest.TestCase):
+
+    def test_tokens_lowercased_distinct_and_ordered(self):
+        """Test that tokens are lower-case alphanumeric runs, each listed once."""
+        self.assertEqual(search.tokenize('Timeout: DB timeout after 30s (user_id=42)'),
+                         ['timeout', 'db', 'after', '30s', 'user', 'id', '42'])
+
+    def test_short_tokens_and_stop_words_skipped(self):
+        """Test that single characters and stop words are not indexed."""
+        self.assertEqual(search.tokenize('A disk of node 7 is full'), ['disk', 'node', 'full'])
+
+    def test_tokens_per_entry_bounded(self):
+        """Test that a long message indexes at most MAX_TOKENS_PER_ENTRY tokens."""
+        message = ' '.join(f'word{i}' for i in range(100))
+        self.assertEqual(len(search.tokenize(message)), search.MAX_TOKENS_PER_ENTRY)
+
+    def test_postings_in_entry_partition(self):
+        """Test that postings are keyed by token and the entry's bucket shard."""
+        entry = {'id': 'abc', 'datetime': '2026-01-29T08:30:00+00:00', 'bucket': '2026-01-29#2',
+                 'message': 'Payment failed'}
+        self.assertEqual(search.postings(entry), [
+            {'pk': {'S': 'payment#2026-01-29#2'}, 'sk': {'S': '2026-01-29T08:30:00+00:00#abc'}},
+            {'pk': {'S': 'failed#2026-01-29#2'}, 'sk': {'S': '2026-01-29T08:30:00+00:00#abc'}},
+        ])
+
+
+class TestIntersect(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_dynamodb = mock_dynamodb2()
+        self.mock_dynamodb.start()
+        self.client = boto3.client('dynamodb', region_name='us-east-1')
+        self.client.create_table(
+            TableName='test-log-search',
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"},
+                       {"AttributeName": "sk", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"},
+                                  {"AttributeName": "sk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+
+    def tearDown(self):
+        self.mock_dynamodb.stop()
+
+    def index(self, minute, message):
+        entry = {'id': f'id{minute:02d}', 'datetime': f'2026-01-29T08:{minute:02d}:00+00:00',
+                 'bucket': '2026-01-29', 'message': message}
+        for posting in search.postings(entry):
+            self.client.put_item(TableName='test-log-search', Item=posting)
+        return search.sort_key(entry['datetime'], entry['id'])
+
+    def streams(self, *tokens):
+        return [search.PostingStream(self.client, 'test-log-search', search.posting_key(token, '2026-01-29'),
+                                     '2026-01-29T00:00:00+00:00')
+                for token in tokens]
+
+    @patch('log_common.search.PAGE_SIZE', 3)
+    def test_matches_newest_first_across_pages(self):
+        """Test that only entries holding every term are returned, newest first."""
+        expected = []
+        for minute in range(40):
+            if minute % 10 == 3:
+                expected.append(self.index(minute, 'payment timeout'))
+            else:
+                self.index(minute, 'payment ok' if minute % 2 else 'timeout elsewhere')
+
+        matches = list(search.intersect(self.streams('payment', 'timeout'), '2026-01-29T23:59:59+00:00#~', 10))
+
+        self.assertEqual(matches, expected[::-1])
+
+    @patch('log_common.search.PAGE_SIZE', 3)
+    def test_rare_term_leaps_over_common_one(self):
+        """Test that a common term's list is skipped instead of read in full."""
+        for minute in range(60):
+            self.index(minute, 'request served' + (' checksum' if minute in (5, 50) else ''))
+        streams = self.streams('served', 'checksum')
+
+        matches = list(search.intersect(streams, '2026-01-29T23:59:59+00:00#~', 10))
+
+        self.assertEqual([search.parse_sort_key(match)[1] for match in matches], ['id50', 'id05'])
+        self.assertLess(streams[0].queries, 60 // search.PAGE_SIZE)
+
+    def test_resumes_below_exclusive_bound(self):
+        """Test that a cursor position is not returned again."""
+        positions = [self.index(minute, 'disk full') for minute in range(5)]
+        matches = list(search.intersect(self.streams('disk', 'full'), positions[3], 2, inclusive=False))
+        self.assertEqual(matches, [positions[2], positions[1]])
+
+    def test_missing_term_matches_nothing(self):
+        """Test that a term without postings ends the intersection."""
+        self.index(1, 'disk full')
+        self.assertEqual(list(search.intersect(self.streams('disk', 'quota'), '2026-01-29T23:59:59+00:00#~', 10)),
+                         [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import snapshot
+
+
+def entry(i, message='message'):
+    return {
+        'id': f'id-{i}',
+        'datetime': f'2026-01-29T10:{i:02d}:00+00:00',
+        'severity': 'info',
+        'message': message,
+        'bucket': '2026-01-29'
+    }
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_merge_keeps_newest(self):
+        """Test that merge keeps the newest entries, newest first, without internal fields."""
+        merged = snapshot.merge([], [entry(i) for i in range(10)], 3)
+        self.assertEqual([e['id'] for e in merged], ['id-9', 'id-8', 'id-7'])
+        self.assertNotIn('bucket', merged[0])
+
+    def test_merge_deduplicates_replayed_records(self):
+        """Test that replaying a stream record does not duplicate an entry."""
+        existing = snapshot.merge([], [entry(1), entry(2)], 10)
+        merged = snapshot.merge(existing, [entry(2), entry(3)], 10)
+        self.assertEqual([e['id'] for e in merged], ['id-3', 'id-2', 'id-1'])
+
+    def test_merge_updates_collapsed_count(self):
+        """Test that a newer image of a collapsed entry replaces its count."""
+        existing = snapshot.merge([], [{**entry(1), 'count': 3, 'last_seen': '2026-01-29T10:01:20+00:00'}], 10)
+        merged = snapshot.merge(existing, [{**entry(1), 'count': 7, 'last_seen': '2026-01-29T10:01:50+00:00'}], 10)
+        self.assertEqual([(e['id'], e['count']) for e in merged], [('id-1', 7)])
+
+    def test_encode_round_trip(self):
+        """Test that an encoded snapshot decodes to the same entries."""
+        entries = snapshot.merge([], [entry(i) for i in range(5)], 5)
+        blob, kept = snapshot.encode(entries)
+        self.assertEqual(kept, entries)
+        self.assertEqual(snapshot.decode(blob), entries)
+
+    @patch('log_common.snapshot.MAX_BLOB_BYTES', 2048)
+    def test_encode_drops_oldest_to_fit(self):
+        """Test that oversized snapshots keep only the newest entries that fit."""
+        entries = snapshot.merge([], [entry(i, os.urandom(300).hex()) for i in range(20)], 20)
+        blob, kept = snapshot.encode(entries)
+        self.assertLessEqual(len(blob), 2048)
+        self.assertGreater(len(kept), 0)
+        self.assertEqual(kept, entries[:len(kept)])
+
+
+if __name__ == '__main__':
+    unittest.main()
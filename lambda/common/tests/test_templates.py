@@ -0,0 +1,97 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import templates
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'PutItem')
+
+
+class TestMiner(unittest.TestCase):
+
+    def test_messages_grouped_and_rendered_exactly(self):
+        """Test that variants of one message share a template and render back exactly."""
+        miner = templates.Miner()
+        messages = [f'Job {i} finished  in {i * 3} ms on node-{i % 4} ' for i in range(10)]
+        mined = [miner.match(message) for message in messages]
+
+        self.assertEqual(len({template_id for template_id, _, _ in mined}), 1)
+        self.assertEqual(mined[0][1], 'Job <*> finished  in <*> ms on <*> ')
+        for message, (_, template, params) in zip(messages, mined):
+            self.assertEqual(templates.render(template, params), message)
+
+    def test_generalized_template_gets_new_id(self):
+        """Test that a template widened by a new variant is a new, content-addressed template."""
+        miner = templates.Miner()
+        first_id, first, _ = miner.match('Cache miss for key alpha in region west')
+        second_id, second, params = miner.match('Cache miss for key beta in region west')
+
+        self.assertNotEqual(first_id, second_id)
+        self.assertEqual(second, 'Cache miss for key <*> in region west')
+        self.assertEqual(params, ['beta'])
+        self.assertEqual(templates.template_id(second), second_id)
+        self.assertEqual(templates.render(first, []), 'Cache miss for key alpha in region west')
+
+    def test_not_worth_encoding(self):
+        """Test that single tokens and short all-variable messages are left alone."""
+        miner = templates.Miner()
+        self.assertIsNone(miner.match('heartbeat'))
+        self.assertIsNone(miner.match('a1 b2'))
+
+    def test_template_count_bounded(self):
+        """Test that no templates are created beyond the limit."""
+        miner = templates.Miner(max_templates=2)
+        self.assertIsNotNone(miner.match('alpha service started normally today'))
+        self.assertIsNotNone(miner.match('beta worker stopped cleanly after shutdown'))
+        self.assertIsNone(miner.match('gamma queue drained without any errors'))
+        self.assertEqual(miner.template_count, 2)
+
+
+class TestTemplateStore(unittest.TestCase):
+
+    def test_persist_once(self):
+        """Test that a template is written once and an existing item counts as stored."""
+        client = MagicMock()
+        store = templates.TemplateStore()
+        self.assertTrue(store.persist(client, 'views', 'abc', 'User <*> left'))
+        self.assertTrue(store.persist(client, 'views', 'abc', 'User <*> left'))
+        client.put_item.assert_called_once()
+
+        client.put_item.side_effect = client_error('ConditionalCheckFailedException')
+        self.assertTrue(store.persist(client, 'views', 'def', 'User <*> joined'))
+        self.assertEqual(store['def'], 'User <*> joined')
+
+    def test_persist_failure_reported(self):
+        """Test that other write errors leave the template unknown."""
+        client = MagicMock()
+        client.put_item.side_effect = client_error('ProvisionedThroughputExceededException')
+        store = templates.TemplateStore()
+        self.assertFalse(store.persist(client, 'views', 'abc', 'User <*> left'))
+        self.assertNotIn('abc', store)
+
+    def test_load_fetches_missing_and_retries_unprocessed(self):
+        """Test that only unknown templates are fetched, following UnprocessedKeys."""
+        client = MagicMock()
+        client.batch_get_item.side_effect = [
+            {'Responses': {'views': [{'pk': {'S': 'template#a'}, 'template': {'S': 'A <*>'}}]},
+             'UnprocessedKeys': {'views': {'Keys': [{'pk': {'S': 'template#b'}}]}}},
+            {'Responses': {'views': [{'pk': {'S': 'template#b'}, 'template': {'S': 'B <*>'}}]}}
+        ]
+        store = templates.TemplateStore()
+        store.templates['c'] = 'C <*>'
+
+        self.assertEqual(store.load(client, 'views', ['a', 'b', 'c']), 2)
+        self.assertEqual((store['a'], store['b']), ('A <*>', 'B <*>'))
+        keys = client.batch_get_item.call_args_list[0].kwargs['RequestItems']['views']['Keys']
+        self.assertEqual(keys, [{'pk': {'S': 'template#a'}}, {'pk': {'S': 'template#b'}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+from moto import mock_dynamodb2
+import boto3
+
+# Ensure log_common can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python')))
+from log_common import watermark
+
+
+class TestWatermark(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_dynamodb = mock_dynamodb2()
+        self.mock_dynamodb.start()
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        self.table = dynamodb.create_table(
+            TableName='test-log-views',
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.client = boto3.client("dynamodb", region_name="us-east-1")
+
+    def tearDown(self):
+        self.mock_dynamodb.stop()
+
+    def test_read_without_writes(self):
+        """Test that a missing watermark reads as zero."""
+        self.assertEqual(watermark.read(self.client, 'test-log-views'), 0.0)
+
+    def test_advance_is_monotonic(self):
+        """Test that the horizon only moves forward."""
+        watermark.advance(self.client, 'test-log-views', 1000.0)
+        self.assertEqual(watermark.read(self.client, 'test-log-views'), 1000.0 + watermark.HORIZON_SECONDS)
+
+        # A container with an older clock reading must not move it back
+        watermark.advance(self.client, 'test-log-views', 990.0)
+        self.assertEqual(watermark.read(self.client, 'test-log-views'), 1000.0 + watermark.HORIZON_SECONDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
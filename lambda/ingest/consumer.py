@@ -0,0 +1,80 @@
+import json
+from typing import Dict, Any, List
+from log_common import metrics, retry
+
+# Shares the ingest package: entries are written by the same code path
+import index
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    SQS consumer that writes queued log entries to DynamoDB.
+
+    Each message body is {"entries": [...]}, as enqueued by the ingest
+    handler in write-behind mode (WRITE_QUEUE_URL). The entries of the
+    whole batch of messages are written together (index.write_entries),
+    through the same throttling, pacing, template, dedup and indexing
+    handling as synchronous ingest.
+
+    Returns:
+    {
+        "batchItemFailures": [{"itemIdentifier": message id}, ...]
+    }
+    Only messages with an unwritten entry are reported, so SQS redelivers
+    just those (ReportBatchItemFailures). Rewriting an entry that was
+    already stored is harmless: it overwrites itself under the same id.
+    In dedup mode a redelivered entry is counted again.
+    """
+    metrics.start('write_consumer')
+    if context is not None:
+        metrics.set_property('request_id', getattr(context, 'aws_request_id', None))
+    budget = retry.RetryBudget(deadline=index.retry_deadline(context))
+    failures: List[str] = []
+    try:
+        pending: List[Dict[str, Any]] = []
+        message_entries: Dict[str, List[str]] = {}
+
+        with metrics.stage('parse'):
+            for record in event.get('Records', []):
+                message_id = record['messageId']
+                try:
+                    entries = json.loads(record['body'])['entries']
+                    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+                        raise TypeError('entries must be a list of objects')
+                    entry_ids = [entry['id'] for entry in entries]
+                except (ValueError, KeyError, TypeError):
+                    # Left on the queue until its redrive policy moves it to the DLQ
+                    print(f"Malformed message {message_id}")
+                    failures.append(message_id)
+                    continue
+                message_entries[message_id] = entry_ids
+                pending.extend(entries)
+        metrics.count('messages', len(message_entries))
+
+        if pending:
+            index.advance_watermark()
+            index.apply_templates(pending)
+
+            with metrics.stage('dynamodb'):
+                failed_ids = index.write_entries(pending, budget)
+            stored = [entry for entry in pending if entry['id'] not in failed_ids]
+            metrics.count('items', len(stored))
+            index.record_rollups(stored)
+            index.index_entries(stored, budget)
+
+            failures.extend(
+                message_id for message_id, entry_ids in message_entries.items()
+                if failed_ids.intersection(entry_ids)
+            )
+
+        metrics.count('failed_messages', len(failures))
+        return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
+
+    finally:
+        stats = budget.stats()
+        metrics.count('retries', stats.pop('retries'))
+        metrics.count('throttles', stats.pop('throttles'))
+        metrics.count('retry_sleep_ms', stats.pop('retry_sleep_ms'), 'Milliseconds')
+        for name, value in stats.items():
+            metrics.set_property(name, value)
+        metrics.emit()
@@ -1,106 +1,187 @@
+import base64
 import json
 import os
+import random
+import time
 import uuid
 import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any
-import boto3
+from typing import Dict, Any, List, Optional
 from botocore.exceptions import ClientError
+from log_common import clients, codec, keys, metrics, retry, rollups, search, templates, watermark
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-table_name = os.environ['TABLE_NAME']
-table = dynamodb.Table(table_name)
+# DynamoDB is reached through the low-level client, created on first use
+TABLE_NAME = os.environ['TABLE_NAME']
+
+# Views table holding the write watermark read_recent validates caches with (optional)
+VIEWS_TABLE_NAME = os.environ.get('VIEWS_TABLE_NAME')
+
+# Watermark horizon this container last published
+watermark_horizon = 0.0
 
 # Valid severity levels
-VALID_SEVERITIES = {'info', 'warning', 'error'}
+VALID_SEVERITIES = frozenset({'info', 'warning', 'error'})
+SEVERITY_ERROR = f'Invalid severity. Must be one of: {", ".join(VALID_SEVERITIES)}'
 
 # Maximum message length (10KB)
 MAX_MESSAGE_LENGTH = 10240
+MESSAGE_LENGTH_ERROR = f'Message exceeds maximum length of {MAX_MESSAGE_LENGTH} characters'
+
+# Characters rejected in messages (markup, braces, backslashes, null bytes)
+INVALID_MESSAGE_CHARACTERS = re.compile(r'[<>{}\\\x00]')
+
+# Number of write shards per time bucket (spreads hot partitions)
+SHARD_COUNT = max(1, int(os.environ.get('SHARD_COUNT', '1')))
+
+# Batch ingest limits
+MAX_BATCH_SIZE = 500
+BATCH_WRITE_CHUNK_SIZE = 25  # DynamoDB BatchWriteItem hard limit
+BATCH_WRITE_WORKERS = 8
+
+# Paces writes across invocations of this container once DynamoDB throttles
+write_pacer = retry.TokenBucket()
+
+# Time kept back from the Lambda timeout to build the response
+RESPONSE_MARGIN_SECONDS = 1.0
+
+# Keep per-minute/hour/day entry counts in the views table for the stats function
+# (up to three extra UpdateItems per invocation, so off unless enabled)
+ROLLUPS_ENABLED = os.environ.get('ROLLUPS_ENABLED', 'false').lower() == 'true'
+
+# Store repetitive messages as a mined template id plus parameters (needs the views table)
+TEMPLATE_MINING = os.environ.get('TEMPLATE_MINING', 'false').lower() == 'true'
+template_miner = templates.Miner()
+template_store = templates.TemplateStore()
+
+# Token inverted index for the search function: one posting per distinct
+# message token is written here after an entry is stored (optional)
+SEARCH_TABLE_NAME = os.environ.get('SEARCH_TABLE_NAME') or None
+index_pacer = retry.TokenBucket()
+
+# Ids this container indexed recently; collapsed repeats share an id and
+# would otherwise rewrite identical postings
+INDEXED_CACHE_SIZE = 4096
+indexed_ids: 'OrderedDict[str, None]' = OrderedDict()
+
+# Write-behind mode: enqueue validated entries here and return 202 (optional);
+# the consumer function (consumer.py) writes them to DynamoDB
+WRITE_QUEUE_URL = os.environ.get('WRITE_QUEUE_URL') or None
+
+# Collapse repeats of the same severity and message within this many seconds
+# into one entry with a count and last_seen (0 stores every entry)
+DEDUP_WINDOW_SECONDS = max(0, int(os.environ.get('DEDUP_WINDOW_SECONDS', '0')))
+DEDUP_NAMESPACE = uuid.UUID('5f0c1a8e-3b7d-4d8e-9a61-2c4e7b9d0f13')
+
+# SQS limits: 10 messages and 256 KB per SendMessageBatch request
+QUEUE_SEND_BATCH_SIZE = 10
+QUEUE_REQUEST_MAX_BYTES = 256 * 1024
+# One message holds at most one BatchWriteItem chunk, kept under the size limit
+QUEUE_MESSAGE_MAX_BYTES = QUEUE_REQUEST_MAX_BYTES // 2
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler for ingesting log entries.
     
-    Expected input format:
+    Expected input format (single entry):
     {
         "severity": "info|warning|error",
         "message": "Log message text"
     }
     
+    Batches of up to MAX_BATCH_SIZE entries are accepted as a JSON array,
+    as {"entries": [...]}, or as an NDJSON body (one entry per line).
+    
     Returns:
     {
-        "statusCode": 200|400|500,
+        "statusCode": 200|202|207|400|429|500,
         "body": JSON string with result or error
     }
+    
+    With WRITE_QUEUE_URL set, valid entries are enqueued instead of
+    written and the response is 202; consumer.py stores them.
+    
+    With DEDUP_WINDOW_SECONDS set, repeats of the same severity and
+    message within a window increment one entry's count instead of
+    adding rows.
+    
+    With SEARCH_TABLE_NAME set, stored entries are also added to the
+    token index the search function reads.
+    
+    Throttled writes are retried with jittered exponential backoff within
+    a per-invocation budget. Stage timings, consumed capacity, retry counts
+    and sleep time are logged as one EMF line per invocation.
     """
+    metrics.start('ingest')
+    if context is not None:
+        metrics.set_property('request_id', getattr(context, 'aws_request_id', None))
+    budget = retry.RetryBudget(deadline=retry_deadline(context))
     try:
         # Parse request body
-        if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
-        else:
-            body = event.get('body', event)
+        size = body_bytes(event)
+        if size is not None:
+            metrics.count('request_bytes', size, 'Bytes')
+        with metrics.stage('parse'):
+            body = parse_body(event)
+        
+        if isinstance(body, dict) and isinstance(body.get('entries'), list):
+            body = body['entries']
         
-        # Validate required fields
-        if 'severity' not in body:
-            return create_response(400, {'error': 'Missing required field: severity'})
+        if isinstance(body, list):
+            return ingest_batch(body, budget)
         
-        if 'message' not in body:
-            return create_response(400, {'error': 'Missing required field: message'})
+        # Validate entry
+        with metrics.stage('validate'):
+            error = validate_entry(body)
+        if error:
+            return create_response(400, {'error': error})
         
         severity = body['severity'].lower()
         message = body['message']
         
-        # Validate severity
-        if severity not in VALID_SEVERITIES:
+        if WRITE_QUEUE_URL:
+            log_entry = build_log_entry(severity, message)
+            with metrics.stage('enqueue'):
+                failed_ids = enqueue([log_entry], budget)
+            if failed_ids:
+                return create_response(500, {'error': 'Failed to queue log entry, please retry'})
+            metrics.count('items')
             return create_response(
-                400,
-                {'error': f'Invalid severity. Must be one of: {", ".join(VALID_SEVERITIES)}'}
-            )
-        
-        # Validate message length
-        if len(message) > MAX_MESSAGE_LENGTH:
-            return create_response(
-                400, 
-                {'error': f'Message exceeds maximum length of {MAX_MESSAGE_LENGTH} characters'}
-            )
-        
-        # Enhanced input validation - prevent injection attacks
-        if not validate_message(message):
-            return create_response(
-                400,
-                {'error': 'Message contains invalid or potentially harmful characters'}
+                202,
+                {
+                    'message': 'Log entry accepted',
+                    'log_entry': public_entry(log_entry)
+                }
             )
         
         # Generate log entry
-        log_id = str(uuid.uuid4())
-        timestamp = datetime.now(timezone.utc).isoformat()
-        
-        log_entry = {
-            'id': log_id,
-            'datetime': timestamp,
-            'severity': severity,
-            'message': message
-        }
+        advance_watermark()
+        log_entry = build_log_entry(severity, message)
+        apply_templates([log_entry])
         
         # Store in DynamoDB with retry logic
-        try:
-            table.put_item(Item=log_entry)
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ProvisionedThroughputExceededException':
-                # Implement exponential backoff for throughput errors
-                import time
-                time.sleep(0.1)
-                table.put_item(Item=log_entry)
+        with metrics.stage('dynamodb'):
+            if DEDUP_WINDOW_SECONDS:
+                response = update_collapsed(log_entry, 1, log_entry['last_seen'], budget)
+                log_entry['count'] = int(response['Attributes']['count']['N'])
             else:
-                raise
+                response = retry.call(
+                    clients.dynamodb(write=True).put_item, budget, write_pacer,
+                    TableName=TABLE_NAME, Item=codec.encode(log_entry),
+                    ReturnConsumedCapacity='TOTAL'
+                )
+        metrics.record_capacity(response, 'consumed_wcu')
+        metrics.count('items')
+        record_rollups([log_entry])
+        index_entries([log_entry], budget)
         
         # Return success response
         return create_response(
             200,
             {
                 'message': 'Log entry created successfully',
-                'log_entry': log_entry
+                'log_entry': public_entry(log_entry)
             }
         )
         
@@ -111,8 +192,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
         
-        # Handle specific DynamoDB errors
-        if error_code == 'ProvisionedThroughputExceededException':
+        # Handle specific DynamoDB (and SQS) errors
+        if retry.is_throttle(e):
             print(f"Throughput exceeded: {error_message}")
             return create_response(429, {'error': 'Rate limit exceeded, please retry'})
         elif error_code == 'ResourceNotFoundException':
@@ -125,6 +206,621 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return create_response(500, {'error': 'Internal server error'})
+    
+    finally:
+        stats = budget.stats()
+        metrics.count('retries', stats.pop('retries'))
+        metrics.count('throttles', stats.pop('throttles'))
+        metrics.count('retry_sleep_ms', stats.pop('retry_sleep_ms'), 'Milliseconds')
+        for name, value in stats.items():
+            metrics.set_property(name, value)
+        metrics.emit()
+
+
+def retry_deadline(context: Any) -> Optional[float]:
+    """Return the monotonic time after which no retry may start."""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return time.monotonic() + context.get_remaining_time_in_millis() / 1000 - RESPONSE_MARGIN_SECONDS
+
+
+def parse_body(event: Dict[str, Any]) -> Any:
+    """
+    Extract the request payload from a Function URL event.
+    
+    Accepts a JSON document or an NDJSON body (one JSON entry per line).
+    NDJSON is detected from the Content-Type header, or as a fallback when
+    the body is not a single JSON document but has several lines.
+    
+    Raises:
+        json.JSONDecodeError: If the body is neither JSON nor NDJSON
+    """
+    raw = event.get('body')
+    if not isinstance(raw, str):
+        return event.get('body', event)
+    
+    if event.get('isBase64Encoded'):
+        raw = base64.b64decode(raw).decode('utf-8')
+    
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if 'ndjson' in headers.get('content-type', ''):
+        return parse_ndjson(raw)
+    
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        if '\n' not in raw.strip():
+            raise
+        return parse_ndjson(raw)
+
+
+def body_bytes(event: Dict[str, Any]) -> Optional[int]:
+    """Size in bytes of the raw request body, or None when it is not a string (already parsed)."""
+    raw = event.get('body')
+    if not isinstance(raw, str):
+        return None
+    if event.get('isBase64Encoded'):
+        return len(raw) * 3 // 4 - raw[-2:].count('=')
+    return len(raw) if raw.isascii() else len(raw.encode('utf-8'))
+
+
+def parse_ndjson(raw: str) -> List[Any]:
+    """Parse newline-delimited JSON, skipping blank lines."""
+    return [json.loads(line) for line in raw.splitlines() if line.strip()]
+
+
+def validate_entry(entry: Any) -> Optional[str]:
+    """
+    Validate a single log entry.
+    
+    Args:
+        entry: Parsed entry with severity and message fields
+        
+    Returns:
+        An error message if the entry is invalid, None otherwise
+    """
+    if not isinstance(entry, dict):
+        return 'Log entry must be a JSON object'
+    
+    # Validate required fields
+    if 'severity' not in entry:
+        return 'Missing required field: severity'
+    
+    if 'message' not in entry:
+        return 'Missing required field: message'
+    
+    severity = entry['severity']
+    message = entry['message']
+    
+    if not isinstance(severity, str) or not isinstance(message, str):
+        return 'Fields severity and message must be strings'
+    
+    # Validate severity
+    if severity.lower() not in VALID_SEVERITIES:
+        return SEVERITY_ERROR
+    
+    # Validate message length
+    if len(message) > MAX_MESSAGE_LENGTH:
+        return MESSAGE_LENGTH_ERROR
+    
+    # Enhanced input validation - prevent injection attacks
+    if not validate_message(message):
+        return 'Message contains invalid or potentially harmful characters'
+    
+    return None
+
+
+def advance_watermark() -> None:
+    """
+    Publish a write watermark ahead of the entries about to be written.
+    
+    Skipped while this container's last published horizon still covers
+    the next half horizon. Failures are logged and never fail the ingest.
+    """
+    global watermark_horizon
+    
+    now = time.time()
+    if VIEWS_TABLE_NAME is None or now + watermark.HORIZON_SECONDS / 2 < watermark_horizon:
+        return
+    
+    try:
+        with metrics.stage('watermark'):
+            watermark_horizon = watermark.advance(clients.dynamodb(write=True), VIEWS_TABLE_NAME, now)
+    except ClientError as e:
+        print(f"Watermark update failed: {e.response['Error']['Code']}")
+
+
+def build_log_entry(severity: str, message: str) -> Dict[str, Any]:
+    """
+    Create a new log entry with a generated id and UTC timestamp.
+    
+    The entry carries the partition keys of both the time and the severity
+    index, so one write maintains both.
+    
+    In dedup mode the id is derived from the severity, the message and the
+    start of the current window, and the datetime is the window start, so
+    every repeat in the window (in any container) maps to the same item.
+    The time of this occurrence is kept as last_seen.
+    """
+    now = datetime.now(timezone.utc)
+    if DEDUP_WINDOW_SECONDS:
+        window = int(now.timestamp()) // DEDUP_WINDOW_SECONDS * DEDUP_WINDOW_SECONDS
+        entry_id = uuid.uuid5(DEDUP_NAMESPACE, f'{severity}\x00{message}\x00{window}')
+        timestamp = datetime.fromtimestamp(window, timezone.utc)
+        partition = keys.shard_key(keys.bucket_for(timestamp), entry_id.int % SHARD_COUNT)
+        return {
+            'id': str(entry_id),
+            'datetime': timestamp.isoformat(),
+            keys.BUCKET_ATTRIBUTE: partition,
+            keys.SEVERITY_BUCKET_ATTRIBUTE: keys.severity_key(severity, partition),
+            'severity': severity,
+            'message': message,
+            'last_seen': now.isoformat()
+        }
+    
+    partition = keys.shard_key(keys.bucket_for(now), random.randrange(SHARD_COUNT))
+    return {
+        'id': str(uuid.uuid4()),
+        'datetime': now.isoformat(),
+        keys.BUCKET_ATTRIBUTE: partition,
+        keys.SEVERITY_BUCKET_ATTRIBUTE: keys.severity_key(severity, partition),
+        'severity': severity,
+        'message': message
+    }
+
+
+def apply_templates(log_entries: List[Dict[str, Any]]) -> None:
+    """
+    Attach mined message templates to entries about to be written.
+    
+    A template is persisted to the views table before the first entry
+    using it is written, so readers can always render it. Entries whose
+    template could not be persisted keep their plain message.
+    """
+    if not TEMPLATE_MINING or VIEWS_TABLE_NAME is None:
+        return
+    
+    templated = 0
+    with metrics.stage('template'):
+        for log_entry in log_entries:
+            mined = template_miner.match(log_entry['message'])
+            if mined is None:
+                continue
+            template_id, template, params = mined
+            if not template_store.persist(clients.dynamodb(write=True), VIEWS_TABLE_NAME, template_id, template):
+                continue
+            log_entry['template_id'] = template_id
+            log_entry['params'] = params
+            templated += 1
+    metrics.count('templated', templated)
+
+
+def record_rollups(log_entries: List[Dict[str, Any]]) -> None:
+    """
+    Add stored entries to the per-minute, hour and day severity counts.
+    
+    One UpdateItem per rollup period, run in parallel; an invocation
+    usually touches three. Failures are logged and never fail the ingest.
+    """
+    if not ROLLUPS_ENABLED or VIEWS_TABLE_NAME is None or not log_entries:
+        return
+    
+    shard = random.randrange(SHARD_COUNT)
+    
+    def add(rollup):
+        (resolution, period), severities = rollup
+        try:
+            response = rollups.add(clients.dynamodb(write=True), VIEWS_TABLE_NAME, resolution, period, severities, shard)
+            metrics.record_capacity(response, 'consumed_wcu')
+        except ClientError as e:
+            print(f"Rollup update failed: {e.response['Error']['Code']}")
+    
+    with metrics.stage('rollups'):
+        with ThreadPoolExecutor(max_workers=BATCH_WRITE_WORKERS) as executor:
+            list(executor.map(add, rollups.tally(log_entries).items()))
+
+
+def public_entry(log_entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the client-facing fields of a stored log entry."""
+    return {field: log_entry[field] for field in keys.PUBLIC_FIELDS + keys.COLLAPSED_FIELDS
+            if field in log_entry}
+
+
+def ingest_batch(entries: List[Any], budget: retry.RetryBudget) -> Dict[str, Any]:
+    """
+    Validate and store a batch of log entries.
+    
+    Every entry is validated up front. Valid entries are written with
+    BatchWriteItem in chunks of 25, with the chunks written in parallel.
+    Invalid entries are reported but do not block the rest of the batch.
+    
+    Returns:
+        200 if every entry was stored, 207 if some failed, 400 if the
+        batch is empty, too large, or contains no valid entries. The body
+        has one result per entry, in request order.
+    """
+    if not entries:
+        return create_response(400, {'error': 'Batch must contain at least one entry'})
+    
+    if len(entries) > MAX_BATCH_SIZE:
+        return create_response(
+            400,
+            {'error': f'Batch exceeds maximum size of {MAX_BATCH_SIZE} entries'}
+        )
+    
+    results: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    
+    if not WRITE_QUEUE_URL:
+        advance_watermark()
+    
+    with metrics.stage('validate'):
+        for index, entry in enumerate(entries):
+            error = validate_entry(entry)
+            if error:
+                results.append({'index': index, 'status': 'rejected', 'error': error})
+                continue
+            
+            log_entry = build_log_entry(entry['severity'].lower(), entry['message'])
+            results.append({'index': index, 'status': 'created', 'id': log_entry['id'],
+                            'datetime': log_entry['datetime']})
+            pending.append(log_entry)
+    
+    if not pending:
+        return create_response(400, {'error': 'No valid entries in batch', 'results': results})
+    
+    if WRITE_QUEUE_URL:
+        return enqueue_batch(entries, results, pending, budget)
+    
+    apply_templates(pending)
+    
+    with metrics.stage('dynamodb'):
+        failed_ids = write_entries(pending, budget)
+    stored = [log_entry for log_entry in pending if log_entry['id'] not in failed_ids]
+    metrics.count('items', len(stored))
+    record_rollups(stored)
+    index_entries(stored, budget)
+    
+    for result in results:
+        if result.get('id') in failed_ids:
+            result['status'] = 'failed'
+            result['error'] = 'Failed to store log entry, please retry'
+    
+    created = sum(1 for result in results if result['status'] == 'created')
+    status_code = 200 if created == len(entries) else 207
+    
+    return create_response(
+        status_code,
+        {
+            'message': f'{created} of {len(entries)} log entries created',
+            'created': created,
+            'failed': len(entries) - created,
+            'results': results
+        }
+    )
+
+
+def enqueue_batch(entries: List[Any], results: List[Dict[str, Any]],
+                  pending: List[Dict[str, Any]], budget: retry.RetryBudget) -> Dict[str, Any]:
+    """
+    Enqueue the valid entries of a batch for the consumer to write.
+    
+    Returns:
+        202 if every entry was accepted, 207 if some were rejected or
+        could not be queued. Results carry status "accepted" in place of
+        "created".
+    """
+    with metrics.stage('enqueue'):
+        failed_ids = enqueue(pending, budget)
+    metrics.count('items', len(pending) - len(failed_ids))
+    
+    for result in results:
+        if 'id' not in result:
+            continue
+        if result['id'] in failed_ids:
+            result['status'] = 'failed'
+            result['error'] = 'Failed to queue log entry, please retry'
+        else:
+            result['status'] = 'accepted'
+    
+    accepted = sum(1 for result in results if result['status'] == 'accepted')
+    status_code = 202 if accepted == len(entries) else 207
+    
+    return create_response(
+        status_code,
+        {
+            'message': f'{accepted} of {len(entries)} log entries accepted',
+            'accepted': accepted,
+            'failed': len(entries) - accepted,
+            'results': results
+        }
+    )
+
+
+def queue_messages(log_entries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group log entries into queue messages.
+    
+    A message holds at most one BatchWriteItem chunk (25 entries) and
+    stays under QUEUE_MESSAGE_MAX_BYTES, so the consumer can write every
+    message with a single request and fail it on its own.
+    """
+    messages: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    size = 0
+    for log_entry in log_entries:
+        entry_size = len(json.dumps(log_entry)) + 2
+        if current and (len(current) == BATCH_WRITE_CHUNK_SIZE or size + entry_size > QUEUE_MESSAGE_MAX_BYTES):
+            messages.append(current)
+            current, size = [], 0
+        current.append(log_entry)
+        size += entry_size
+    if current:
+        messages.append(current)
+    return messages
+
+
+def enqueue(log_entries: List[Dict[str, Any]], budget: retry.RetryBudget) -> set:
+    """
+    Send log entries to the write queue with SendMessageBatch.
+    
+    Each message body is {"entries": [...]} with the entries as built by
+    build_log_entry (ids and timestamps are assigned here, not by the
+    consumer). Messages that SQS reports as failed are resent within the
+    retry budget.
+    
+    Returns:
+        The ids of entries that could not be queued
+    """
+    client = clients.client('sqs', write=True)
+    messages = queue_messages(log_entries)
+    failed_ids = set()
+    
+    requests: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    size = 0
+    for number, message in enumerate(messages):
+        body = json.dumps({'entries': message})
+        if current and (len(current) == QUEUE_SEND_BATCH_SIZE or size + len(body) > QUEUE_REQUEST_MAX_BYTES):
+            requests.append(current)
+            current, size = [], 0
+        current.append({'Id': str(number), 'MessageBody': body})
+        size += len(body)
+    if current:
+        requests.append(current)
+    
+    for request in requests:
+        attempt = 0
+        while True:
+            try:
+                response = client.send_message_batch(QueueUrl=WRITE_QUEUE_URL, Entries=request)
+            except ClientError as e:
+                if not retry.is_retryable(e):
+                    raise
+                response = {'Failed': [{'Id': message['Id'], 'SenderFault': False} for message in request]}
+            metrics.count('queue_messages', len(response.get('Successful', [])))
+            
+            failed = {failure['Id'] for failure in response.get('Failed', [])
+                      if not failure.get('SenderFault')}
+            rejected = {failure['Id'] for failure in response.get('Failed', [])
+                        if failure.get('SenderFault')}
+            for number in rejected:
+                print(f"SendMessageBatch rejected message {number}")
+                failed_ids.update(entry['id'] for entry in messages[int(number)])
+            
+            request = [message for message in request if message['Id'] in failed]
+            if not request or not budget.backoff(attempt):
+                break
+            attempt += 1
+        
+        for message in request:
+            failed_ids.update(entry['id'] for entry in messages[int(message['Id'])])
+    
+    return failed_ids
+
+
+def write_entries(log_entries: List[Dict[str, Any]], budget: retry.RetryBudget) -> set:
+    """
+    Store log entries, collapsing repeats in dedup mode.
+    
+    Returns:
+        The ids of entries that could not be written
+    """
+    if DEDUP_WINDOW_SECONDS:
+        return write_collapsed(log_entries, budget)
+    return write_batch(log_entries, budget)
+
+
+def write_collapsed(log_entries: List[Dict[str, Any]], budget: retry.RetryBudget) -> set:
+    """
+    Count dedup-mode entries into their collapsed items.
+    
+    Repeats within the batch are summed first, so a storm of identical
+    entries costs one UpdateItem per distinct message and window. Updates
+    run in parallel and draw on the same retry budget.
+    
+    Returns:
+        The ids of entries that could not be written
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for log_entry in log_entries:
+        groups.setdefault(log_entry['id'], []).append(log_entry)
+    metrics.count('collapsed', len(log_entries) - len(groups))
+    
+    def update(group: List[Dict[str, Any]]) -> Optional[str]:
+        try:
+            update_collapsed(group[0], len(group), max(entry['last_seen'] for entry in group), budget)
+        except ClientError as e:
+            print(f"UpdateItem error: {e.response['Error']['Code']}")
+            return group[0]['id']
+        return None
+    
+    with ThreadPoolExecutor(max_workers=min(BATCH_WRITE_WORKERS, len(groups))) as executor:
+        return {entry_id for entry_id in executor.map(update, groups.values()) if entry_id}
+
+
+def update_collapsed(log_entry: Dict[str, Any], occurrences: int, last_seen: str,
+                     budget: retry.RetryBudget) -> Dict[str, Any]:
+    """
+    Add occurrences to a collapsed entry with one atomic UpdateItem.
+    
+    The first update of a window creates the item; later ones only add to
+    its count and set last_seen (concurrent updates may leave it a few
+    milliseconds behind the latest occurrence).
+    
+    Returns:
+        The UpdateItem response, with the new count in Attributes
+    
+    Raises:
+        ClientError: Once the write is not retryable or the budget is spent
+    """
+    item = codec.encode(log_entry)
+    key = {'id': item.pop('id'), 'datetime': item.pop('datetime')}
+    assignments = [f'#a{i} = if_not_exists(#a{i}, :a{i})' for i in range(len(item))]
+    names = {f'#a{i}': name for i, name in enumerate(item)}
+    values = {f':a{i}': value for i, value in enumerate(item.values())}
+    
+    return retry.call(
+        clients.dynamodb(write=True).update_item, budget, write_pacer,
+        TableName=TABLE_NAME,
+        Key=key,
+        UpdateExpression=f"SET {', '.join(assignments)}, #last_seen = :last_seen ADD #count :occurrences",
+        ExpressionAttributeNames={**names, '#count': 'count', '#last_seen': 'last_seen'},
+        ExpressionAttributeValues={**values, ':occurrences': {'N': str(occurrences)},
+                                   ':last_seen': {'S': last_seen}},
+        ReturnValues='UPDATED_NEW',
+        ReturnConsumedCapacity='TOTAL'
+    )
+
+
+def write_batch(log_entries: List[Dict[str, Any]], budget: retry.RetryBudget) -> set:
+    """
+    Write log entries with BatchWriteItem, running chunks in parallel.
+    
+    All chunks draw on the same retry budget.
+    
+    Returns:
+        The ids of entries that could not be written
+    """
+    chunks = [
+        log_entries[i:i + BATCH_WRITE_CHUNK_SIZE]
+        for i in range(0, len(log_entries), BATCH_WRITE_CHUNK_SIZE)
+    ]
+    
+    if len(chunks) == 1:
+        return write_chunk(chunks[0], budget)
+    
+    failed_ids = set()
+    with ThreadPoolExecutor(max_workers=min(BATCH_WRITE_WORKERS, len(chunks))) as executor:
+        for chunk_failed in executor.map(lambda chunk: write_chunk(chunk, budget), chunks):
+            failed_ids |= chunk_failed
+    return failed_ids
+
+
+def write_chunk(chunk: List[Dict[str, Any]], budget: retry.RetryBudget) -> set:
+    """
+    Write up to 25 entries in one BatchWriteItem call.
+    
+    Returns:
+        The ids of entries still unwritten after all retries
+    """
+    items = [codec.encode(log_entry) for log_entry in chunk]
+    return {item['id']['S'] for item in batch_write(TABLE_NAME, items, write_pacer, budget)}
+
+
+def batch_write(table_name: str, items: List[Dict[str, Any]], pacer: retry.TokenBucket,
+                budget: retry.RetryBudget) -> List[Dict[str, Any]]:
+    """
+    Put up to 25 typed items into one table with BatchWriteItem.
+    
+    UnprocessedItems are a throttle signal: they slow the table's write
+    pacer and are retried with jittered exponential backoff. Throttling of
+    the whole request is treated the same way. Retries stop when the
+    invocation's retry budget is spent.
+    
+    Returns:
+        The items still unwritten after all retries
+    """
+    client = clients.dynamodb(write=True)
+    request_items = {table_name: [{'PutRequest': {'Item': item}} for item in items]}
+    attempt = 0
+    
+    while True:
+        budget.record_pacing(pacer.acquire(len(request_items[table_name])))
+        try:
+            response = client.batch_write_item(
+                RequestItems=request_items,
+                ReturnConsumedCapacity='TOTAL'
+            )
+            budget.record(response)
+            metrics.record_capacity(response, 'consumed_wcu')
+            unprocessed = response.get('UnprocessedItems') or {}
+            if not unprocessed.get(table_name):
+                pacer.on_success()
+                return []
+            request_items = unprocessed
+            throttled = True
+        except ClientError as e:
+            if not retry.is_retryable(e):
+                print(f"BatchWriteItem error: {e.response['Error']['Code']}")
+                break
+            budget.record(e.response)
+            throttled = retry.is_throttle(e)
+        
+        if throttled:
+            budget.record_throttle()
+            pacer.on_throttle()
+        if not budget.backoff(attempt):
+            break
+        attempt += 1
+    
+    return [request['PutRequest']['Item'] for request in request_items.get(table_name, [])]
+
+
+def index_entries(log_entries: List[Dict[str, Any]], budget: retry.RetryBudget) -> None:
+    """
+    Add stored entries to the token index (log_common.search).
+    
+    Every entry costs one posting write per distinct token, written with
+    BatchWriteItem in chunks of 25 run in parallel, after the entries
+    themselves. Entries this container indexed recently are skipped.
+    Postings that cannot be written are counted as the unindexed metric
+    and never fail the ingest; those entries are missing from search
+    results but still served by read_recent.
+    """
+    if SEARCH_TABLE_NAME is None or not log_entries:
+        return
+    
+    postings = []
+    for log_entry in log_entries:
+        if log_entry['id'] in indexed_ids:
+            indexed_ids.move_to_end(log_entry['id'])
+            continue
+        indexed_ids[log_entry['id']] = None
+        if len(indexed_ids) > INDEXED_CACHE_SIZE:
+            indexed_ids.popitem(last=False)
+        postings.extend(search.postings(log_entry))
+    if not postings:
+        return
+    
+    chunks = [
+        postings[i:i + BATCH_WRITE_CHUNK_SIZE]
+        for i in range(0, len(postings), BATCH_WRITE_CHUNK_SIZE)
+    ]
+    
+    def write(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return batch_write(SEARCH_TABLE_NAME, chunk, index_pacer, budget)
+    
+    with metrics.stage('search_index'):
+        with ThreadPoolExecutor(max_workers=min(BATCH_WRITE_WORKERS, len(chunks))) as executor:
+            unwritten = [item for chunk_unwritten in executor.map(write, chunks) for item in chunk_unwritten]
+    
+    for item in unwritten:
+        indexed_ids.pop(search.parse_sort_key(item['sk']['S'])[1], None)
+    metrics.count('postings', len(postings) - len(unwritten))
+    if unwritten:
+        print(f"Failed to index {len(unwritten)} postings")
+        metrics.count('unindexed', len(unwritten))
 
 
 def validate_message(message: str) -> bool:
@@ -137,20 +833,17 @@ def validate_message(message: str) -> bool:
     Returns:
         True if message is valid, False otherwise
     """
-    # Check for potentially harmful characters
+    # Check for potentially harmful characters and null bytes
     # Allow alphanumeric, spaces, and common punctuation
-    if re.search(r'[<>{}\\]', message):
-        return False
-    
-    # Check for null bytes
-    if '\x00' in message:
-        return False
-    
-    return True
+    return INVALID_MESSAGE_CHARACTERS.search(message) is None
 
 
 def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """Create a standardized API response."""
+    with metrics.stage('serialize'):
+        encoded = json.dumps(body)
+    metrics.count('response_bytes', len(encoded), 'Bytes')
+    metrics.set_property('status_code', status_code)
     return {
         'statusCode': status_code,
         'headers': {
@@ -159,5 +852,5 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Headers': 'Content-Type,Authorization',
             'Access-Control-Allow-Methods': 'POST,OPTIONS'
         },
-        'body': json.dumps(body)
+        'body': encoded
     }
@@ -0,0 +1,153 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+from moto import mock_dynamodb2, mock_sqs
+import boto3
+import sys
+
+# Ensure index.py, consumer.py and the shared layer can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'common', 'python')))
+import consumer
+import index
+from log_common import codec, retry
+
+os.environ['TABLE_NAME'] = 'test-log-entries'
+
+
+class TestWriteBehind(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_dynamodb = mock_dynamodb2()
+        cls.mock_dynamodb.start()
+        cls.mock_sqs = mock_sqs()
+        cls.mock_sqs.start()
+
+        cls.client = boto3.client('dynamodb', region_name='us-east-1')
+        cls.client.create_table(
+            TableName=os.environ['TABLE_NAME'],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        cls.sqs = boto3.client('sqs', region_name='us-east-1')
+        cls.queue_url = cls.sqs.create_queue(QueueName='test-log-writes')['QueueUrl']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_sqs.stop()
+        cls.mock_dynamodb.stop()
+
+    def setUp(self):
+        for patcher in (patch('index.WRITE_QUEUE_URL', self.queue_url),
+                        patch('index.write_pacer', retry.TokenBucket())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sqs.purge_queue(QueueUrl=self.queue_url)
+
+    def receive_event(self):
+        """Drain the queue into an SQS event, as the event source mapping delivers it."""
+        records = []
+        while True:
+            messages = self.sqs.receive_message(QueueUrl=self.queue_url,
+                                                MaxNumberOfMessages=10).get('Messages', [])
+            if not messages:
+                return {'Records': records}
+            records.extend({'messageId': message['MessageId'], 'body': message['Body']}
+                           for message in messages)
+
+    def stored(self, entry_id):
+        return self.client.get_item(TableName=os.environ['TABLE_NAME'],
+                                    Key={'id': {'S': entry_id}}).get('Item')
+
+    def test_single_entry_accepted_and_written_by_consumer(self):
+        """Test that ingest returns 202 without writing, and the consumer stores the entry."""
+        response = index.lambda_handler(
+            {'body': json.dumps({'severity': 'warning', 'message': 'Disk 91% full'})}, None)
+
+        self.assertEqual(response['statusCode'], 202)
+        log_entry = json.loads(response['body'])['log_entry']
+        self.assertIsNone(self.stored(log_entry['id']))
+
+        result = consumer.lambda_handler(self.receive_event(), None)
+
+        self.assertEqual(result, {'batchItemFailures': []})
+        self.assertEqual(codec.decode(self.stored(log_entry['id'])), log_entry)
+
+    def test_batch_enqueued_in_chunks_of_25(self):
+        """Test that a batch is split into messages the consumer writes in full."""
+        entries = [{'severity': 'info', 'message': f'Queued message {i}'} for i in range(60)]
+        entries.append({'severity': 'verbose', 'message': 'Rejected'})
+
+        response = index.lambda_handler({'body': json.dumps(entries)}, None)
+
+        self.assertEqual(response['statusCode'], 207)
+        body = json.loads(response['body'])
+        self.assertEqual(body['accepted'], 60)
+        self.assertEqual(body['results'][-1]['status'], 'rejected')
+        event = self.receive_event()
+        self.assertEqual([len(json.loads(record['body'])['entries']) for record in event['Records']],
+                         [25, 25, 10])
+
+        consumer.lambda_handler(event, None)
+
+        for result in body['results'][:-1]:
+            self.assertEqual(result['status'], 'accepted')
+            self.assertIsNotNone(self.stored(result['id']))
+
+    def test_unwritten_entries_reported_as_batch_item_failures(self):
+        """Test that only messages holding an unwritten entry are reported back to SQS."""
+        for i in range(3):
+            index.lambda_handler({'body': json.dumps({'severity': 'info', 'message': f'Entry {i}'})}, None)
+        event = self.receive_event()
+        unwritten = json.loads(event['Records'][1]['body'])['entries'][0]['id']
+
+        with patch('index.write_entries', return_value={unwritten}):
+            result = consumer.lambda_handler(event, None)
+
+        self.assertEqual(result, {'batchItemFailures': [{'itemIdentifier': event['Records'][1]['messageId']}]})
+
+    def test_malformed_message_reported(self):
+        """Test that an unreadable message fails on its own without blocking the batch."""
+        index.lambda_handler({'body': json.dumps({'severity': 'info', 'message': 'Valid'})}, None)
+        event = self.receive_event()
+        event['Records'].append({'messageId': 'malformed', 'body': 'not json'})
+
+        with patch('builtins.print'):
+            result = consumer.lambda_handler(event, None)
+
+        self.assertEqual(result, {'batchItemFailures': [{'itemIdentifier': 'malformed'}]})
+        entry_id = json.loads(event['Records'][0]['body'])['entries'][0]['id']
+        self.assertIsNotNone(self.stored(entry_id))
+
+    def test_message_with_invalid_entries_reported(self):
+        """Test that valid JSON whose entries are not objects with an id fails only that message."""
+        index.lambda_handler({'body': json.dumps({'severity': 'info', 'message': 'Valid'})}, None)
+        event = self.receive_event()
+        bodies = {'not-a-list': {'entries': 'abc'}, 'not-objects': {'entries': [1, 2]},
+                  'missing-id': {'entries': [{'severity': 'info', 'message': 'No id'}]}}
+        event['Records'].extend({'messageId': message_id, 'body': json.dumps(body)}
+                                for message_id, body in bodies.items())
+
+        with patch('builtins.print'):
+            result = consumer.lambda_handler(event, None)
+
+        self.assertEqual(result, {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in bodies]})
+        entry_id = json.loads(event['Records'][0]['body'])['entries'][0]['id']
+        self.assertIsNotNone(self.stored(entry_id))
+
+    @patch('index.retry.full_jitter', return_value=0)
+    def test_enqueue_failure_fails_entries(self, _):
+        """Test that entries SQS keeps failing are reported, not silently dropped."""
+        failed = {'Successful': [], 'Failed': [{'Id': '0', 'SenderFault': False, 'Code': 'InternalError'}]}
+        with patch.object(index.clients.client('sqs', write=True), 'send_message_batch', return_value=failed):
+            response = index.lambda_handler(
+                {'body': json.dumps({'severity': 'error', 'message': 'Lost?'})}, None)
+
+        self.assertEqual(response['statusCode'], 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,21 @@
+import base64
 import json
 import os
 import unittest
+from collections import OrderedDict
 from unittest.mock import patch
+from botocore.exceptions import ClientError
 from moto import mock_dynamodb2
 import boto3
 import sys
+from datetime import datetime, timedelta, timezone
 
-# Ensure index.py can be imported
+# Ensure index.py and the shared layer can be imported
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'common', 'python')))
+import index
 from index import lambda_handler
+from log_common import codec, keys, retry, rollups, search, templates
 
 # Mock environment variable for table name
 os.environ['TABLE_NAME'] = 'test-log-entries'
@@ -24,7 +31,7 @@ class TestIngestLambda(unittest.TestCase):
 
         # Create the table in mocked DynamoDB
         dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
-        dynamodb.create_table(
+        cls.table = dynamodb.create_table(
             TableName=os.environ['TABLE_NAME'],
             KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
             AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
@@ -36,10 +43,21 @@ class TestIngestLambda(unittest.TestCase):
         # Stop moto mock after all tests
         cls.mock_dynamodb.stop()
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_successful_log_ingest(self, mock_table):
+    def setUp(self):
+        # The write pacer is container-wide; start every test unthrottled
+        pacer = patch('index.write_pacer', retry.TokenBucket())
+        pacer.start()
+        self.addCleanup(pacer.stop)
+
+    def logged_stats(self, mock_print):
+        """Return the retry stats line the handler printed last."""
+        return json.loads(mock_print.call_args_list[-1][0][0])
+
+    @patch('index.clients.dynamodb')
+    def test_successful_log_ingest(self, mock_dynamodb):
         """Test successful log entry creation."""
-        mock_table.put_item.return_value = {}
+        client = mock_dynamodb.return_value
+        client.put_item.return_value = {}
 
         event = {
             'body': json.dumps({
@@ -56,10 +74,13 @@ class TestIngestLambda(unittest.TestCase):
         self.assertIn('log_entry', body)
         self.assertEqual(body['log_entry']['severity'], 'info')
         self.assertEqual(body['log_entry']['message'], 'Test log message')
-        mock_table.put_item.assert_called_once()
+        client.put_item.assert_called_once()
+        stored = client.put_item.call_args[1]['Item']
+        self.assertEqual(client.put_item.call_args[1]['TableName'], os.environ['TABLE_NAME'])
+        self.assertEqual(stored['bucket']['S'], stored['datetime']['S'][:10])
+        self.assertEqual(stored['severity_bucket']['S'], f"info#{stored['bucket']['S']}")
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_missing_severity(self, mock_table):
+    def test_missing_severity(self):
         """Test error when severity is missing."""
         event = {
             'body': json.dumps({'message': 'Test log message'})
@@ -70,8 +91,7 @@ class TestIngestLambda(unittest.TestCase):
         self.assertIn('error', body)
         self.assertIn('severity', body['error'])
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_missing_message(self, mock_table):
+    def test_missing_message(self):
         """Test error when message is missing."""
         event = {'body': json.dumps({'severity': 'info'})}
         response = lambda_handler(event, None)
@@ -80,8 +100,7 @@ class TestIngestLambda(unittest.TestCase):
         self.assertIn('error', body)
         self.assertIn('message', body['error'])
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_invalid_severity(self, mock_table):
+    def test_invalid_severity(self):
         """Test error when severity is invalid."""
         event = {'body': json.dumps({'severity': 'critical', 'message': 'Test log message'})}
         response = lambda_handler(event, None)
@@ -90,8 +109,7 @@ class TestIngestLambda(unittest.TestCase):
         self.assertIn('error', body)
         self.assertIn('Invalid severity', body['error'])
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_message_too_long(self, mock_table):
+    def test_message_too_long(self):
         """Test error when message exceeds maximum length."""
         event = {'body': json.dumps({'severity': 'info', 'message': 'x' * 10241})}
         response = lambda_handler(event, None)
@@ -100,8 +118,7 @@ class TestIngestLambda(unittest.TestCase):
         self.assertIn('error', body)
         self.assertIn('exceeds maximum length', body['error'])
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_invalid_json(self, mock_table):
+    def test_invalid_json(self):
         """Test error when request body is invalid JSON."""
         event = {'body': 'invalid json'}
         response = lambda_handler(event, None)
@@ -110,6 +127,351 @@ class TestIngestLambda(unittest.TestCase):
         self.assertIn('error', body)
         self.assertIn('Invalid JSON', body['error'])
 
+    def test_batch_ingest_array(self):
+        """Test batch ingest of a JSON array across several BatchWriteItem chunks."""
+        entries = [{'severity': 'info', 'message': f'Batch message {i}'} for i in range(60)]
+        event = {'body': json.dumps(entries)}
+
+        response = lambda_handler(event, None)
+
+        self.assertEqual(response['statusCode'], 200)
+        body = json.loads(response['body'])
+        self.assertEqual(body['created'], 60)
+        self.assertEqual(len(body['results']), 60)
+        self.assertEqual([r['index'] for r in body['results']], list(range(60)))
+        stored_ids = {item['id'] for item in self.table.scan()['Items']}
+        self.assertTrue({r['id'] for r in body['results']} <= stored_ids)
+
+    def test_entries_stored_with_storage_codec(self):
+        """Test that entries are written as compact version 2 rows."""
+        entries = [
+            {'severity': 'error', 'message': 'Connection reset by peer ' * 100},
+            {'severity': 'info', 'message': 'Short message'}
+        ]
+        response = lambda_handler({'body': json.dumps(entries)}, None)
+        results = json.loads(response['body'])['results']
+
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        for entry, result in zip(entries, results):
+            item = client.get_item(TableName=os.environ['TABLE_NAME'], Key={'id': {'S': result['id']}})['Item']
+            self.assertEqual(item['v'], {'N': '2'})
+            self.assertNotIn('message', item)
+            self.assertNotIn('severity', item)
+            decoded = codec.decode(item)
+            self.assertEqual(decoded['severity'], entry['severity'])
+            self.assertEqual(decoded['message'], entry['message'])
+        self.assertIn('mz', client.get_item(TableName=os.environ['TABLE_NAME'],
+                                            Key={'id': {'S': results[0]['id']}})['Item'])
+
+    @patch('index.TEMPLATE_MINING', True)
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    def test_repetitive_messages_stored_as_templates(self):
+        """Test that mined templates are persisted once and entries store only parameters."""
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        client.create_table(
+            TableName='test-log-views',
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(client.delete_table, TableName='test-log-views')
+        entries = [{'severity': 'info', 'message': f'Request GET /orders/{i} completed in {i * 7} ms'}
+                   for i in range(20)]
+
+        with patch('index.template_miner', templates.Miner()), \
+                patch('index.template_store', templates.TemplateStore()) as store:
+            response = lambda_handler({'body': json.dumps(entries)}, None)
+
+        results = json.loads(response['body'])['results']
+        stored = [client.get_item(TableName=os.environ['TABLE_NAME'], Key={'id': {'S': r['id']}})['Item']
+                  for r in results]
+        self.assertTrue(all(item['v'] == {'N': '3'} for item in stored[1:]))
+        self.assertTrue(all('m' not in item and 'mz' not in item for item in stored[1:]))
+        self.assertEqual([codec.decode(item, store)['message'] for item in stored],
+                         [entry['message'] for entry in entries])
+
+        persisted = client.scan(TableName='test-log-views')['Items']
+        self.assertEqual({item['pk']['S'] for item in persisted
+                          if item['pk']['S'].startswith(templates.TEMPLATE_KEY_PREFIX)},
+                         {templates.TEMPLATE_KEY_PREFIX + item['t']['S'] for item in stored if 't' in item})
+
+    def test_batch_ingest_ndjson(self):
+        """Test batch ingest of an NDJSON body."""
+        lines = [json.dumps({'severity': 'warning', 'message': f'Line {i}'}) for i in range(3)]
+        event = {
+            'headers': {'Content-Type': 'application/x-ndjson'},
+            'body': '\n'.join(lines) + '\n'
+        }
+
+        response = lambda_handler(event, None)
+
+        self.assertEqual(response['statusCode'], 200)
+        body = json.loads(response['body'])
+        self.assertEqual(body['created'], 3)
+
+    def test_batch_ingest_partial_validation(self):
+        """Test that invalid entries are rejected without blocking valid ones."""
+        entries = [
+            {'severity': 'info', 'message': 'Valid message'},
+            {'severity': 'critical', 'message': 'Bad severity'},
+            {'message': 'No severity'}
+        ]
+        response = lambda_handler({'body': json.dumps({'entries': entries})}, None)
+
+        self.assertEqual(response['statusCode'], 207)
+        body = json.loads(response['body'])
+        self.assertEqual(body['created'], 1)
+        self.assertEqual([r['status'] for r in body['results']], ['created', 'rejected', 'rejected'])
+        self.assertIn('Invalid severity', body['results'][1]['error'])
+
+    def test_batch_too_large(self):
+        """Test error when batch exceeds the maximum size."""
+        entries = [{'severity': 'info', 'message': 'x'}] * 501
+        response = lambda_handler({'body': json.dumps(entries)}, None)
+        self.assertEqual(response['statusCode'], 400)
+        self.assertIn('maximum size', json.loads(response['body'])['error'])
+
+    @patch('builtins.print')
+    @patch('index.time.sleep')
+    @patch('index.clients.dynamodb')
+    def test_batch_retries_unprocessed_items(self, mock_dynamodb, mock_sleep, mock_print):
+        """Test that UnprocessedItems are retried with backoff."""
+        table_name = os.environ['TABLE_NAME']
+        client = mock_dynamodb.return_value
+
+        def first_call_partial(RequestItems, **kwargs):
+            requests_ = RequestItems[table_name]
+            if client.batch_write_item.call_count == 1:
+                return {'UnprocessedItems': {table_name: requests_[1:]}}
+            return {'UnprocessedItems': {}}
+
+        client.batch_write_item.side_effect = first_call_partial
+        entries = [{'severity': 'error', 'message': f'Retry {i}'} for i in range(3)]
+
+        response = lambda_handler({'body': json.dumps(entries)}, None)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(client.batch_write_item.call_count, 2)
+        self.assertEqual(len(client.batch_write_item.call_args[1]['RequestItems'][table_name]), 2)
+        stats = self.logged_stats(mock_print)
+        self.assertEqual(stats['retries'], 1)
+        self.assertEqual(stats['throttles'], 1)
+        self.assertTrue(mock_sleep.called)
+
+    @patch('index.time.sleep')
+    @patch('index.clients.dynamodb')
+    def test_batch_reports_failed_items(self, mock_dynamodb, mock_sleep):
+        """Test that items still throttled after all retries are reported as failed."""
+        mock_dynamodb.return_value.batch_write_item.side_effect = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'slow down'}},
+            'BatchWriteItem'
+        )
+        entries = [{'severity': 'info', 'message': 'Throttled'}] * 2
+
+        response = lambda_handler({'body': json.dumps(entries)}, None)
+
+        self.assertEqual(response['statusCode'], 207)
+        body = json.loads(response['body'])
+        self.assertEqual(body['failed'], 2)
+        self.assertEqual({r['status'] for r in body['results']}, {'failed'})
+
+    @patch('index.SHARD_COUNT', 4)
+    def test_batch_ingest_sharded_buckets(self):
+        """Test that entries are spread over the configured write shards."""
+        entries = [{'severity': 'info', 'message': f'Sharded {i}'} for i in range(100)]
+        response = lambda_handler({'body': json.dumps(entries)}, None)
+        self.assertEqual(response['statusCode'], 200)
+
+        ids = {r['id'] for r in json.loads(response['body'])['results']}
+        buckets = {item['bucket'] for item in self.table.scan()['Items'] if item['id'] in ids}
+        day = next(iter(buckets))[:10]
+        self.assertTrue(buckets <= {day, f'{day}#1', f'{day}#2', f'{day}#3'})
+        self.assertGreater(len(buckets), 1)
+
+    @patch('index.DEDUP_WINDOW_SECONDS', 60)
+    @patch('index.TABLE_NAME', 'test-log-dedup')
+    def test_repeated_messages_collapsed_within_window(self):
+        """Test that repeats in a dedup window increment one entry instead of adding rows."""
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        client.create_table(
+            TableName='test-log-dedup',
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"},
+                       {"AttributeName": "datetime", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"},
+                                  {"AttributeName": "datetime", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(client.delete_table, TableName='test-log-dedup')
+        storm = {'severity': 'error', 'message': 'Upstream timeout'}
+
+        with patch('index.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2026, 1, 29, 8, 30, 5, tzinfo=timezone.utc)
+            mock_datetime.fromtimestamp = datetime.fromtimestamp
+            first = json.loads(lambda_handler({'body': json.dumps(storm)}, None)['body'])['log_entry']
+            mock_datetime.now.return_value = datetime(2026, 1, 29, 8, 30, 40, tzinfo=timezone.utc)
+            batch = lambda_handler({'body': json.dumps([storm] * 10 + [{'severity': 'info', 'message': 'Ok'}])}, None)
+
+        self.assertEqual(first['count'], 1)
+        self.assertEqual(first['datetime'], '2026-01-29T08:30:00+00:00')
+        self.assertEqual(batch['statusCode'], 200)
+        results = json.loads(batch['body'])['results']
+        self.assertEqual({result['id'] for result in results[:10]}, {first['id']})
+
+        items = client.scan(TableName='test-log-dedup')['Items']
+        self.assertEqual(len(items), 2)
+        collapsed = codec.decode(next(item for item in items if item['id']['S'] == first['id']))
+        self.assertEqual(collapsed['count'], 11)
+        self.assertEqual(collapsed['last_seen'], '2026-01-29T08:30:40+00:00')
+        self.assertEqual(collapsed['message'], 'Upstream timeout')
+
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    @patch('index.ROLLUPS_ENABLED', True)
+    def test_rollup_counters_added_per_period(self):
+        """Test that stored entries are added to the minute, hour and day rollups."""
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        client.create_table(
+            TableName='test-log-views',
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(client.delete_table, TableName='test-log-views')
+        entries = [{'severity': 'error', 'message': f'Failure {i}'} for i in range(3)]
+        entries += [{'severity': 'info', 'message': 'Fine'}, {'severity': 'bogus', 'message': 'Rejected'}]
+
+        with patch('index.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2026, 1, 29, 8, 30, 5, tzinfo=timezone.utc)
+            lambda_handler({'body': json.dumps(entries)}, None)
+            lambda_handler({'body': json.dumps(entries[0])}, None)
+
+        now = datetime(2026, 1, 29, 8, 31, tzinfo=timezone.utc)
+        counts = {'info': 1, 'warning': 0, 'error': 4}
+        self.assertEqual(rollups.read(client, 'test-log-views', 'minute', now - timedelta(minutes=1), now),
+                         [{'period': '2026-01-29T08:30', **counts},
+                          {'period': '2026-01-29T08:31', 'info': 0, 'warning': 0, 'error': 0}])
+        self.assertEqual(rollups.read(client, 'test-log-views', 'hour', now, now),
+                         [{'period': '2026-01-29T08', **counts}])
+        self.assertEqual(rollups.read(client, 'test-log-views', 'day', now, now),
+                         [{'period': '2026-01-29', **counts}])
+
+    @patch('index.indexed_ids', OrderedDict())
+    @patch('index.SEARCH_TABLE_NAME', 'test-log-search')
+    def test_stored_entries_indexed_by_token(self):
+        """Test that one posting per distinct token is written in the entry's partition."""
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        client.create_table(
+            TableName='test-log-search',
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"},
+                       {"AttributeName": "sk", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"},
+                                  {"AttributeName": "sk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(client.delete_table, TableName='test-log-search')
+        entries = [{'severity': 'error', 'message': f'Timeout calling payment service {i}'} for i in range(10, 30)]
+
+        response = lambda_handler({'body': json.dumps(entries)}, None)
+
+        results = json.loads(response['body'])['results']
+        postings = client.scan(TableName='test-log-search')['Items']
+        self.assertEqual(len(postings), 20 * 5)
+        first = results[0]
+        key = search.posting_key('payment', keys.shard_key(first['datetime'][:10], 0))
+        stored = client.query(TableName='test-log-search', KeyConditionExpression='pk = :pk',
+                              ExpressionAttributeValues={':pk': {'S': key}})['Items']
+        self.assertIn(search.sort_key(first['datetime'], first['id']), [item['sk']['S'] for item in stored])
+
+    @patch('index.ROLLUPS_ENABLED', False)
+    @patch('index.watermark_horizon', 0.0)
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    @patch('index.clients.dynamodb')
+    def test_watermark_advanced_once_per_horizon(self, mock_dynamodb):
+        """Test that the write watermark is published ahead of writes, not once per write."""
+        client = mock_dynamodb.return_value
+        client.put_item.return_value = {}
+        event = {'body': json.dumps({'severity': 'info', 'message': 'Watermarked'})}
+        lambda_handler(event, None)
+        lambda_handler(event, None)
+
+        client.update_item.assert_called_once()
+        self.assertEqual(client.update_item.call_args[1]['TableName'], 'test-log-views')
+        self.assertEqual(client.put_item.call_count, 2)
+
+    @patch('index.watermark_horizon', 0.0)
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    @patch('index.clients.dynamodb')
+    def test_watermark_failure_does_not_fail_ingest(self, mock_dynamodb):
+        """Test that a throttled watermark update is logged and ignored."""
+        client = mock_dynamodb.return_value
+        client.put_item.return_value = {}
+        client.update_item.side_effect = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'slow down'}},
+            'UpdateItem'
+        )
+        event = {'body': json.dumps({'severity': 'info', 'message': 'Still stored'})}
+        response = lambda_handler(event, None)
+
+        self.assertEqual(response['statusCode'], 200)
+        client.put_item.assert_called_once()
+
+    @patch('builtins.print')
+    @patch('index.time.sleep')
+    @patch('index.clients.dynamodb')
+    def test_throttled_put_retried_with_backoff(self, mock_dynamodb, mock_sleep, mock_print):
+        """Test that a throttled single write is retried and the retries are logged."""
+        throttled = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'slow down'}},
+            'PutItem'
+        )
+        client = mock_dynamodb.return_value
+        client.put_item.side_effect = [throttled, throttled, {'ResponseMetadata': {'RetryAttempts': 1}}]
+        event = {'body': json.dumps({'severity': 'info', 'message': 'Eventually stored'})}
+
+        response = lambda_handler(event, None)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(client.put_item.call_count, 3)
+        stats = self.logged_stats(mock_print)
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['sdk_retries'], 1)
+        self.assertEqual(stats['throttles'], 2)
+        self.assertFalse(stats['retry_budget_exhausted'])
+
+    @patch('builtins.print')
+    @patch('index.time.sleep')
+    @patch('index.clients.dynamodb')
+    def test_throttled_put_returns_429_when_budget_spent(self, mock_dynamodb, mock_sleep, mock_print):
+        """Test that persistent throttling ends in a 429 once the retry budget is spent."""
+        mock_dynamodb.return_value.put_item.side_effect = ClientError(
+            {'Error': {'Code': 'ThrottlingException', 'Message': 'slow down'}},
+            'PutItem'
+        )
+        event = {'body': json.dumps({'severity': 'info', 'message': 'Never stored'})}
+
+        response = lambda_handler(event, None)
+
+        self.assertEqual(response['statusCode'], 429)
+        stats = self.logged_stats(mock_print)
+        self.assertTrue(stats['retry_budget_exhausted'])
+        self.assertLessEqual(stats['retries'], retry.MAX_RETRIES)
+
+    @patch('builtins.print')
+    @patch('index.clients.dynamodb')
+    def test_request_bytes_measures_raw_body(self, mock_dynamodb, mock_print):
+        """Test that request_bytes counts encoded body bytes and is skipped for parsed bodies."""
+        mock_dynamodb.return_value.put_item.return_value = {}
+        body = json.dumps({'severity': 'info', 'message': 'Température élevée'}, ensure_ascii=False)
+
+        lambda_handler({'body': body}, None)
+        self.assertEqual(self.logged_stats(mock_print)['request_bytes'], len(body.encode('utf-8')))
+
+        encoded = base64.b64encode(body.encode('utf-8')).decode('ascii')
+        lambda_handler({'body': encoded, 'isBase64Encoded': True}, None)
+        self.assertEqual(self.logged_stats(mock_print)['request_bytes'], len(body.encode('utf-8')))
+
+        lambda_handler({'body': {'severity': 'info', 'message': 'Already parsed'}}, None)
+        self.assertNotIn('request_bytes', self.logged_stats(mock_print))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,88 +1,221 @@
+import base64
+import gzip
+import hashlib
+import heapq
 import json
 import os
-from typing import Dict, Any, List
-from decimal import Decimal
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
-import boto3
-from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
+from log_common import clients, codec, cursor, keys, metrics, params, render, retry, snapshot, templates, watermark
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-table_name = os.environ['TABLE_NAME']
-table = dynamodb.Table(table_name)
+# DynamoDB is reached through the low-level client, created on first use
+TABLE_NAME = os.environ['TABLE_NAME']
 
-class DecimalEncoder(json.JSONEncoder):
-    """Helper class to convert DynamoDB Decimal types to JSON-serializable types."""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Views table holding the materialized "latest N" snapshot (optional)
+VIEWS_TABLE_NAME = os.environ.get('VIEWS_TABLE_NAME')
+
+# Snapshots older than this are ignored in favour of the query path
+SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get('SNAPSHOT_MAX_AGE_SECONDS', '60'))
+
+# Warm-container cache of encoded responses, keyed by query string
+READ_CACHE_TTL_SECONDS = float(os.environ.get('READ_CACHE_TTL_SECONDS', '2'))
+READ_CACHE_MAX_ENTRIES = int(os.environ.get('READ_CACHE_MAX_ENTRIES', '32'))
+READ_CACHE_MAX_BODY_BYTES = 1024 * 1024
+
+# Allowed clock difference between ingest and read containers
+CLOCK_SKEW_SECONDS = 0.5
+
+# Bodies smaller than this are sent uncompressed even if the client accepts gzip
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+read_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+cache_stats = {'hits': 0, 'misses': 0}
+
+# Message templates used by entries read so far; immutable, so never expired
+template_store = templates.TemplateStore()
+
+# Number of log entries returned per request (default and upper bound)
+MAX_RESULTS = 100
+MAX_LIMIT = 1000
+
+# Default time window, and the widest window a request may ask for
+LOOKBACK_DAYS = 30
+MAX_RANGE_DAYS = 90
+
+# Valid severity levels
+VALID_SEVERITIES = frozenset({'info', 'warning', 'error'})
+
+# Number of write shards per time bucket; must cover the highest shard
+# count used by ingest within the lookback window
+SHARD_COUNT = max(1, int(os.environ.get('SHARD_COUNT', '1')))
+
+# Upper bound on parallel partition queries per bucket
+QUERY_WORKERS = 16
+
+# Scan for entries written before the bucket attribute existed. Off by
+# default: a one-off switch for legacy data, since it makes every short
+# unfiltered first page (a quiet table, a large limit) scan the table
+SCAN_FALLBACK = os.environ.get('SCAN_FALLBACK', 'false').lower() == 'true'
+
+# Parallel scan settings for the fallback path
+SCAN_SEGMENTS = max(1, int(os.environ.get('SCAN_SEGMENTS', '4')))
+SCAN_TIME_BUDGET_SECONDS = float(os.environ.get('SCAN_TIME_BUDGET_SECONDS', '10'))
+SCAN_RCU_BUDGET = float(os.environ.get('SCAN_RCU_BUDGET', '2000'))
+
+# Time kept back from the Lambda timeout to build the response
+RESPONSE_MARGIN_SECONDS = 2.0
+
+class ScanBudget:
+    """Time and read capacity budget shared by parallel scan segments."""
+    def __init__(self, deadline: float, capacity_units: float):
+        self.deadline = deadline
+        self.capacity_units = capacity_units
+        self.consumed = 0.0
+        self.exceeded = False
+        self._lock = threading.Lock()
+
+    def charge(self, response: Dict[str, Any]) -> None:
+        """Record the capacity consumed by one scan page."""
+        units = response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        with self._lock:
+            self.consumed += float(units)
+
+    def exhausted(self) -> bool:
+        """Return True once either the time or capacity budget is spent."""
+        if self.consumed >= self.capacity_units or time.monotonic() >= self.deadline:
+            self.exceeded = True
+        return self.exceeded
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
-    Lambda handler for retrieving the 100 most recent log entries.
-    
-    Optimized to use Query with GSI instead of Scan for better performance.
-    
+    Lambda handler for retrieving the most recent log entries.
+
+    Responses are cached per query string in the warm container. A cached
+    response is served without any read within READ_CACHE_TTL_SECONDS and
+    after one small watermark read once the TTL has passed, as long as no
+    entry can have been written since it was built.
+
+    Successful responses carry a weak ETag derived from the query and the
+    entries on the page. A matching If-None-Match is answered with 304 and
+    no body, and bodies are gzip-compressed when Accept-Encoding allows it.
+
+    Unfiltered first pages are served from the materialized snapshot with a
+    single strongly consistent GetItem while the snapshot is fresh.
+    Otherwise the handler walks the daily time buckets of the bucket-datetime-index GSI newest
+    first and stops as soon as a page has been read. Falls back to a
+    table scan only for unfiltered first pages when SCAN_FALLBACK is
+    enabled (legacy data only; off by default) and the buckets hold
+    fewer entries than requested.
+
+    Query string parameters (all optional):
+        limit: Page size, 1-1000 (default 100)
+        since: ISO 8601 lower bound on datetime (default 30 days ago)
+        until: ISO 8601 upper bound on datetime (default now)
+        severity: Only return entries of these severities (comma-separated);
+            read from the severity-datetime-index
+        after: ISO 8601 watermark; only entries newer than it are returned.
+            Replaces `since` as the key condition's lower bound, so polling
+            reads only the new entries
+        after_id: id of the watermark entry, to resume exactly after it
+            when several entries share its datetime
+        cursor: next_cursor from a previous page; carries the filters of
+            the request that produced it
+
     Returns:
     {
-        "statusCode": 200|500,
-        "body": JSON string with log entries or error
+        "statusCode": 200|304|400|500,
+        "body": JSON string with log entries or error (gzip and base64
+            encoded when "isBase64Encoded" is true)
     }
+
+    Stage timings, consumed capacity and the cache outcome are logged as
+    one EMF line per invocation.
     """
+    metrics.start('read_recent')
+    if context is not None:
+        metrics.set_property('request_id', getattr(context, 'aws_request_id', None))
     try:
-        # Calculate datetime threshold (last 30 days)
-        # This ensures we're querying a reasonable time window
-        threshold_date = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-        
-        # Use Query with GSI for efficient retrieval
-        # This is much more efficient than Scan for large tables
-        response = table.query(
-            IndexName='datetime-index',
-            KeyConditionExpression=Key('datetime').gte(threshold_date),
-            ScanIndexForward=False,  # Sort descending (newest first)
-            Limit=100
-        )
-        
-        items = response.get('Items', [])
-        
-        # If we got fewer than 100 items, try a broader query
-        if len(items) < 100 and 'LastEvaluatedKey' not in response:
-            # Fall back to scan only if query returned insufficient results
-            response = table.scan(Limit=100)
-            items = response.get('Items', [])
-            
-            # Handle pagination for scan
-            while 'LastEvaluatedKey' in response and len(items) < 100:
-                response = table.scan(
-                    ExclusiveStartKey=response['LastEvaluatedKey'],
-                    Limit=100
+        headers = request_headers(event)
+        cache_key = json.dumps(event.get('queryStringParameters') or {}, sort_keys=True)
+        with metrics.stage('cache'):
+            cached = read_cached_response(cache_key)
+        if cached is not None:
+            return encode_response(cached, headers)
+        built_at = time.time()
+
+        try:
+            with metrics.stage('parse'):
+                params = parse_query_params(event)
+        except (ValueError, cursor.InvalidCursor) as e:
+            return create_response(400, {'error': str(e)})
+
+        limit = params['limit']
+        body = {}
+
+        has_more = False
+
+        with metrics.stage('dynamodb'):
+            items = read_snapshot(limit) if params['unfiltered'] else None
+            if items is not None:
+                query_method = 'snapshot'
+                # The snapshot cannot tell whether older entries exist behind a full page
+                has_more = len(items) >= limit
+            else:
+                # Read one extra entry to learn whether another page exists
+                items = query_time_buckets(
+                    params['until'], params['since'], limit + 1,
+                    severities=params['severities'], before=params['before'],
+                    after=params['after']
                 )
-                items.extend(response.get('Items', []))
-            
-            # Sort by datetime descending
-            items = sorted(
-                items,
-                key=lambda x: x['datetime'],
-                reverse=True
-            )[:100]
-        
-        return create_response(
-            200,
-            {
-                'count': len(items),
-                'logs': items,
-                'query_method': 'gsi_query' if len(items) > 0 else 'scan_fallback'
-            }
-        )
-        
+                query_method = 'severity_index_query' if params['severities'] else 'time_bucket_query'
+
+            # Fall back to scan only if the bucket walk returned insufficient results
+            if len(items) < limit and SCAN_FALLBACK and params['unfiltered']:
+                budget = ScanBudget(scan_deadline(context), SCAN_RCU_BUDGET)
+                items = scan_recent(limit, budget)
+                query_method = 'scan_fallback'
+                if budget.exceeded:
+                    print(f"Scan budget exhausted after {budget.consumed} capacity units")
+                    body['scan_truncated'] = True
+        metrics.set_property('query_method', query_method)
+
+        if len(items) > limit or has_more:
+            items = items[:limit]
+            body['next_cursor'] = cursor.encode({
+                'since': params['since'].isoformat(),
+                'severities': params['severities'],
+                'after': list(params['after']) if params['after'] else None,
+                'before': [items[-1]['datetime'], items[-1]['id']]
+            })
+        metrics.count('items', len(items))
+
+        etag = entity_tag(cache_key, items, body.get('scan_truncated', False))
+        if etag_matches(headers.get('if-none-match'), etag):
+            # Skip serializing a page the client already holds
+            return not_modified(etag)
+
+        body.update({
+            'count': len(items),
+            'logs': items,
+            'query_method': query_method
+        })
+        entry = {'response': create_response(200, body, {'ETag': etag})}
+        store_cached_response(cache_key, entry, built_at)
+        return encode_response(entry, headers)
+
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
-        
+
         # Handle specific DynamoDB errors
-        if error_code == 'ProvisionedThroughputExceededException':
+        if retry.is_throttle(e):
             print(f"Throughput exceeded: {error_message}")
             return create_response(429, {'error': 'Rate limit exceeded, please retry'})
         elif error_code == 'ResourceNotFoundException':
@@ -91,20 +224,426 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         else:
             print(f"DynamoDB error: {error_code} - {error_message}")
             return create_response(500, {'error': 'Failed to retrieve log entries'})
-    
+
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return create_response(500, {'error': 'Internal server error'})
 
-def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    finally:
+        metrics.emit()
+
+def parse_query_params(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate the query string of a read request.
+
+    Raises:
+        ValueError: If a parameter is invalid
+        cursor.InvalidCursor: If the cursor was tampered with
+    """
+    query = event.get('queryStringParameters') or {}
+    now = datetime.now(timezone.utc)
+
+    limit = params.parse_limit(query.get('limit'), MAX_RESULTS, MAX_LIMIT)
+
+    if query.get('cursor'):
+        position = cursor.decode(query['cursor'])
+        try:
+            since = params.parse_timestamp(position['since'], 'since')
+            severities = position['severities']
+            before_datetime, before_id = position['before']
+            after = tuple(position['after']) if position.get('after') else None
+        except (KeyError, TypeError, ValueError):
+            raise cursor.InvalidCursor('Malformed cursor')
+        return {
+            'limit': limit,
+            'since': since,
+            'until': params.parse_timestamp(before_datetime, 'cursor'),
+            'severities': severities,
+            'before': (before_datetime, before_id),
+            'after': after,
+            'unfiltered': False
+        }
+
+    until = params.parse_timestamp(query['until'], 'until') if query.get('until') else now
+    after = None
+    if query.get('after'):
+        if query.get('since'):
+            raise ValueError('after cannot be combined with since')
+        since = params.parse_timestamp(query['after'], 'after')
+        after = (since.isoformat(), query.get('after_id') or None)
+    elif query.get('since'):
+        since = params.parse_timestamp(query['since'], 'since')
+    else:
+        since = until - timedelta(days=LOOKBACK_DAYS)
+
+    if since > until:
+        raise ValueError('since must not be later than until')
+    if until - since > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f'Time range must not exceed {MAX_RANGE_DAYS} days')
+
+    severities = None
+    if query.get('severity'):
+        severities = sorted({value.strip().lower() for value in query['severity'].split(',')})
+        if not set(severities) <= VALID_SEVERITIES:
+            raise ValueError(f'Invalid severity. Must be one of: {", ".join(sorted(VALID_SEVERITIES))}')
+
+    return {
+        'limit': limit,
+        'since': since,
+        'until': until,
+        'severities': severities,
+        'before': None,
+        'after': after,
+        'unfiltered': not any(query.get(name) for name in ('since', 'until', 'severity', 'after'))
+    }
+
+def query_time_buckets(newest: datetime, oldest: datetime, limit: int,
+                       severities: Optional[List[str]] = None,
+                       before: Optional[Tuple[str, str]] = None,
+                       after: Optional[Tuple[str, Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Read the newest entries by walking time buckets newest-first.
+
+    All write shards of a bucket are queried in parallel in descending
+    datetime order and k-way merged, so the walk can stop as soon as
+    `limit` entries have been collected. With severities, the shards of
+    each requested severity are read from the severity index instead, so
+    entries of other severities are never read.
+
+    Args:
+        newest: Most recent timestamp to include
+        oldest: Earliest timestamp to include
+        limit: Maximum number of entries to return
+        severities: Only return entries of these severities
+        before: (datetime, id) of the last entry of the previous page;
+            only entries that sort after it are returned
+        after: (datetime, id or None) watermark; only newer entries are
+            returned. `oldest` must be its datetime, so the key condition
+            already excludes everything older
+
+    Returns:
+        Up to `limit` entries sorted by datetime descending
+    """
+    items: List[Dict[str, Any]] = []
+    key_range = (oldest.isoformat(), newest.isoformat())
+    if before:
+        key_range = (key_range[0], before[0])
+
+    if severities:
+        index_name, partition_attribute = keys.SEVERITY_INDEX_NAME, keys.SEVERITY_BUCKET_ATTRIBUTE
+    else:
+        index_name, partition_attribute = keys.TIME_INDEX_NAME, keys.BUCKET_ATTRIBUTE
+
+    for bucket in keys.buckets_newest_first(newest, oldest):
+        remaining = limit - len(items)
+        partitions = keys.shard_keys(bucket, SHARD_COUNT)
+        if severities:
+            partitions = [keys.severity_key(severity, shard)
+                          for severity in severities for shard in partitions]
+
+        def read(partition: str) -> List[Dict[str, Any]]:
+            return query_partition(index_name, partition_attribute, partition,
+                                   key_range, remaining, before, after)
+
+        if len(partitions) == 1:
+            items.extend(read(partitions[0]))
+        else:
+            with ThreadPoolExecutor(max_workers=min(QUERY_WORKERS, len(partitions))) as executor:
+                shard_results = list(executor.map(read, partitions))
+            items.extend(islice(merge_newest_first(shard_results), remaining))
+
+        if len(items) >= limit:
+            break
+
+    return items[:limit]
+
+def query_partition(index_name: str, partition_attribute: str, partition: str,
+                    key_range: Tuple[str, str], limit: int,
+                    before: Optional[Tuple[str, str]] = None,
+                    after: Optional[Tuple[str, Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Query one index partition for up to `limit` entries, newest first.
+
+    Uses the low-level client, which is safe to share between threads.
+    """
+    client = clients.dynamodb()
+    query_kwargs = {
+        'TableName': TABLE_NAME,
+        'IndexName': index_name,
+        'KeyConditionExpression': f'#{partition_attribute} = :partition AND #datetime BETWEEN :oldest AND :newest',
+        'ProjectionExpression': codec.PROJECTION_EXPRESSION,
+        'ExpressionAttributeNames': {f'#{partition_attribute}': partition_attribute, **codec.PROJECTION_NAMES},
+        'ExpressionAttributeValues': {
+            ':partition': {'S': partition},
+            ':oldest': {'S': key_range[0]},
+            ':newest': {'S': key_range[1]}
+        },
+        'ScanIndexForward': False  # Sort descending (newest first)
+    }
+    items: List[Dict[str, Any]] = []
+
+    while True:
+        query_kwargs['Limit'] = limit - len(items)
+        response = client.query(**query_kwargs, ReturnConsumedCapacity='TOTAL')
+        metrics.record_capacity(response, 'consumed_rcu')
+        page = render.decode_items(response.get('Items', []), template_store, clients.dynamodb(), VIEWS_TABLE_NAME)
+        if before:
+            # The key range includes the previous page's datetime; skip what was already returned
+            page = [item for item in page if (item['datetime'], item['id']) < before]
+        if after:
+            # The key range includes the watermark's datetime; skip entries up to it
+            page = [item for item in page if is_newer(item, after)]
+        items.extend(page)
+
+        if len(items) >= limit or 'LastEvaluatedKey' not in response:
+            return items
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def is_newer(item: Dict[str, Any], after: Tuple[str, Optional[str]]) -> bool:
+    """Return True if an entry sorts after the (datetime, id or None) watermark."""
+    after_datetime, after_id = after
+    if after_id is None:
+        return item['datetime'] > after_datetime
+    return (item['datetime'], item['id']) > (after_datetime, after_id)
+
+def merge_newest_first(sorted_lists: List[List[Dict[str, Any]]]):
+    """K-way merge of lists that are each sorted by datetime descending."""
+    return heapq.merge(*sorted_lists, key=lambda item: (item['datetime'], item['id']), reverse=True)
+
+def request_headers(event: Dict[str, Any]) -> Dict[str, str]:
+    """Return the request headers with lower-cased names."""
+    return {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+
+def entity_tag(cache_key: str, items: List[Dict[str, Any]], truncated: bool) -> str:
+    """
+    Build a weak ETag for a page of entries.
+
+    Entries are immutable once written, so the query, the page size and
+    the (datetime, id) of the newest and oldest entry identify the body.
+    The exception are collapsed entries (ingest dedup mode), whose counts
+    are part of the tag.
+    """
+    bounds = [(item['datetime'], item['id']) for item in items[:1] + items[-1:]]
+    counts = [(item['id'], item['count']) for item in items if 'count' in item]
+    digest = hashlib.sha256(
+        json.dumps([cache_key, len(items), bounds, truncated, counts]).encode('utf-8')
+    ).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Return True if the Accept-Encoding header allows gzip."""
+    for coding in (accept_encoding or '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+def not_modified(etag: str) -> Dict[str, Any]:
+    """Create a 304 response without a body."""
+    response = create_response(304, {}, {'ETag': etag})
+    response['body'] = ''
+    return response
+
+def encode_response(entry: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Answer a request from a built (possibly cached) 200 response.
+
+    Returns 304 when If-None-Match matches the ETag. Otherwise the body is
+    gzip-compressed for clients that accept it; the compressed variant is
+    kept on the entry so cache hits compress only once.
+    """
+    response = entry['response']
+    etag = response['headers']['ETag']
+    if etag_matches(headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    metrics.set_property('status_code', response['statusCode'])
+    if len(response['body']) < GZIP_MIN_BYTES or not accepts_gzip(headers.get('accept-encoding')):
+        return response
+
+    if 'gzip_response' not in entry:
+        with metrics.stage('compress'):
+            compressed = gzip.compress(response['body'].encode('utf-8'), compresslevel=GZIP_LEVEL)
+        entry['gzip_response'] = {
+            **response,
+            'headers': {**response['headers'], 'Content-Encoding': 'gzip'},
+            'body': base64.b64encode(compressed).decode('ascii'),
+            'isBase64Encoded': True
+        }
+    return entry['gzip_response']
+
+def read_cached_response(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Return a still-valid cache entry for this query, or None.
+
+    Inside the TTL the cached response is served as is. After the TTL the
+    write watermark is read; if its horizon is still older than the time
+    the response was built, nothing newer exists and the TTL is renewed.
+    """
+    entry = read_cache.get(cache_key)
+    outcome = 'miss'
+
+    if entry is not None:
+        if time.monotonic() - entry['checked_at'] < READ_CACHE_TTL_SECONDS:
+            outcome = 'hit'
+        elif (VIEWS_TABLE_NAME is not None and
+              watermark.read(clients.dynamodb(), VIEWS_TABLE_NAME) < entry['built_at'] - CLOCK_SKEW_SECONDS):
+            entry['checked_at'] = time.monotonic()
+            outcome = 'revalidated'
+        else:
+            del read_cache[cache_key]
+
+    if outcome == 'miss':
+        cache_stats['misses'] += 1
+    else:
+        cache_stats['hits'] += 1
+        metrics.count('cache_hits')
+        read_cache.move_to_end(cache_key)
+    metrics.set_property('read_cache', outcome)
+    metrics.set_property('read_cache_entries', len(read_cache))
+
+    return entry if outcome != 'miss' else None
+
+def store_cached_response(cache_key: str, entry: Dict[str, Any], built_at: float) -> None:
+    """Cache a response entry, evicting the least recently used beyond the size bound."""
+    if READ_CACHE_MAX_ENTRIES <= 0 or len(entry['response']['body']) > READ_CACHE_MAX_BODY_BYTES:
+        return
+    entry['built_at'] = built_at
+    entry['checked_at'] = time.monotonic()
+    read_cache[cache_key] = entry
+    read_cache.move_to_end(cache_key)
+    while len(read_cache) > READ_CACHE_MAX_ENTRIES:
+        read_cache.popitem(last=False)
+
+def read_snapshot(limit: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read the newest entries from the materialized snapshot.
+
+    Returns:
+        Up to `limit` + 1 entries, newest first, or None when the snapshot
+        is disabled, missing, stale or holds fewer than `limit` entries
+    """
+    if VIEWS_TABLE_NAME is None:
+        return None
+
+    response = clients.dynamodb().get_item(
+        TableName=VIEWS_TABLE_NAME,
+        Key={'pk': {'S': snapshot.SNAPSHOT_KEY}},
+        ConsistentRead=True,
+        ReturnConsumedCapacity='TOTAL'
+    )
+    metrics.record_capacity(response, 'consumed_rcu')
+    item = response.get('Item')
+    if not item:
+        return None
+
+    age = time.time() - int(item['updated_at']['N']) / 1000
+    if age > SNAPSHOT_MAX_AGE_SECONDS or int(item['count']['N']) < limit:
+        return None
+
+    return snapshot.decode(item['entries']['B'])[:limit + 1]
+
+def scan_deadline(context: Any) -> float:
+    """Return the monotonic deadline for the scan fallback."""
+    budget = SCAN_TIME_BUDGET_SECONDS
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        remaining = context.get_remaining_time_in_millis() / 1000 - RESPONSE_MARGIN_SECONDS
+        budget = min(budget, max(0.0, remaining))
+    return time.monotonic() + budget
+
+def scan_recent(limit: int, budget: ScanBudget) -> List[Dict[str, Any]]:
+    """
+    Scan the table with parallel segments and return the `limit` newest entries.
+
+    Each segment keeps a bounded min-heap of its `limit` newest entries, so
+    memory stays at O(limit) per segment regardless of the table size. The
+    scan stops early, returning the best entries seen so far, once the time
+    or read capacity budget is exhausted.
+    """
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        segment_heaps = list(executor.map(
+            lambda segment: scan_segment(segment, limit, budget),
+            range(SCAN_SEGMENTS)
+        ))
+
+    # Sort by datetime descending
+    newest = heapq.nlargest(limit, (entry for heap in segment_heaps for entry in heap))
+    items = [item for _, _, item in newest]
+    return render.decode_items(items, template_store, clients.dynamodb(), VIEWS_TABLE_NAME)
+
+def scan_segment(segment: int, limit: int, budget: ScanBudget) -> List[tuple]:
+    """Scan one segment, keeping a min-heap of its `limit` newest entries."""
+    client = clients.dynamodb()
+    scan_kwargs = {
+        'TableName': TABLE_NAME,
+        'Segment': segment,
+        'TotalSegments': SCAN_SEGMENTS,
+        'ProjectionExpression': codec.PROJECTION_EXPRESSION,
+        'ExpressionAttributeNames': codec.PROJECTION_NAMES,
+        'ReturnConsumedCapacity': 'TOTAL'
+    }
+    heap: List[tuple] = []
+
+    while not budget.exhausted():
+        response = client.scan(**scan_kwargs)
+        budget.charge(response)
+        metrics.record_capacity(response, 'consumed_rcu')
+
+        for item in response.get('Items', []):
+            # Only the winners are converted, in scan_recent
+            entry = (item['datetime']['S'], item['id']['S'], item)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        # Handle pagination for scan
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return heap
+
+def create_response(status_code: int, body: Dict[str, Any],
+                    extra_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     """Create a standardized API response."""
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,If-None-Match',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS',
+        'Access-Control-Expose-Headers': 'ETag',
+        'Vary': 'Accept-Encoding'
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+    with metrics.stage('serialize'):
+        encoded = render.dumps(body)
+    metrics.count('response_bytes', len(encoded), 'Bytes')
+    metrics.set_property('status_code', status_code)
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,OPTIONS'
-        },
-        'body': json.dumps(body, cls=DecimalEncoder)
+        'headers': headers,
+        'body': encoded
     }
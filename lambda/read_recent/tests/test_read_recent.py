@@ -1,19 +1,53 @@
+import base64
+import gzip
 import json
 import os
 import unittest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
+from botocore.exceptions import ClientError
 from moto import mock_dynamodb2
 import boto3
+from boto3.dynamodb.types import TypeSerializer
 import sys
+import time
 
-# Ensure index.py can be imported
+# Ensure index.py and the shared layer can be imported
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'common', 'python')))
+import index
 from index import lambda_handler
+from log_common import clients, codec, snapshot, templates, watermark
 
 # Mock environment variable for table name
 os.environ['TABLE_NAME'] = 'test-log-entries'
 
 
+def typed(item):
+    """Serialize an entry into the typed map the low-level client returns."""
+    serializer = TypeSerializer()
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+def make_items(count, newest=None, spacing=timedelta(minutes=1), bucketed=True):
+    """Build log entries spaced `spacing` apart, newest first."""
+    newest = newest or datetime.now(timezone.utc)
+    items = []
+    for i in range(count):
+        timestamp = newest - i * spacing
+        item = {
+            'id': f'test-id-{i}',
+            'datetime': timestamp.isoformat(),
+            'severity': 'info',
+            'message': f'Test message {i}'
+        }
+        if bucketed:
+            item['bucket'] = timestamp.strftime('%Y-%m-%d')
+            item['severity_bucket'] = f"info#{item['bucket']}"
+        items.append(item)
+    return items
+
+
 class TestReadRecentLambda(unittest.TestCase):
 
     @classmethod
@@ -22,38 +56,80 @@ class TestReadRecentLambda(unittest.TestCase):
         cls.mock_dynamodb = mock_dynamodb2()
         cls.mock_dynamodb.start()
 
-        # Create the table in mocked DynamoDB
+    @classmethod
+    def tearDownClass(cls):
+        # Stop moto mock after all tests
+        cls.mock_dynamodb.stop()
+
+    def setUp(self):
+        # moto ignores Segment/TotalSegments, so table-backed tests scan with one segment
+        segments = patch('index.SCAN_SEGMENTS', 1)
+        segments.start()
+        self.addCleanup(segments.stop)
+        index.read_cache.clear()
+
+        # Create the table with the time bucket GSI in mocked DynamoDB
         dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
-        dynamodb.create_table(
+        self.table = dynamodb.create_table(
             TableName=os.environ['TABLE_NAME'],
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            KeySchema=[
+                {"AttributeName": "id", "KeyType": "HASH"},
+                {"AttributeName": "datetime", "KeyType": "RANGE"}
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "datetime", "AttributeType": "S"},
+                {"AttributeName": "bucket", "AttributeType": "S"},
+                {"AttributeName": "severity_bucket", "AttributeType": "S"}
+            ],
+            GlobalSecondaryIndexes=[{
+                "IndexName": "bucket-datetime-index",
+                "KeySchema": [
+                    {"AttributeName": "bucket", "KeyType": "HASH"},
+                    {"AttributeName": "datetime", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            }, {
+                "IndexName": "severity-datetime-index",
+                "KeySchema": [
+                    {"AttributeName": "severity_bucket", "KeyType": "HASH"},
+                    {"AttributeName": "datetime", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            }],
             BillingMode="PAY_PER_REQUEST"
         )
 
-    @classmethod
-    def tearDownClass(cls):
-        # Stop moto mock after all tests
-        cls.mock_dynamodb.stop()
+        self.views_table = dynamodb.create_table(
+            TableName='test-log-views',
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+
+    def tearDown(self):
+        self.table.delete()
+        self.views_table.delete()
+
+    def put_snapshot(self, entries, age_seconds=0):
+        blob, entries = snapshot.encode(snapshot.merge([], entries, 100))
+        self.views_table.put_item(Item={
+            'pk': snapshot.SNAPSHOT_KEY,
+            'entries': blob,
+            'count': len(entries),
+            'version': 1,
+            'updated_at': int((time.time() - age_seconds) * 1000)
+        })
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_successful_read_recent(self, mock_table):
+    def put_items(self, items):
+        with self.table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def test_successful_read_recent(self):
         """Test successful retrieval of recent logs."""
-        mock_items = [
-            {
-                'id': 'test-id-1',
-                'datetime': '2026-01-29T10:00:00.000Z',
-                'severity': 'info',
-                'message': 'Test message 1'
-            },
-            {
-                'id': 'test-id-2',
-                'datetime': '2026-01-29T09:00:00.000Z',
-                'severity': 'warning',
-                'message': 'Test message 2'
-            }
-        ]
-        mock_table.scan.return_value = {'Items': mock_items}
+        items = make_items(2)
+        self.put_items(items)
 
         response = lambda_handler({}, None)
         self.assertEqual(response['statusCode'], 200)
@@ -61,68 +137,481 @@ class TestReadRecentLambda(unittest.TestCase):
         self.assertEqual(body['count'], 2)
         self.assertEqual(len(body['logs']), 2)
         # Verify sorted by datetime descending
-        self.assertEqual(body['logs'][0]['datetime'], '2026-01-29T10:00:00.000Z')
-        self.assertEqual(body['logs'][1]['datetime'], '2026-01-29T09:00:00.000Z')
+        self.assertEqual(body['logs'][0]['datetime'], items[0]['datetime'])
+        self.assertEqual(body['logs'][1]['datetime'], items[1]['datetime'])
+        self.assertNotIn('bucket', body['logs'][0])
+
+    def test_mixed_codec_versions_decoded(self):
+        """Test that plain, compact and compressed rows are read back alike."""
+        items = make_items(3)
+        items[0]['message'] = 'Compressed message body ' * 100
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        for item in items[:2]:
+            client.put_item(TableName=os.environ['TABLE_NAME'], Item=codec.encode(item, version=2))
+        self.put_items(items[2:])
+
+        response = lambda_handler({}, None)
+
+        logs = json.loads(response['body'])['logs']
+        expected = [{field: item[field] for field in ('id', 'datetime', 'severity', 'message')}
+                    for item in items]
+        self.assertEqual(logs, expected)
+
+    def test_collapsed_entries_show_count(self):
+        """Test that collapsed entries are returned with their count and last_seen."""
+        items = make_items(2)
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        for item in items:
+            client.put_item(TableName=os.environ['TABLE_NAME'], Item=codec.encode(item))
+        client.update_item(
+            TableName=os.environ['TABLE_NAME'],
+            Key={'id': {'S': items[0]['id']}, 'datetime': {'S': items[0]['datetime']}},
+            UpdateExpression='SET #last_seen = :last_seen ADD #count :n',
+            ExpressionAttributeNames={'#count': 'count', '#last_seen': 'last_seen'},
+            ExpressionAttributeValues={':n': {'N': '250'}, ':last_seen': {'S': items[0]['datetime']}}
+        )
+
+        response = lambda_handler({}, None)
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_empty_table(self, mock_table):
+        logs = json.loads(response['body'])['logs']
+        self.assertEqual((logs[0]['count'], logs[0]['last_seen']), (250, items[0]['datetime']))
+        self.assertNotIn('count', logs[1])
+
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    def test_templated_entries_rendered(self):
+        """Test that entries stored as template id and parameters are re-rendered."""
+        items = make_items(5)
+        for i, item in enumerate(items):
+            item['message'] = f'User {1000 + i} logged in from 10.0.0.{i}'
+        miner, store = templates.Miner(), templates.TemplateStore()
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        for item in items:
+            template_id, template, params = miner.match(item['message'])
+            store.persist(client, 'test-log-views', template_id, template)
+            client.put_item(TableName=os.environ['TABLE_NAME'],
+                            Item=codec.encode({**item, 'template_id': template_id, 'params': params}))
+
+        with patch('index.template_store', templates.TemplateStore()) as reader_store:
+            response = lambda_handler({}, None)
+
+        logs = json.loads(response['body'])['logs']
+        self.assertEqual([log['message'] for log in logs], [item['message'] for item in items])
+        self.assertEqual(len(reader_store.templates), 1)
+
+    def test_empty_table(self):
         """Test retrieval when table is empty."""
-        mock_table.scan.return_value = {'Items': []}
         response = lambda_handler({}, None)
         self.assertEqual(response['statusCode'], 200)
         body = json.loads(response['body'])
         self.assertEqual(body['count'], 0)
         self.assertEqual(len(body['logs']), 0)
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_pagination(self, mock_table):
-        """Test handling of paginated results."""
-        mock_items_page1 = [
-            {
-                'id': f'test-id-{i}',
-                'datetime': f'2026-01-29T{10+i:02d}:00:00.000Z',
-                'severity': 'info',
-                'message': f'Test message {i}'
-            }
-            for i in range(50)
-        ]
-        mock_items_page2 = [
-            {
-                'id': f'test-id-{i}',
-                'datetime': f'2026-01-29T{i:02d}:00:00.000Z',
-                'severity': 'info',
-                'message': f'Test message {i}'
-            }
-            for i in range(50, 100)
-        ]
-        mock_table.scan.side_effect = [
-            {'Items': mock_items_page1, 'LastEvaluatedKey': {'id': 'test-id-49'}},
-            {'Items': mock_items_page2}
-        ]
+    def test_pagination(self):
+        """Test that the bucket walk crosses buckets newest-first."""
+        items = make_items(150, spacing=timedelta(hours=1))
+        self.put_items(items)
 
         response = lambda_handler({}, None)
         self.assertEqual(response['statusCode'], 200)
         body = json.loads(response['body'])
         self.assertEqual(body['count'], 100)
+        self.assertEqual(body['query_method'], 'time_bucket_query')
+        self.assertEqual(
+            [log['id'] for log in body['logs']],
+            [item['id'] for item in items[:100]]
+        )
 
-    @patch('index.table', new_callable=lambda: boto3.resource('dynamodb', region_name='us-east-1').Table(os.environ['TABLE_NAME']))
-    def test_limit_to_100(self, mock_table):
+    def test_limit_to_100(self):
         """Test that only 100 most recent logs are returned."""
-        mock_items = [
-            {
-                'id': f'test-id-{i}',
-                'datetime': f'2026-01-29T{i:02d}:00:00.000Z',
-                'severity': 'info',
-                'message': f'Test message {i}'
-            }
-            for i in range(150)
-        ]
-        mock_table.scan.return_value = {'Items': mock_items}
+        self.put_items(make_items(150))
+
+        client = clients.dynamodb()
+        with patch.object(client, 'query', wraps=client.query) as query:
+            response = lambda_handler({}, None)
 
-        response = lambda_handler({}, None)
         self.assertEqual(response['statusCode'], 200)
         body = json.loads(response['body'])
         self.assertEqual(body['count'], 100)
+        # All entries fit in at most two daily buckets, so the walk stops early
+        self.assertLessEqual(query.call_count, 2)
+
+    @patch('index.SCAN_FALLBACK', True)
+    def test_scan_fallback_for_unbucketed_entries(self):
+        """Test that entries without a time bucket are found by the scan fallback."""
+        items = make_items(3, bucketed=False)
+        self.put_items(items)
+
+        response = lambda_handler({}, None)
+        body = json.loads(response['body'])
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(body['query_method'], 'scan_fallback')
+        self.assertEqual(body['logs'][0]['id'], items[0]['id'])
+
+    @patch('index.SCAN_FALLBACK', False)
+    def test_scan_fallback_disabled(self):
+        """Test that no scan is issued when the fallback is disabled."""
+        self.put_items(make_items(3))
+
+        with patch.object(clients.dynamodb(), 'scan') as scan:
+            response = lambda_handler({}, None)
+
+        body = json.loads(response['body'])
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(body['query_method'], 'time_bucket_query')
+        scan.assert_not_called()
+
+    @patch('index.SHARD_COUNT', 3)
+    @patch('index.SCAN_FALLBACK', False)
+    def test_sharded_buckets_merged(self):
+        """Test scatter-gather over write shards returns the global newest-first order."""
+        items = make_items(150)
+        for i, item in enumerate(items):
+            if i % 3:
+                item['bucket'] = f"{item['bucket']}#{i % 3}"
+        self.put_items(items)
+
+        response = lambda_handler({}, None)
+        body = json.loads(response['body'])
+        self.assertEqual(body['count'], 100)
+        self.assertEqual(
+            [log['id'] for log in body['logs']],
+            [item['id'] for item in items[:100]]
+        )
+
+    @patch('index.SCAN_FALLBACK', True)
+    @patch('index.SCAN_SEGMENTS', 4)
+    @patch('index.query_time_buckets', return_value=[])
+    @patch('index.clients.dynamodb')
+    def test_parallel_scan_top_k(self, mock_dynamodb, mock_query):
+        """Test that segments are scanned in parallel and merged into the global top 100."""
+        items = make_items(400, bucketed=False)
+
+        def scan_segment(**kwargs):
+            self.assertEqual(kwargs['TotalSegments'], 4)
+            segment_items = [typed(item) for item in items[kwargs['Segment']::4]]
+            if 'ExclusiveStartKey' not in kwargs:
+                return {'Items': segment_items[:50], 'LastEvaluatedKey': {'id': {'S': 'next'}}}
+            return {'Items': segment_items[50:]}
+
+        mock_dynamodb.return_value.scan.side_effect = scan_segment
+
+        response = lambda_handler({}, None)
+        body = json.loads(response['body'])
+        self.assertEqual(body['count'], 100)
+        self.assertEqual(body['query_method'], 'scan_fallback')
+        self.assertEqual([log['id'] for log in body['logs']], [item['id'] for item in items[:100]])
+        self.assertEqual(mock_dynamodb.return_value.scan.call_count, 8)
+        self.assertNotIn('scan_truncated', body)
+
+    @patch('index.SCAN_FALLBACK', True)
+    @patch('index.SCAN_SEGMENTS', 1)
+    @patch('index.SCAN_RCU_BUDGET', 10)
+    @patch('index.query_time_buckets', return_value=[])
+    @patch('index.clients.dynamodb')
+    def test_scan_stops_at_capacity_budget(self, mock_dynamodb, mock_query):
+        """Test that the scan stops once the read capacity budget is spent."""
+        pages = iter([[typed(item)] for item in make_items(5, bucketed=False)])
+        mock_dynamodb.return_value.scan.side_effect = lambda **kwargs: {
+            'Items': next(pages),
+            'LastEvaluatedKey': {'id': {'S': 'next'}},
+            'ConsumedCapacity': {'CapacityUnits': 4.0}
+        }
+
+        response = lambda_handler({}, None)
+        body = json.loads(response['body'])
+        self.assertTrue(body['scan_truncated'])
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(mock_dynamodb.return_value.scan.call_count, 3)
+
+    def test_cursor_pagination(self):
+        """Test that following next_cursor returns every entry exactly once, newest first."""
+        items = make_items(250, spacing=timedelta(minutes=20))
+        self.put_items(items)
+
+        seen = []
+        event = {'queryStringParameters': {'limit': '60'}}
+        while True:
+            body = json.loads(lambda_handler(event, None)['body'])
+            seen.extend(log['id'] for log in body['logs'])
+            if 'next_cursor' not in body:
+                break
+            event = {'queryStringParameters': {'limit': '60', 'cursor': body['next_cursor']}}
+
+        self.assertEqual(seen, [item['id'] for item in items])
+
+    def test_time_range_and_severity_filters(self):
+        """Test since/until and severity filtering."""
+        items = make_items(48, spacing=timedelta(hours=1))
+        for i, item in enumerate(items):
+            item['severity'] = 'error' if i % 4 == 0 else 'info'
+            item['severity_bucket'] = f"{item['severity']}#{item['bucket']}"
+        self.put_items(items)
+
+        event = {'queryStringParameters': {
+            'since': items[30]['datetime'],
+            'until': items[10]['datetime'],
+            'severity': 'ERROR'
+        }}
+        body = json.loads(lambda_handler(event, None)['body'])
+
+        expected = [item['id'] for item in items[10:31] if item['severity'] == 'error']
+        self.assertEqual([log['id'] for log in body['logs']], expected)
+        self.assertEqual(body['query_method'], 'severity_index_query')
+        self.assertNotIn('next_cursor', body)
+
+    def test_invalid_query_params(self):
+        """Test validation errors for query parameters."""
+        for query in [
+            {'limit': '0'},
+            {'limit': 'abc'},
+            {'limit': '1001'},
+            {'severity': 'critical'},
+            {'since': 'yesterday'},
+            {'since': '2026-01-29T10:00:00+00:00', 'until': '2026-01-28T10:00:00+00:00'},
+            {'cursor': 'forged.cursor'}
+        ]:
+            response = lambda_handler({'queryStringParameters': query}, None)
+            self.assertEqual(response['statusCode'], 400, query)
+            self.assertIn('error', json.loads(response['body']))
+
+    @patch('index.SHARD_COUNT', 2)
+    def test_multiple_severities_merged(self):
+        """Test that several severities are read from their own partitions and merged by time."""
+        items = make_items(90)
+        severities = ['info', 'warning', 'error']
+        for i, item in enumerate(items):
+            item['severity'] = severities[i % 3]
+            item['bucket'] = f"{item['bucket']}#1" if i % 2 else item['bucket']
+            item['severity_bucket'] = f"{item['severity']}#{item['bucket']}"
+        self.put_items(items)
+
+        client = clients.dynamodb()
+        event = {'queryStringParameters': {'severity': 'error,warning', 'limit': '20'}}
+        with patch.object(client, 'query', wraps=client.query) as query:
+            body = json.loads(lambda_handler(event, None)['body'])
+
+        expected = [item['id'] for item in items if item['severity'] != 'info'][:20]
+        self.assertEqual([log['id'] for log in body['logs']], expected)
+        partitions = {
+            call[1]['ExpressionAttributeValues'][':partition']['S']
+            for call in query.call_args_list
+        }
+        self.assertTrue(all(not partition.startswith('info#') for partition in partitions))
+
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    def test_served_from_fresh_snapshot(self):
+        """Test that a fresh snapshot answers with a single GetItem and no query."""
+        items = make_items(100)
+        self.put_snapshot(items)
+
+        with patch.object(clients.dynamodb(), 'query') as query:
+            body = json.loads(lambda_handler({'queryStringParameters': {'limit': '50'}}, None)['body'])
+
+        query.assert_not_called()
+        self.assertEqual(body['query_method'], 'snapshot')
+        self.assertEqual([log['id'] for log in body['logs']], [item['id'] for item in items[:50]])
+        self.assertIn('next_cursor', body)
+
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    def test_stale_snapshot_falls_back_to_query(self):
+        """Test that a stale snapshot is ignored in favour of the bucket query."""
+        items = make_items(150)
+        self.put_items(items)
+        self.put_snapshot(items[50:], age_seconds=3600)
+
+        body = json.loads(lambda_handler({}, None)['body'])
+        self.assertEqual(body['query_method'], 'time_bucket_query')
+        self.assertEqual(body['logs'][0]['id'], items[0]['id'])
+
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    def test_cached_response_within_ttl(self):
+        """Test that a repeated query inside the TTL is served without any read."""
+        self.put_items(make_items(120))
+        event = {'queryStringParameters': {'limit': '10'}}
+        first = lambda_handler(event, None)
+
+        with patch.object(clients.dynamodb(), 'query') as query, \
+                patch.object(clients.dynamodb(), 'get_item') as get_item:
+            second = lambda_handler(event, None)
+
+        query.assert_not_called()
+        get_item.assert_not_called()
+        self.assertEqual(first['body'], second['body'])
+
+    def test_metrics_logged_per_invocation(self):
+        """Test that each read logs one EMF line with its stages and cache outcome."""
+        self.put_items(make_items(20))
+        event = {'queryStringParameters': {'limit': '10'}}
+
+        with patch('builtins.print') as mock_print:
+            lambda_handler(event, None)
+            lambda_handler(event, None)
+
+        miss, hit = (json.loads(call.args[0]) for call in mock_print.call_args_list)
+        self.assertEqual(miss['Function'], 'read_recent')
+        self.assertEqual(miss['read_cache'], 'miss')
+        self.assertEqual(miss['query_method'], 'time_bucket_query')
+        self.assertEqual(miss['items'], 10)
+        for stage in ('cache_ms', 'parse_ms', 'dynamodb_ms', 'serialize_ms', 'total_ms'):
+            self.assertIn(stage, miss)
+        metric_names = {m['Name'] for m in miss['_aws']['CloudWatchMetrics'][0]['Metrics']}
+        self.assertIn('dynamodb_ms', metric_names)
+
+        self.assertEqual(hit['read_cache'], 'hit')
+        self.assertEqual(hit['cache_hits'], 1)
+        self.assertNotIn('dynamodb_ms', hit)
+
+    @patch('index.READ_CACHE_TTL_SECONDS', 0)
+    @patch('index.VIEWS_TABLE_NAME', 'test-log-views')
+    def test_cache_revalidated_by_watermark(self):
+        """Test that an expired entry is reused while the watermark shows no newer writes."""
+        self.put_items(make_items(120))
+        watermark.advance(clients.dynamodb(), 'test-log-views', time.time() - 60)
+        event = {'queryStringParameters': {'limit': '10'}}
+        lambda_handler(event, None)
+
+        with patch.object(clients.dynamodb(), 'query') as query:
+            lambda_handler(event, None)
+        query.assert_not_called()
+
+        # A write publishes a horizon past the cached build time
+        watermark.advance(clients.dynamodb(), 'test-log-views', time.time())
+        body = json.loads(lambda_handler(event, None)['body'])
+        self.assertEqual(body['query_method'], 'time_bucket_query')
+
+    @patch('index.READ_CACHE_MAX_ENTRIES', 2)
+    def test_cache_size_bound(self):
+        """Test that the cache evicts least recently used queries beyond its bound."""
+        self.put_items(make_items(5))
+        for limit in ['1', '2', '3']:
+            lambda_handler({'queryStringParameters': {'limit': limit}}, None)
+
+        self.assertEqual(len(index.read_cache), 2)
+        self.assertNotIn(json.dumps({'limit': '1'}), index.read_cache)
+
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag is answered with 304 and an empty body."""
+        self.put_items(make_items(20))
+        event = {'queryStringParameters': {'limit': '10'}}
+        first = lambda_handler(event, None)
+        etag = first['headers']['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        # Served from the warm cache and after a cold rebuild alike
+        for clear in (False, True):
+            if clear:
+                index.read_cache.clear()
+            response = lambda_handler(dict(event, headers={'If-None-Match': etag}), None)
+            self.assertEqual(response['statusCode'], 304)
+            self.assertEqual(response['body'], '')
+            self.assertEqual(response['headers']['ETag'], etag)
+
+        # A new entry changes the newest entry and therefore the ETag
+        index.read_cache.clear()
+        self.put_items([dict(make_items(1)[0], id='new-id')])
+        response = lambda_handler(dict(event, headers={'if-none-match': etag}), None)
+        self.assertEqual(response['statusCode'], 200)
+        self.assertNotEqual(response['headers']['ETag'], etag)
+
+    def test_gzip_when_accepted(self):
+        """Test that bodies are gzip-compressed and base64-encoded only when accepted."""
+        self.put_items(make_items(100))
+        plain = lambda_handler({'headers': {}}, None)
+        self.assertNotIn('isBase64Encoded', plain)
+
+        response = lambda_handler({'headers': {'accept-encoding': 'br, gzip;q=0.8'}}, None)
+        self.assertTrue(response['isBase64Encoded'])
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        body = gzip.decompress(base64.b64decode(response['body'])).decode('utf-8')
+        self.assertEqual(body, plain['body'])
+        self.assertLess(len(response['body']), len(plain['body']))
+
+        refused = lambda_handler({'headers': {'Accept-Encoding': 'gzip;q=0'}}, None)
+        self.assertNotIn('isBase64Encoded', refused)
+
+    def test_after_watermark_reads_only_new_entries(self):
+        """Test that an `after` watermark returns, and reads, only newer entries."""
+        items = make_items(50)
+        self.put_items(items)
+        watermark_entry = items[5]
+
+        client = clients.dynamodb()
+        original_query = client.query
+        read_counts = []
+
+        def counting_query(**kwargs):
+            response = original_query(**kwargs)
+            read_counts.append(len(response.get('Items', [])))
+            return response
+
+        with patch.object(client, 'query', side_effect=counting_query):
+            response = lambda_handler({'queryStringParameters': {
+                'after': watermark_entry['datetime'],
+                'after_id': watermark_entry['id']
+            }}, None)
+
+        body = json.loads(response['body'])
+        self.assertEqual([log['id'] for log in body['logs']], [item['id'] for item in items[:5]])
+        self.assertNotIn('next_cursor', body)
+        # The key condition starts at the watermark: at most the watermark itself is read back
+        self.assertLessEqual(sum(read_counts), 6)
+
+    def test_after_watermark_ties_and_pages(self):
+        """Test that entries sharing the watermark datetime are split by id and pages stop at the watermark."""
+        now = datetime.now(timezone.utc) - timedelta(minutes=1)
+        tied = [dict(make_items(1, newest=now)[0], id=f'tied-{i}') for i in range(3)]
+        newer = make_items(4, newest=now + timedelta(seconds=30), spacing=timedelta(seconds=1))
+        self.put_items(tied + newer + make_items(5, newest=now - timedelta(minutes=5)))
+
+        query = {'after': tied[0]['datetime'], 'after_id': 'tied-0', 'limit': '2'}
+        seen = []
+        while True:
+            body = json.loads(lambda_handler({'queryStringParameters': query}, None)['body'])
+            seen.extend(log['id'] for log in body['logs'])
+            if 'next_cursor' not in body:
+                break
+            query = {'limit': '2', 'cursor': body['next_cursor']}
+
+        self.assertEqual(seen, [item['id'] for item in newer] + ['tied-2', 'tied-1'])
+
+        # Without after_id, only strictly newer datetimes are returned
+        body = json.loads(lambda_handler({'queryStringParameters': {'after': tied[0]['datetime']}}, None)['body'])
+        self.assertEqual(body['count'], len(newer))
+
+    def test_after_watermark_and_collapsed_entries(self):
+        """Test that a collapsed entry, dated at its window start, is behind a later watermark."""
+        window = timedelta(seconds=60)
+        window_start = datetime.fromtimestamp(time.time() // 60 * 60, timezone.utc) - 2 * window
+        seen = make_items(1, newest=window_start + timedelta(seconds=30))[0]
+        # First stored at window_start + 45s, after the follower read `seen`
+        collapsed = dict(make_items(1, newest=window_start)[0], id='collapsed-1', count=3,
+                         last_seen=(window_start + timedelta(seconds=45)).isoformat())
+        self.put_items([seen, collapsed])
+
+        query = {'after': seen['datetime'], 'after_id': seen['id']}
+        body = json.loads(lambda_handler({'queryStringParameters': query}, None)['body'])
+        self.assertEqual(body['count'], 0)
+
+        # Moving the watermark back by the dedup window finds it
+        since = datetime.fromisoformat(seen['datetime']) - window
+        body = json.loads(lambda_handler({'queryStringParameters': {'after': since.isoformat()}}, None)['body'])
+        self.assertEqual([log['id'] for log in body['logs']], [seen['id'], 'collapsed-1'])
+        self.assertEqual(body['logs'][1]['count'], 3)
+
+    def test_after_with_since_rejected(self):
+        """Test that after and since cannot be combined."""
+        response = lambda_handler({'queryStringParameters': {
+            'after': '2026-01-29T08:00:00+00:00', 'since': '2026-01-29T07:00:00+00:00'
+        }}, None)
+        self.assertEqual(response['statusCode'], 400)
+
+    @patch('builtins.print')
+    def test_throttling_returns_429(self, _):
+        """Test that every DynamoDB throttling error code maps to 429, not 500."""
+        throttled = ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'Query')
+        with patch.object(clients.dynamodb(), 'query', side_effect=throttled):
+            response = lambda_handler({'queryStringParameters': {'severity': 'error'}}, None)
+        self.assertEqual(response['statusCode'], 429)
 
 
 if __name__ == '__main__':
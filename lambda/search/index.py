@@ -0,0 +1,245 @@
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
+from log_common import clients, codec, cursor, keys, metrics, params, render, retry, search, templates
+
+# Entries table the matches are read from
+TABLE_NAME = os.environ['TABLE_NAME']
+
+# Token index written by ingest (log_common.search)
+SEARCH_TABLE_NAME = os.environ['SEARCH_TABLE_NAME']
+
+# Views table holding message templates (optional)
+VIEWS_TABLE_NAME = os.environ.get('VIEWS_TABLE_NAME')
+
+# Message templates used by entries read so far; immutable, so never expired
+template_store = templates.TemplateStore()
+
+# Number of log entries returned per request (default and upper bound)
+MAX_RESULTS = 100
+MAX_LIMIT = 1000
+
+# Default time window, and the widest window a request may ask for
+LOOKBACK_DAYS = 30
+MAX_RANGE_DAYS = 90
+
+# Most terms one query may combine
+MAX_TERMS = 8
+
+# Number of write shards per time bucket; must cover the highest shard
+# count used by ingest within the lookback window
+SHARD_COUNT = max(1, int(os.environ.get('SHARD_COUNT', '1')))
+
+# Upper bound on parallel shard intersections per bucket
+QUERY_WORKERS = 16
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for searching log messages by token.
+
+    The query is split into tokens the same way ingest indexes messages
+    (log_common.search.tokenize); an entry matches when its message holds
+    every token. Matching is by whole token and case-insensitive: "time"
+    does not match "timeout".
+
+    Daily buckets are walked newest first. In each bucket, the posting
+    lists of all terms are intersected per write shard, in parallel, and
+    the shards are merged newest first, so the walk stops as soon as a
+    page of matches has been found. Matched entries are then read from
+    the entries table with BatchGetItem.
+
+    Query string parameters:
+        q: Search terms (required unless cursor is given)
+        limit: Page size, 1-1000 (default 100)
+        since: ISO 8601 lower bound on datetime (default 30 days ago)
+        until: ISO 8601 upper bound on datetime (default now)
+        cursor: next_cursor from a previous page; carries the terms and
+            time range of the request that produced it
+
+    Returns:
+    {
+        "statusCode": 200|400|429|500,
+        "body": {"terms", "count", "logs", "next_cursor"?}
+    }
+    """
+    metrics.start('search')
+    if context is not None:
+        metrics.set_property('request_id', getattr(context, 'aws_request_id', None))
+    try:
+        try:
+            with metrics.stage('parse'):
+                params = parse_query_params(event)
+        except (ValueError, cursor.InvalidCursor) as e:
+            return create_response(400, {'error': str(e)})
+
+        limit = params['limit']
+        body: Dict[str, Any] = {'terms': params['terms']}
+
+        with metrics.stage('dynamodb'):
+            # Match one extra entry to learn whether another page exists
+            positions = search_buckets(params['terms'], params['until'], params['since'], limit + 1,
+                                       params['before'])
+            if len(positions) > limit:
+                positions = positions[:limit]
+                body['next_cursor'] = cursor.encode({
+                    'terms': params['terms'],
+                    'since': params['since'].isoformat(),
+                    'before': positions[-1]
+                })
+            items = fetch_entries(positions)
+        metrics.set_property('terms', len(params['terms']))
+        metrics.count('items', len(items))
+
+        body.update({'count': len(items), 'logs': items})
+        return create_response(200, body)
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+
+        if retry.is_throttle(e):
+            print(f"Throughput exceeded: {error_message}")
+            return create_response(429, {'error': 'Rate limit exceeded, please retry'})
+        elif error_code == 'ResourceNotFoundException':
+            print(f"Table not found: {error_message}")
+            return create_response(500, {'error': 'Database table not found'})
+        else:
+            print(f"DynamoDB error: {error_code} - {error_message}")
+            return create_response(500, {'error': 'Failed to search log entries'})
+
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return create_response(500, {'error': 'Internal server error'})
+
+    finally:
+        metrics.emit()
+
+def parse_query_params(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate the query string of a search request.
+
+    Raises:
+        ValueError: If a parameter is invalid
+        cursor.InvalidCursor: If the cursor was tampered with
+    """
+    query = event.get('queryStringParameters') or {}
+    limit = params.parse_limit(query.get('limit'), MAX_RESULTS, MAX_LIMIT)
+
+    if query.get('cursor'):
+        position = cursor.decode(query['cursor'])
+        try:
+            terms = [str(term) for term in position['terms']]
+            since = params.parse_timestamp(position['since'], 'since')
+            before = str(position['before'])
+            until = params.parse_timestamp(search.parse_sort_key(before)[0], 'cursor')
+        except (KeyError, TypeError, ValueError):
+            raise cursor.InvalidCursor('Malformed cursor')
+        return {'limit': limit, 'terms': terms, 'since': since, 'until': until, 'before': before}
+
+    terms = search.tokenize(query.get('q') or '')
+    if not terms:
+        raise ValueError('q must contain at least one searchable term')
+    if len(terms) > MAX_TERMS:
+        raise ValueError(f'q must not contain more than {MAX_TERMS} terms')
+
+    until = params.parse_timestamp(query['until'], 'until') if query.get('until') else datetime.now(timezone.utc)
+    since = params.parse_timestamp(query['since'], 'since') if query.get('since') else until - timedelta(days=LOOKBACK_DAYS)
+    if since > until:
+        raise ValueError('since must not be later than until')
+    if until - since > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f'Time range must not exceed {MAX_RANGE_DAYS} days')
+
+    return {'limit': limit, 'terms': terms, 'since': since, 'until': until, 'before': None}
+
+def search_buckets(terms: List[str], newest: datetime, oldest: datetime, limit: int,
+                   before: Optional[str] = None) -> List[str]:
+    """
+    Find the newest entries holding every term by walking time buckets.
+
+    Args:
+        terms: Tokens every match must hold
+        newest: Most recent timestamp to include
+        oldest: Earliest timestamp to include
+        limit: Maximum number of matches to return
+        before: Posting sort key of the last match of the previous page;
+            only older matches are returned
+
+    Returns:
+        Up to `limit` posting sort keys ("<datetime>#<id>"), newest first
+    """
+    client = clients.dynamodb()
+    bound = before or search.upper_bound(newest.isoformat())
+    lower = oldest.isoformat()
+    matches: List[str] = []
+    queries = 0
+
+    for bucket in keys.buckets_newest_first(newest, oldest):
+        remaining = limit - len(matches)
+
+        def intersect(partition: str) -> Tuple[List[str], int]:
+            streams = [search.PostingStream(client, SEARCH_TABLE_NAME, search.posting_key(term, partition), lower)
+                       for term in terms]
+            found = list(search.intersect(streams, bound, remaining, inclusive=before is None))
+            return found, sum(stream.queries for stream in streams)
+
+        partitions = keys.shard_keys(bucket, SHARD_COUNT)
+        with ThreadPoolExecutor(max_workers=min(QUERY_WORKERS, len(partitions))) as executor:
+            results = list(executor.map(intersect, partitions))
+        queries += sum(count for _, count in results)
+        matches.extend(islice(heapq.merge(*(found for found, _ in results), reverse=True), remaining))
+
+        if len(matches) >= limit:
+            break
+
+    metrics.count('posting_queries', queries)
+    return matches[:limit]
+
+def fetch_entries(positions: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read matched entries with BatchGetItem, in match order.
+
+    Entries missing from the table (deleted after they were indexed) are
+    left out.
+    """
+    client = clients.dynamodb()
+    entry_keys = [search.parse_sort_key(position) for position in positions]
+    found: Dict[str, Dict[str, Any]] = {}
+
+    for offset in range(0, len(entry_keys), keys.BATCH_GET_SIZE):
+        request = {TABLE_NAME: {
+            'Keys': [{'id': {'S': entry_id}, 'datetime': {'S': datetime_value}}
+                     for datetime_value, entry_id in entry_keys[offset:offset + keys.BATCH_GET_SIZE]],
+            'ProjectionExpression': codec.PROJECTION_EXPRESSION,
+            'ExpressionAttributeNames': codec.PROJECTION_NAMES
+        }}
+        while request:
+            response = client.batch_get_item(RequestItems=request, ReturnConsumedCapacity='TOTAL')
+            metrics.record_capacity(response, 'consumed_rcu')
+            for item in response.get('Responses', {}).get(TABLE_NAME, []):
+                found[item['id']['S']] = item
+            request = response.get('UnprocessedKeys') or None
+
+    items = [found[entry_id] for _, entry_id in entry_keys if entry_id in found]
+    return render.decode_items(items, template_store, clients.dynamodb(), VIEWS_TABLE_NAME)
+
+def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a standardized API response."""
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS'
+    }
+    with metrics.stage('serialize'):
+        encoded = render.dumps(body)
+    metrics.count('response_bytes', len(encoded), 'Bytes')
+    metrics.set_property('status_code', status_code)
+    return {
+        'statusCode': status_code,
+        'headers': headers,
+        'body': encoded
+    }
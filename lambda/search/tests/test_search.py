@@ -0,0 +1,133 @@
+import json
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from moto import mock_dynamodb2
+import boto3
+import sys
+
+# Mock environment variables for table names
+os.environ.setdefault('TABLE_NAME', 'test-log-entries')
+os.environ.setdefault('SEARCH_TABLE_NAME', 'test-log-search')
+
+# Ensure index.py and the shared layer can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'common', 'python')))
+from index import lambda_handler
+from log_common import codec, keys, search
+
+NEWEST = datetime(2026, 1, 29, 12, 0, tzinfo=timezone.utc)
+
+
+class TestSearchLambda(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_dynamodb = mock_dynamodb2()
+        cls.mock_dynamodb.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_dynamodb.stop()
+
+    def setUp(self):
+        self.client = boto3.client('dynamodb', region_name='us-east-1')
+        self.client.create_table(
+            TableName=os.environ['TABLE_NAME'],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"},
+                       {"AttributeName": "datetime", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"},
+                                  {"AttributeName": "datetime", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(self.client.delete_table, TableName=os.environ['TABLE_NAME'])
+        self.client.create_table(
+            TableName=os.environ['SEARCH_TABLE_NAME'],
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"},
+                       {"AttributeName": "sk", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"},
+                                  {"AttributeName": "sk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(self.client.delete_table, TableName=os.environ['SEARCH_TABLE_NAME'])
+
+    def store(self, number, message, age, shard=0):
+        """Store and index an entry as ingest does."""
+        timestamp = NEWEST - age
+        partition = keys.shard_key(keys.bucket_for(timestamp), shard)
+        entry = {
+            'id': f'entry-{number}',
+            'datetime': timestamp.isoformat(),
+            keys.BUCKET_ATTRIBUTE: partition,
+            keys.SEVERITY_BUCKET_ATTRIBUTE: keys.severity_key('error', partition),
+            'severity': 'error',
+            'message': message
+        }
+        self.client.put_item(TableName=os.environ['TABLE_NAME'], Item=codec.encode(entry))
+        for posting in search.postings(entry):
+            self.client.put_item(TableName=os.environ['SEARCH_TABLE_NAME'], Item=posting)
+
+    def search(self, **query):
+        query.setdefault('until', NEWEST.isoformat())
+        response = lambda_handler({'queryStringParameters': query}, None)
+        return response['statusCode'], json.loads(response['body'])
+
+    @patch('index.SHARD_COUNT', 2)
+    def test_all_terms_match_newest_first_across_buckets_and_shards(self):
+        """Test that entries holding every term are returned newest first."""
+        self.store(1, 'Payment timeout for order 17', timedelta(minutes=5), shard=1)
+        self.store(2, 'Payment succeeded', timedelta(minutes=6))
+        self.store(3, 'Timeout talking to payment gateway', timedelta(days=1), shard=0)
+        self.store(4, 'Gateway timeout', timedelta(days=2))
+
+        status, body = self.search(q='TIMEOUT payment')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['terms'], ['timeout', 'payment'])
+        self.assertEqual([entry['id'] for entry in body['logs']], ['entry-1', 'entry-3'])
+        self.assertEqual(body['logs'][0]['message'], 'Payment timeout for order 17')
+        self.assertNotIn('next_cursor', body)
+
+    def test_pages_follow_cursor(self):
+        """Test that next_cursor resumes after the last match without repeating it."""
+        for number in range(5):
+            self.store(number, f'Disk full on node {number}', timedelta(hours=number))
+
+        status, first = self.search(q='disk full', limit='2')
+        self.assertEqual([entry['id'] for entry in first['logs']], ['entry-0', 'entry-1'])
+        status, second = self.search(cursor=first['next_cursor'], limit='2')
+        status, third = self.search(cursor=second['next_cursor'], limit='2')
+
+        self.assertEqual([entry['id'] for entry in second['logs']], ['entry-2', 'entry-3'])
+        self.assertEqual([entry['id'] for entry in third['logs']], ['entry-4'])
+        self.assertNotIn('next_cursor', third)
+
+    def test_since_bounds_results(self):
+        """Test that matches older than since are not returned."""
+        self.store(1, 'Quota exceeded', timedelta(hours=1))
+        self.store(2, 'Quota exceeded', timedelta(hours=3))
+
+        status, body = self.search(q='quota', since=(NEWEST - timedelta(hours=2)).isoformat())
+
+        self.assertEqual([entry['id'] for entry in body['logs']], ['entry-1'])
+
+    def test_invalid_queries_rejected(self):
+        """Test that queries without searchable terms or with bad cursors are rejected."""
+        self.assertEqual(self.search(q='a of')[0], 400)
+        self.assertEqual(self.search()[0], 400)
+        self.assertEqual(self.search(q=' '.join(f'term{i}' for i in range(9)))[0], 400)
+        self.assertEqual(self.search(cursor='tampered')[0], 400)
+
+    @patch('builtins.print')
+    def test_throttling_returns_429(self, _):
+        """Test that every DynamoDB throttling error code maps to 429, not 500."""
+        throttled = ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'Query')
+        with patch('index.clients.dynamodb') as dynamodb:
+            dynamodb.return_value.query.side_effect = throttled
+            self.assertEqual(self.search(q='disk')[0], 429)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+from botocore.exceptions import ClientError
+from log_common import clients, metrics, params, render, retry, rollups
+
+# Views table holding the rollups maintained by ingest
+VIEWS_TABLE_NAME = os.environ['VIEWS_TABLE_NAME']
+
+# Number of write shards per rollup; must match ingest's SHARD_COUNT
+SHARD_COUNT = max(1, int(os.environ.get('SHARD_COUNT', '1')))
+
+# Default time window, and the most points one request may ask for: a day
+# of minutes, counting the periods at both ends
+DEFAULT_RANGE = timedelta(hours=24)
+MAX_POINTS = 1441
+
+DEFAULT_RESOLUTION = 'hour'
+
+# Valid severity levels
+VALID_SEVERITIES = frozenset(rollups.SEVERITIES)
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for time-bucketed entry counts.
+
+    Counts come from the per-minute, hour and day rollups that ingest keeps
+    in the views table (log_common.rollups): one small item per period,
+    fetched with BatchGetItem, instead of reading the entries.
+
+    Query string parameters (all optional):
+        resolution: minute|hour|day (default hour)
+        since: ISO 8601 start of the range (default 24 hours before until)
+        until: ISO 8601 end of the range (default now)
+        severity: Only count these severities (comma-separated)
+
+    Minute rollups are kept for 7 days and hour rollups for 400 days.
+
+    Returns:
+    {
+        "statusCode": 200|400|429|500,
+        "body": {"resolution", "since", "until", "points": [{"period",
+            <severity>: count, ..., "total"}], "totals": {...}}
+    }
+    """
+    metrics.start('stats')
+    if context is not None:
+        metrics.set_property('request_id', getattr(context, 'aws_request_id', None))
+    try:
+        try:
+            with metrics.stage('parse'):
+                params = parse_query_params(event)
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+
+        with metrics.stage('dynamodb'):
+            points = rollups.read(clients.dynamodb(), VIEWS_TABLE_NAME, params['resolution'],
+                                  params['since'], params['until'], SHARD_COUNT)
+        metrics.set_property('resolution', params['resolution'])
+        metrics.count('items', len(points))
+
+        severities = params['severities']
+        totals = dict.fromkeys(severities, 0)
+        for point in points:
+            for severity in rollups.SEVERITIES:
+                if severity in totals:
+                    totals[severity] += point[severity]
+                else:
+                    del point[severity]
+            point['total'] = sum(point[severity] for severity in severities)
+        totals['total'] = sum(totals[severity] for severity in severities)
+
+        return create_response(200, {
+            'resolution': params['resolution'],
+            'since': params['since'].isoformat(),
+            'until': params['until'].isoformat(),
+            'points': points,
+            'totals': totals
+        })
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+
+        if retry.is_throttle(e):
+            print(f"Throughput exceeded: {error_message}")
+            return create_response(429, {'error': 'Rate limit exceeded, please retry'})
+        elif error_code == 'ResourceNotFoundException':
+            print(f"Table not found: {error_message}")
+            return create_response(500, {'error': 'Database table not found'})
+        else:
+            print(f"DynamoDB error: {error_code} - {error_message}")
+            return create_response(500, {'error': 'Failed to retrieve log statistics'})
+
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return create_response(500, {'error': 'Internal server error'})
+
+    finally:
+        metrics.emit()
+
+def parse_query_params(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate the query string of a stats request.
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    query = event.get('queryStringParameters') or {}
+
+    resolution = query.get('resolution') or DEFAULT_RESOLUTION
+    if resolution not in rollups.RESOLUTIONS:
+        raise ValueError(f'Invalid resolution. Must be one of: {", ".join(rollups.RESOLUTIONS)}')
+
+    until = params.parse_timestamp(query['until'], 'until') if query.get('until') else datetime.now(timezone.utc)
+    since = params.parse_timestamp(query['since'], 'since') if query.get('since') else until - DEFAULT_RANGE
+    if since > until:
+        raise ValueError('since must not be later than until')
+    if count_points(since, until, resolution) > MAX_POINTS:
+        raise ValueError(f'Time range must not exceed {MAX_POINTS} periods; use a coarser resolution')
+
+    severities: List[str] = list(rollups.SEVERITIES)
+    if query.get('severity'):
+        requested = {value.strip().lower() for value in query['severity'].split(',')}
+        if not requested <= VALID_SEVERITIES:
+            raise ValueError(f'Invalid severity. Must be one of: {", ".join(sorted(VALID_SEVERITIES))}')
+        severities = [severity for severity in rollups.SEVERITIES if severity in requested]
+
+    return {'resolution': resolution, 'since': since, 'until': until, 'severities': severities}
+
+def count_points(since: datetime, until: datetime, resolution: str) -> int:
+    """Number of periods rollups.periods yields from since to until, both ends included."""
+    span = rollups.RESOLUTIONS[resolution][1].total_seconds()
+    return int(until.timestamp() // span) - int(since.timestamp() // span) + 1
+
+def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a standardized API response."""
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS'
+    }
+    with metrics.stage('serialize'):
+        encoded = render.dumps(body)
+    metrics.count('response_bytes', len(encoded), 'Bytes')
+    metrics.set_property('status_code', status_code)
+    return {
+        'statusCode': status_code,
+        'headers': headers,
+        'body': encoded
+    }
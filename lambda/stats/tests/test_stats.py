@@ -0,0 +1,128 @@
+import json
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from moto import mock_dynamodb2
+import boto3
+import sys
+
+# Mock environment variable for table name
+os.environ.setdefault('VIEWS_TABLE_NAME', 'test-log-views')
+
+# Ensure index.py and the shared layer can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'common', 'python')))
+from index import lambda_handler
+from log_common import rollups
+
+
+def entry(timestamp, severity):
+    return {'datetime': timestamp, 'severity': severity}
+
+
+class TestStatsLambda(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_dynamodb = mock_dynamodb2()
+        cls.mock_dynamodb.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_dynamodb.stop()
+
+    def setUp(self):
+        self.client = boto3.client('dynamodb', region_name='us-east-1')
+        self.client.create_table(
+            TableName=os.environ['VIEWS_TABLE_NAME'],
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        self.addCleanup(self.client.delete_table, TableName=os.environ['VIEWS_TABLE_NAME'])
+
+        entries = [entry('2026-01-29T08:30:05+00:00', 'error')] * 3 + [
+            entry('2026-01-29T08:31:10+00:00', 'info'),
+            entry('2026-01-29T09:02:00+00:00', 'warning'),
+        ]
+        for shard, chunk in enumerate((entries[:2], entries[2:])):
+            for (resolution, period), severities in rollups.tally(chunk).items():
+                rollups.add(self.client, os.environ['VIEWS_TABLE_NAME'], resolution, period, severities, shard)
+
+    def stats(self, **query):
+        response = lambda_handler({'queryStringParameters': query}, None)
+        return response['statusCode'], json.loads(response['body'])
+
+    @patch('index.SHARD_COUNT', 2)
+    def test_counts_per_minute_summed_over_shards(self):
+        """Test that minute points cover the range, including empty periods, across write shards."""
+        status, body = self.stats(resolution='minute', since='2026-01-29T08:29:00Z', until='2026-01-29T08:31:30Z')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['points'], [
+            {'period': '2026-01-29T08:29', 'info': 0, 'warning': 0, 'error': 0, 'total': 0},
+            {'period': '2026-01-29T08:30', 'info': 0, 'warning': 0, 'error': 3, 'total': 3},
+            {'period': '2026-01-29T08:31', 'info': 1, 'warning': 0, 'error': 0, 'total': 1},
+        ])
+        self.assertEqual(body['totals'], {'info': 1, 'warning': 0, 'error': 3, 'total': 4})
+
+    @patch('index.SHARD_COUNT', 2)
+    def test_hourly_counts_filtered_by_severity(self):
+        """Test that a severity filter drops the other severities from points and totals."""
+        status, body = self.stats(resolution='hour', severity='error,warning',
+                                  since='2026-01-29T08:00:00Z', until='2026-01-29T09:59:59Z')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['points'], [
+            {'period': '2026-01-29T08', 'warning': 0, 'error': 3, 'total': 3},
+            {'period': '2026-01-29T09', 'warning': 1, 'error': 0, 'total': 1},
+        ])
+
+    def test_rollups_expire_by_resolution(self):
+        """Test that minute rollups carry a TTL and day rollups are kept."""
+        items = {item['pk']['S']: item for item in self.client.scan(TableName=os.environ['VIEWS_TABLE_NAME'])['Items']}
+        minute = items['stats#minute#2026-01-29T08:30']
+        expected = datetime(2026, 2, 5, 8, 31, tzinfo=timezone.utc).timestamp()
+        self.assertEqual(int(minute['expires_at']['N']), expected)
+        self.assertNotIn('expires_at', items['stats#day#2026-01-29'])
+
+    def test_invalid_parameters(self):
+        """Test that bad resolutions, severities and oversized ranges are rejected."""
+        self.assertEqual(self.stats(resolution='second')[0], 400)
+        self.assertEqual(self.stats(severity='debug')[0], 400)
+        self.assertEqual(self.stats(since='yesterday')[0], 400)
+        self.assertEqual(self.stats(resolution='minute', since='2026-01-01T00:00:00Z',
+                                    until='2026-01-29T00:00:00Z')[0], 400)
+
+    def test_default_range_is_last_24_hours(self):
+        """Test that without parameters the last 24 hours are returned hourly."""
+        status, body = self.stats()
+        self.assertEqual(status, 200)
+        self.assertEqual(body['resolution'], 'hour')
+        self.assertEqual(len(body['points']), 25)
+
+
+    def test_minute_resolution_over_default_range(self):
+        """Test that errors per minute over the last day are allowed, with both ends included."""
+        status, body = self.stats(resolution='minute', severity='error')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body['points']), 1441)
+
+        status, _ = self.stats(resolution='minute', since='2026-01-28T08:30:00Z', until='2026-01-29T08:30:59Z')
+        self.assertEqual(status, 200)
+        status, _ = self.stats(resolution='minute', since='2026-01-28T08:29:59Z', until='2026-01-29T08:30:00Z')
+        self.assertEqual(status, 400)
+
+    @patch('builtins.print')
+    def test_throttling_returns_429(self, _):
+        """Test that every DynamoDB throttling error code maps to 429, not 500."""
+        throttled = ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'BatchGetItem')
+        with patch('index.clients.dynamodb') as dynamodb:
+            dynamodb.return_value.batch_get_item.side_effect = throttled
+            self.assertEqual(self.stats()[0], 429)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import random
+import time
+from typing import Dict, Any, List
+from botocore.exceptions import ClientError
+from log_common import clients, codec, snapshot, templates
+
+# Views table holding the snapshot item and message templates
+VIEWS_TABLE_NAME = os.environ['VIEWS_TABLE_NAME']
+
+# Number of entries kept in the snapshot
+SNAPSHOT_SIZE = int(os.environ.get('SNAPSHOT_SIZE', '100'))
+
+# Message templates of entries stored as template id plus parameters
+template_store = templates.TemplateStore()
+
+# Optimistic concurrency retries when several stream shards race
+MAX_UPDATE_ATTEMPTS = 8
+CONFLICT_BACKOFF_MAX = 0.2  # seconds
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    DynamoDB Streams consumer that maintains the "latest N" snapshot.
+
+    Merges the entries inserted in this batch of stream records into the
+    snapshot item in the views table. Updates use a version attribute as
+    an optimistic lock, so concurrent invocations for different stream
+    shards never overwrite each other. Raising lets Lambda retry the batch.
+
+    Returns:
+    {
+        "updated": true|false,
+        "entries": number of new entries in the batch
+    }
+    """
+    new_entries = extract_inserted_entries(event.get('Records', []))
+    if not new_entries:
+        return {'updated': False, 'entries': 0}
+
+    for attempt in range(MAX_UPDATE_ATTEMPTS):
+        current = clients.dynamodb().get_item(
+            TableName=VIEWS_TABLE_NAME,
+            Key={'pk': {'S': snapshot.SNAPSHOT_KEY}},
+            ConsistentRead=True
+        ).get('Item')
+        version = int(current['version']['N']) if current else 0
+        existing = snapshot.decode(current['entries']['B']) if current else []
+
+        entries = snapshot.merge(existing, new_entries, SNAPSHOT_SIZE)
+        if current and entries == existing:
+            # Every new entry is older than the snapshot already holds
+            return {'updated': False, 'entries': len(new_entries)}
+
+        blob, entries = snapshot.encode(entries)
+        try:
+            clients.dynamodb().put_item(
+                TableName=VIEWS_TABLE_NAME,
+                Item={
+                    'pk': {'S': snapshot.SNAPSHOT_KEY},
+                    'entries': {'B': blob},
+                    'count': {'N': str(len(entries))},
+                    'newest': {'S': entries[0]['datetime']},
+                    'version': {'N': str(version + 1)},
+                    'updated_at': {'N': str(int(time.time() * 1000))}
+                },
+                ConditionExpression='attribute_not_exists(#version) OR #version = :version',
+                ExpressionAttributeNames={'#version': 'version'},
+                ExpressionAttributeValues={':version': {'N': str(version)}}
+            )
+            return {'updated': True, 'entries': len(new_entries)}
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # Another invocation updated the snapshot first; re-read and merge again
+            time.sleep(random.uniform(0, CONFLICT_BACKOFF_MAX))
+
+    raise RuntimeError(f'Snapshot update conflicted {MAX_UPDATE_ATTEMPTS} times')
+
+def extract_inserted_entries(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Decode the new images of INSERT stream records into public entries.
+
+    MODIFY records of collapsed entries (ingest dedup mode) are included
+    too, so the snapshot shows their latest count. Entries stored as a
+    message template are re-rendered; templates are fetched from the
+    views table the first time they are seen.
+    """
+    images = []
+    for record in records:
+        image = record.get('dynamodb', {}).get('NewImage')
+        if not image:
+            continue
+        event_name = record.get('eventName')
+        if event_name == 'INSERT' or (event_name == 'MODIFY' and 'count' in image):
+            images.append(image)
+
+    identifiers = codec.template_ids(images)
+    if identifiers:
+        template_store.load(clients.dynamodb(), VIEWS_TABLE_NAME, identifiers)
+    return [codec.decode(image, template_store) for image in images]
@@ -0,0 +1,158 @@
+import base64
+import os
+import unittest
+from unittest.mock import patch
+from moto import mock_dynamodb2
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+import sys
+
+# Mock environment variable for table name
+os.environ.setdefault('VIEWS_TABLE_NAME', 'test-log-views')
+
+# Ensure index.py and the shared layer can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'common', 'python')))
+from index import lambda_handler
+from log_common import clients, codec, snapshot
+
+serializer = TypeSerializer()
+
+
+def stream_event(entries, event_name='INSERT'):
+    """Build a DynamoDB Streams event with NEW_IMAGE records."""
+    return {'Records': [
+        {
+            'eventName': event_name,
+            'dynamodb': {'NewImage': {k: serializer.serialize(v) for k, v in entry.items()}}
+        }
+        for entry in entries
+    ]}
+
+
+def make_entry(i):
+    return {
+        'id': f'test-id-{i}',
+        'datetime': f'2026-01-29T10:{i // 60:02d}:{i % 60:02d}+00:00',
+        'bucket': '2026-01-29',
+        'severity': 'info',
+        'message': f'Test message {i}'
+    }
+
+
+class TestUpdateSnapshotLambda(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Start moto DynamoDB mock
+        cls.mock_dynamodb = mock_dynamodb2()
+        cls.mock_dynamodb.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        # Stop moto mock after all tests
+        cls.mock_dynamodb.stop()
+
+    def setUp(self):
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        self.table = dynamodb.create_table(
+            TableName=os.environ['VIEWS_TABLE_NAME'],
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+
+    def tearDown(self):
+        self.table.delete()
+
+    def read_snapshot(self):
+        item = self.table.get_item(Key={'pk': snapshot.SNAPSHOT_KEY})['Item']
+        return item, snapshot.decode(item['entries'].value)
+
+    def test_builds_snapshot_from_inserts(self):
+        """Test that inserted entries are stored newest first."""
+        result = lambda_handler(stream_event([make_entry(i) for i in range(5)]), None)
+        self.assertTrue(result['updated'])
+
+        item, entries = self.read_snapshot()
+        self.assertEqual([e['id'] for e in entries], [f'test-id-{i}' for i in range(4, -1, -1)])
+        self.assertEqual(item['count'], 5)
+        self.assertEqual(item['version'], 1)
+        self.assertNotIn('bucket', entries[0])
+
+    @patch('index.SNAPSHOT_SIZE', 100)
+    def test_snapshot_is_bounded(self):
+        """Test that the snapshot keeps only the newest N entries across batches."""
+        lambda_handler(stream_event([make_entry(i) for i in range(80)]), None)
+        lambda_handler(stream_event([make_entry(i) for i in range(80, 150)]), None)
+
+        item, entries = self.read_snapshot()
+        self.assertEqual(len(entries), 100)
+        self.assertEqual(entries[0]['id'], 'test-id-149')
+        self.assertEqual(entries[-1]['id'], 'test-id-50')
+        self.assertEqual(item['version'], 2)
+
+    def test_decodes_compact_rows(self):
+        """Test that version 2 stream images, compressed or not, are decoded."""
+        entries = [make_entry(i) for i in range(2)]
+        entries[1]['message'] = 'Long message ' * 200
+        records = []
+        for entry in entries:
+            image = codec.encode({**entry, 'severity_bucket': f"info#{entry['bucket']}"}, version=2)
+            if 'mz' in image:
+                # Lambda delivers Binary attributes base64-encoded
+                image['mz'] = {'B': base64.b64encode(image['mz']['B']).decode('ascii')}
+            records.append({'eventName': 'INSERT', 'dynamodb': {'NewImage': image}})
+
+        lambda_handler({'Records': records}, None)
+
+        _, snapshot_entries = self.read_snapshot()
+        self.assertEqual(snapshot_entries, [
+            {field: entry[field] for field in ('id', 'datetime', 'severity', 'message')}
+            for entry in reversed(entries)
+        ])
+
+    def test_ignores_non_insert_records(self):
+        """Test that MODIFY records of ordinary entries do not touch the snapshot."""
+        result = lambda_handler(stream_event([make_entry(1)], event_name='MODIFY'), None)
+        self.assertFalse(result['updated'])
+        self.assertNotIn('Item', self.table.get_item(Key={'pk': snapshot.SNAPSHOT_KEY}))
+
+    def test_collapsed_entry_counts_updated(self):
+        """Test that MODIFY records of collapsed entries refresh their count."""
+        collapsed = {**make_entry(1), 'count': 1, 'last_seen': '2026-01-29T10:00:01+00:00'}
+        lambda_handler(stream_event([collapsed]), None)
+        result = lambda_handler(stream_event([{**collapsed, 'count': 40, 'last_seen': '2026-01-29T10:00:31+00:00'}],
+                                             event_name='MODIFY'), None)
+
+        self.assertTrue(result['updated'])
+        _, entries = self.read_snapshot()
+        self.assertEqual((entries[0]['count'], entries[0]['last_seen']), (40, '2026-01-29T10:00:31+00:00'))
+
+    @patch('index.time.sleep')
+    def test_retries_on_version_conflict(self, mock_sleep):
+        """Test that a concurrent update is merged instead of overwritten."""
+        lambda_handler(stream_event([make_entry(1)]), None)
+        client = clients.dynamodb()
+        real_put = client.put_item
+
+        def racing_put(**kwargs):
+            if not racing_put.raced:
+                # Simulate another shard's invocation winning the race
+                racing_put.raced = True
+                blob, _ = snapshot.encode(snapshot.merge(self.read_snapshot()[1], [make_entry(2)], 100))
+                self.table.put_item(Item={'pk': snapshot.SNAPSHOT_KEY, 'entries': blob, 'version': 2})
+            return real_put(**kwargs)
+        racing_put.raced = False
+
+        with patch.object(client, 'put_item', side_effect=racing_put):
+            lambda_handler(stream_event([make_entry(3)]), None)
+
+        item, entries = self.read_snapshot()
+        self.assertEqual([e['id'] for e in entries], ['test-id-3', 'test-id-2', 'test-id-1'])
+        self.assertEqual(item['version'], 3)
+        mock_sleep.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the ingest and read_recent Lambda handlers.
+
+Runs both lambda_handler functions in-process, warm, against the
+in-memory DynamoDB stand-in in local_dynamodb.py. No AWS account,
+credentials or network are used. The entries table is preloaded with
+--sizes entries spread over the read lookback window, in the shape ingest
+writes them (storage codec version 2, bucket and severity GSIs, --shards
+write shards).
+
+Scenarios, for every table size:
+
+- ingest_batch_<n>: POST of one entry (n = 1, PutItem) or a batch of n
+  entries (BatchWriteItem), for every --batch-sizes value
+- read_recent: first page of 100, unfiltered
+- read_recent_limit_1000: first page of 1000
+- read_recent_severity: first page of errors only (severity index)
+- read_recent_page_2: the page after the first one (cursor)
+- read_recent_cached: first page again, served from the warm-container cache
+
+For each scenario it records per-invocation latency percentiles, the
+handlers' own stage timings and simulated consumed capacity (from the
+EMF line each invocation logs), and the peak memory allocated per
+invocation (tracemalloc, in a separate pass so tracing does not inflate
+the latencies).
+
+Absolute latencies only compare runs on the same machine. The stand-in
+answers in microseconds, so they measure the handlers' own CPU cost, not
+DynamoDB's. Capacity units are deterministic and compare across machines.
+
+Results are written as JSON with --json. With --baseline, the run is
+compared against an earlier result file. The exit status is 1 when a
+scenario's p50 latency regressed by more than --max-regression percent or
+its capacity units grew. This lets regressions be caught between commits.
+
+Usage:
+    python scripts/handler_benchmark.py --sizes 1000 100000 --json bench.json
+    python scripts/handler_benchmark.py --sizes 1000 10000 100000 1000000 --batch-sizes 1 25 500
+    python scripts/handler_benchmark.py --json new.json --baseline bench.json --max-regression 15
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lambda', 'common', 'python'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TABLE_NAME = 'benchmark-log-entries'
+
+# The handlers read their configuration at import; the views table (snapshot,
+# watermark, rollups, templates) is left out so only the entries table is used
+os.environ.update({
+    'TABLE_NAME': TABLE_NAME,
+    'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+    'SCAN_FALLBACK': 'false',
+})
+os.environ.pop('VIEWS_TABLE_NAME', None)
+os.environ.pop('WRITE_QUEUE_URL', None)
+os.environ.pop('SEARCH_TABLE_NAME', None)
+
+from log_common import clients, metrics  # noqa: E402
+from local_dynamodb import SEVERITY_CYCLE, entries_table, message  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_BATCH_SIZES = [1, 25, 100, 500]
+
+
+def load_handler(name: str):
+    """Import lambda/<name>/index.py under a unique module name."""
+    path = os.path.join(REPO_ROOT, 'lambda', name, 'index.py')
+    spec = importlib.util.spec_from_file_location(f'{name}_index', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        'p50': round(at(0.50), 3),
+        'p90': round(at(0.90), 3),
+        'p99': round(at(0.99), 3),
+        'max': round(ordered[-1], 3),
+        'mean': round(statistics.fmean(ordered), 3),
+    }
+
+
+class Runner:
+    """Invokes one handler and collects what each invocation logged."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.lines = []
+
+    @contextlib.contextmanager
+    def capturing(self):
+        """Collect EMF lines and silence the handler's other output."""
+        with patch.object(metrics, 'print', self.lines.append, create=True), \
+                contextlib.redirect_stdout(io.StringIO()):
+            yield
+
+    def invoke(self, event: dict) -> dict:
+        with self.capturing():
+            return self.handler(event, None)
+
+    def run(self, make_event, invocations: int, warmup: int, alloc_invocations: int) -> dict:
+        with self.capturing():
+            return self._run(make_event, invocations, warmup, alloc_invocations)
+
+    def _run(self, make_event, invocations: int, warmup: int, alloc_invocations: int) -> dict:
+        for _ in range(warmup):
+            self.handler(make_event(), None)
+        self.lines.clear()
+
+        latencies, statuses = [], {}
+        for _ in range(invocations):
+            event = make_event()
+            started = time.perf_counter()
+            response = self.handler(event, None)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response['statusCode']] = statuses.get(response['statusCode'], 0) + 1
+        documents = [json.loads(line) for line in self.lines]
+
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(alloc_invocations):
+                event = make_event()
+                baseline = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                self.handler(event, None)
+                peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+        finally:
+            tracemalloc.stop()
+
+        stages = {}
+        for document in documents:
+            for name, value in document.items():
+                if name.endswith('_ms') and name != 'total_ms':
+                    stages.setdefault(name, []).append(value)
+
+        def mean_of(name):
+            return round(statistics.fmean(document.get(name, 0) for document in documents), 3)
+
+        return {
+            'invocations': invocations,
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            'latency_ms': percentiles(latencies),
+            'stages_ms': {name: round(statistics.median(values), 3) for name, values in sorted(stages.items())},
+            'capacity': {'rcu': mean_of('consumed_rcu'), 'wcu': mean_of('consumed_wcu')},
+            'items': mean_of('items'),
+            'alloc_peak_kb': round(statistics.median(peaks), 1) if peaks else None,
+        }
+
+
+def ingest_event(batch_size: int, counter: list) -> dict:
+    """Build a POST event of one entry or a batch, with varied messages."""
+    entries = []
+    for _ in range(batch_size):
+        number = counter[0]
+        counter[0] += 1
+        entries.append({'severity': SEVERITY_CYCLE[number % len(SEVERITY_CYCLE)], 'message': message(number)})
+    body = entries[0] if batch_size == 1 else entries
+    return {'body': json.dumps(body), 'requestContext': {'http': {'method': 'POST'}}}
+
+
+def read_event(**query) -> dict:
+    return {'queryStringParameters': {name: str(value) for name, value in query.items()} or None,
+            'headers': {}, 'requestContext': {'http': {'method': 'GET'}}}
+
+
+def benchmark_size(size: int, args, ingest, read_recent) -> list:
+    """Run every scenario against a table preloaded with `size` entries."""
+    newest = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    client = entries_table(TABLE_NAME, size, args.shards, timedelta(days=args.span_days), newest)
+    load_s = time.perf_counter() - started
+    print(f"\n{size:,} entries loaded in {load_s:.1f} s", file=sys.stderr)
+
+    results = []
+
+    def record(scenario, summary, **extra):
+        summary = {'size': size, 'scenario': scenario, **extra, **summary}
+        results.append(summary)
+        latency = summary['latency_ms']
+        print(f"  {scenario:<24} p50 {latency['p50']:8.3f} ms  p99 {latency['p99']:8.3f} ms  "
+              f"rcu {summary['capacity']['rcu']:7.1f}  wcu {summary['capacity']['wcu']:7.1f}  "
+              f"peak {summary['alloc_peak_kb']:8.1f} KB", file=sys.stderr)
+
+    with patch.object(clients, 'dynamodb', lambda: client), \
+            patch.object(ingest, 'SHARD_COUNT', args.shards), \
+            patch.object(read_recent, 'SHARD_COUNT', args.shards):
+        # Reads first, so they see exactly `size` entries
+        runner = Runner(read_recent.lambda_handler)
+        first_page = json.loads(runner.invoke(read_event(limit=100))['body'])
+        read_recent.read_cache.clear()
+        reads = {
+            'read_recent': lambda: read_event(limit=100),
+            'read_recent_limit_1000': lambda: read_event(limit=1000),
+            'read_recent_severity': lambda: read_event(limit=100, severity='error'),
+        }
+        if first_page.get('next_cursor'):
+            reads['read_recent_page_2'] = lambda: read_event(limit=100, cursor=first_page['next_cursor'])
+
+        # Measure the query path; the cached scenario turns the cache back on
+        with patch.object(read_recent, 'READ_CACHE_MAX_ENTRIES', 0):
+            for scenario, make_event in reads.items():
+                record(scenario, runner.run(make_event, args.invocations, args.warmup, args.alloc_invocations))
+        read_recent.read_cache.clear()
+        with patch.object(read_recent, 'READ_CACHE_TTL_SECONDS', 3600.0):
+            record('read_recent_cached', runner.run(lambda: read_event(limit=100), args.invocations,
+                                                    args.warmup, args.alloc_invocations))
+        read_recent.read_cache.clear()
+
+        runner = Runner(ingest.lambda_handler)
+        counter = [0]
+        for batch_size in args.batch_sizes:
+            invocations = max(args.min_invocations, min(args.invocations, args.max_entries // batch_size))
+            summary = runner.run(lambda: ingest_event(batch_size, counter), invocations,
+                                 args.warmup, args.alloc_invocations)
+            summary['per_entry_us'] = round(summary['latency_ms']['p50'] * 1000 / batch_size, 2)
+            record(f'ingest_batch_{batch_size}', summary, batch_size=batch_size)
+
+    for result in results:
+        result['load_s'] = round(load_s, 2)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list, baseline_path: str, max_regression: float) -> bool:
+    """Print changes against a baseline run; returns True if anything regressed."""
+    with open(baseline_path) as source:
+        baseline = {(result['size'], result['scenario']): result for result in json.load(source)['results']}
+
+    regressed = False
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result['size'], result['scenario']))
+        if before is None:
+            continue
+        old, new = before['latency_ms']['p50'], result['latency_ms']['p50']
+        change = (new - old) / old * 100 if old else 0.0
+        flags = []
+        if change > max_regression:
+            flags.append('LATENCY')
+        for unit in ('rcu', 'wcu'):
+            if result['capacity'][unit] > before['capacity'][unit] + 1e-9:
+                flags.append(unit.upper())
+        regressed = regressed or bool(flags)
+        print(f"  {result['size']:>9,} {result['scenario']:<24} p50 {old:8.3f} -> {new:8.3f} ms "
+              f"({change:+6.1f}%)  {' '.join(flags)}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Lambda handlers against an in-memory table')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Preloaded table sizes (default: 1000 10000 100000 1000000)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES,
+                        help='Ingest batch sizes; 1 posts a single entry (default: 1 25 100 500)')
+    parser.add_argument('--shards', type=int, default=1, help='Write shards per bucket (default: 1)')
+    parser.add_argument('--span-days', type=float, default=30,
+                        help='Days the preloaded entries are spread over (default: 30, the read lookback)')
+    parser.add_argument('--invocations', type=int, default=200, help='Timed invocations per scenario (default: 200)')
+    parser.add_argument('--min-invocations', type=int, default=20,
+                        help='Fewest timed invocations of a large ingest batch (default: 20)')
+    parser.add_argument('--max-entries', type=int, default=20000,
+                        help='Entries ingested per batch size at most, before --min-invocations (default: 20000)')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed invocations first (default: 5)')
+    parser.add_argument('--alloc-invocations', type=int, default=10,
+                        help='Invocations traced with tracemalloc (default: 10)')
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file')
+    parser.add_argument('--baseline', help='Compare with the results of an earlier run')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='Allowed p50 latency increase against the baseline, in percent (default: 20)')
+
+    args = parser.parse_args()
+    args.batch_sizes = [size for size in args.batch_sizes if 1 <= size]
+
+    ingest = load_handler('ingest')
+    read_recent = load_handler('read_recent')
+
+    results = []
+    for size in args.sizes:
+        results.extend(benchmark_size(size, args, ingest, read_recent))
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {name: value for name, value in vars(args).items()
+                   if name not in ('json_path', 'baseline', 'max_regression')},
+        'results': results,
+    }
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    failed = any(set(result['statuses']) != {'200'} for result in results)
+    if failed:
+        print('\nFAIL: some invocations did not return 200', file=sys.stderr)
+    if args.baseline and compare(results, args.baseline, args.max_regression):
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
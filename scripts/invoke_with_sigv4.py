@@ -6,14 +6,37 @@ This script uses temporary IAM credentials to authenticate requests.
 """
 
 import argparse
+import io
 import json
+import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import urlencode, quote
 import boto3
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'client'))
+from simple_log_client import LogServiceClient
+
+# Largest batch the ingest function accepts, and a cap on request size
+# well below the 6 MB Function URL payload limit
+SHIP_BATCH_SIZE = 500
+SHIP_MAX_BATCH_BYTES = 1024 * 1024
+
+# Level names used by common loggers, mapped to the service's severities
+SEVERITY_ALIASES = {
+    'info': 'info', 'information': 'info', 'notice': 'info', 'debug': 'info', 'trace': 'info',
+    'warning': 'warning', 'warn': 'warning',
+    'error': 'error', 'err': 'error', 'critical': 'error', 'crit': 'error', 'fatal': 'error',
+    'alert': 'error', 'emergency': 'error', 'emerg': 'error'
+}
+
 def get_function_url(function_name: str) -> str:
     """Retrieve Lambda function URL from AWS."""
     lambda_client = boto3.client('lambda')
@@ -24,9 +47,14 @@ def get_function_url(function_name: str) -> str:
         print(f"Error retrieving function URL: {e}")
         sys.exit(1)
 
+@lru_cache(maxsize=None)
+def aws_session() -> boto3.Session:
+    """Return the process-wide session; credentials are resolved once and refreshed as needed."""
+    return boto3.Session()
+
 def sign_request(method: str, url: str, body: str = None) -> dict:
     """Sign HTTP request using AWS SigV4."""
-    session = boto3.Session()
+    session = aws_session()
     credentials = session.get_credentials()
     region = session.region_name or 'us-east-1'
     
@@ -82,6 +110,309 @@ def read_recent_logs(function_url: str = None):
             print(f"Response: {e.response.text}")
         sys.exit(1)
 
+def read_stats(function_url: str = None, params: dict = None):
+    """Retrieve entry counts per period from the stats function."""
+    if not function_url:
+        function_url = get_function_url('simple-log-service-stats')
+    
+    try:
+        result = fetch_logs(function_url, params or {})
+        print(json.dumps(result, indent=2))
+        return result
+    except requests.exceptions.RequestException as e:
+        print(f"Error reading stats: {e}")
+        if hasattr(e.response, 'text'):
+            print(f"Response: {e.response.text}")
+        sys.exit(1)
+
+def search_logs(function_url: str = None, params: dict = None, limit: int = 100,
+                as_json: bool = False):
+    """Print up to `limit` entries matching every search term, oldest first."""
+    if not function_url:
+        function_url = get_function_url('simple-log-service-search')
+    
+    params = dict(params or {}, limit=min(limit, 1000))
+    entries = []
+    try:
+        while len(entries) < limit:
+            result = fetch_logs(function_url, params)
+            entries.extend(result['logs'])
+            if not result.get('next_cursor'):
+                break
+            params = {'cursor': result['next_cursor'], 'limit': min(limit - len(entries), 1000)}
+    except requests.exceptions.RequestException as e:
+        print(f"Error searching logs: {e}")
+        if hasattr(e.response, 'text'):
+            print(f"Response: {e.response.text}")
+        sys.exit(1)
+    
+    print_entries(entries[:limit], as_json)
+    return entries[:limit]
+
+def fetch_logs(function_url: str, params: dict) -> dict:
+    """Fetch one page of log entries with the given query parameters."""
+    url = function_url
+    if params:
+        url = f"{function_url.rstrip('/')}/?{urlencode(params, quote_via=quote)}"
+    headers = sign_request('GET', url)
+    
+    response = requests.get(url, headers=headers, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_new_logs(function_url: str, watermark: tuple, severity: str = None) -> list:
+    """
+    Fetch every entry newer than the (datetime, id) watermark, newest first.
+    
+    Follows next_cursor until the pages reach the watermark, so each call
+    reads only the entries written since the previous one.
+    """
+    params = {'after': watermark[0], 'after_id': watermark[1], 'limit': 1000}
+    if severity:
+        params['severity'] = severity
+    
+    entries = []
+    while True:
+        result = fetch_logs(function_url, params)
+        entries.extend(result['logs'])
+        if not result.get('next_cursor'):
+            return entries
+        params = {'cursor': result['next_cursor'], 'limit': 1000}
+
+def print_entries(entries: list, as_json: bool = False):
+    """Print entries oldest first, one per line."""
+    for entry in reversed(entries):
+        if as_json:
+            print(json.dumps(entry))
+        else:
+            print(f"{entry['datetime']} {entry['severity'].upper():<7} {entry['message']}")
+    sys.stdout.flush()
+
+def tail_logs(function_url: str = None, lines: int = 10, severity: str = None,
+              follow: bool = False, interval: float = 1.0, max_interval: float = 30.0,
+              as_json: bool = False):
+    """
+    Print the latest entries and optionally follow new ones.
+    
+    While following, polls with the newest entry seen as watermark. The poll
+    interval doubles while nothing new arrives or the service is throttling,
+    up to max_interval, and drops back to interval as soon as entries arrive.
+    """
+    if not function_url:
+        function_url = get_function_url('simple-log-service-read-recent')
+    
+    params = {'limit': lines}
+    if severity:
+        params['severity'] = severity
+    
+    try:
+        entries = fetch_logs(function_url, params)['logs']
+    except requests.exceptions.RequestException as e:
+        print(f"Error reading logs: {e}")
+        if hasattr(e.response, 'text'):
+            print(f"Response: {e.response.text}")
+        sys.exit(1)
+    print_entries(entries, as_json)
+    
+    if not follow:
+        return
+    
+    # Start from now when the log is empty so old entries are not replayed
+    if entries:
+        watermark = (entries[0]['datetime'], entries[0]['id'])
+    else:
+        watermark = (datetime.now(timezone.utc).isoformat(), '')
+    delay = interval
+    
+    try:
+        while True:
+            time.sleep(delay)
+            try:
+                entries = fetch_new_logs(function_url, watermark, severity)
+            except requests.exceptions.RequestException as e:
+                status = getattr(e.response, 'status_code', None)
+                if status is not None and status < 500 and status != 429:
+                    print(f"Error reading logs: {e}", file=sys.stderr)
+                    sys.exit(1)
+                delay = min(delay * 2, max_interval)
+                print(f"Read failed ({e}), retrying in {delay:.0f}s", file=sys.stderr)
+                continue
+            
+            if entries:
+                print_entries(entries, as_json)
+                watermark = (entries[0]['datetime'], entries[0]['id'])
+                delay = interval
+            else:
+                delay = min(delay * 2, max_interval)
+    except KeyboardInterrupt:
+        pass
+
+def parse_line(line: str, input_format: str, severity: str):
+    """
+    Turn one input line into an ingest entry, or None if it cannot be used.
+    
+    NDJSON objects provide "message" (or "msg") and "severity" (or "level");
+    plain text lines become the message with the default severity.
+    """
+    if input_format == 'ndjson' or (input_format == 'auto' and line.lstrip().startswith('{')):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if input_format == 'ndjson':
+                return None
+            return {'severity': severity, 'message': line}
+        if not isinstance(record, dict):
+            return None
+        message = record.get('message', record.get('msg'))
+        if not isinstance(message, str) or not message:
+            return None
+        level = record.get('severity', record.get('level'))
+        level = SEVERITY_ALIASES.get(level.lower(), level) if isinstance(level, str) else severity
+        return {'severity': level, 'message': message}
+    return {'severity': severity, 'message': line}
+
+def read_batches(stream, input_format: str, severity: str, batch_size: int, max_bytes: int, stats: dict):
+    """
+    Read lines lazily and yield batches of NDJSON-encoded entries.
+    
+    A batch closes at batch_size entries or max_bytes of body, so memory
+    use does not depend on the size of the input.
+    """
+    batch, size = [], 0
+    for line in stream:
+        stats['lines'] += 1
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        entry = parse_line(line, input_format, severity)
+        if entry is None:
+            stats['skipped'] += 1
+            continue
+        encoded = json.dumps(entry, ensure_ascii=False)
+        length = len(encoded.encode('utf-8')) + 1
+        if batch and (len(batch) >= batch_size or size + length > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(encoded)
+        size += length
+    if batch:
+        yield batch
+
+class Shipper:
+    """
+    Posts NDJSON batches to the ingest function from a pool of threads.
+    
+    Sending, retries and partial-success handling are LogServiceClient's
+    (client/simple_log_client); each thread keeps its own keep-alive
+    session. Entries the function rejects as invalid are counted, not
+    retried.
+    """
+    
+    def __init__(self, function_url: str, concurrency: int, max_retries: int):
+        session = aws_session()
+        self.client = LogServiceClient(function_url, region=session.region_name,
+                                       credentials=session.get_credentials(), timeout=60,
+                                       max_retries=max_retries)
+        # Bounded, so reading never runs far ahead of sending
+        self.batches = queue.Queue(maxsize=concurrency * 2)
+        self.lock = threading.Lock()
+        self.stats = {'lines': 0, 'skipped': 0, 'sent': 0, 'created': 0, 'rejected': 0,
+                      'failed': 0, 'requests': 0, 'retries': 0, 'bytes': 0}
+        self.fatal = None
+        self.threads = [threading.Thread(target=self.run, daemon=True) for _ in range(concurrency)]
+    
+    def count(self, **increments):
+        with self.lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+    
+    def run(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            try:
+                if self.fatal is None:
+                    self.send(batch)
+                else:
+                    self.count(failed=len(batch))
+            except Exception as e:
+                self.fatal = self.fatal or str(e)
+                self.count(failed=len(batch))
+    
+    def send(self, lines: list):
+        """Send one batch, retrying what can be retried; updates the counters."""
+        self.count(sent=len(lines))
+        self.count(**self.client.send_lines(lines))
+    
+    def progress(self, started: float) -> str:
+        with self.lock:
+            stats = dict(self.stats)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        return (f"{stats['lines']:,} lines, {stats['created']:,} stored "
+                f"({stats['created'] / elapsed:,.0f} entries/s, {stats['requests'] / elapsed:,.1f} req/s, "
+                f"{stats['bytes'] / elapsed / 1e6:.2f} MB/s), {stats['rejected']:,} rejected, "
+                f"{stats['failed']:,} failed, {stats['skipped']:,} skipped, {stats['retries']:,} retries")
+
+def ship_logs(source: str, function_url: str = None, input_format: str = 'auto', severity: str = 'info',
+              batch_size: int = SHIP_BATCH_SIZE, max_bytes: int = SHIP_MAX_BATCH_BYTES,
+              concurrency: int = 8, max_retries: int = 8, progress_interval: float = 2.0):
+    """
+    Stream a log file (or stdin with "-") to the ingest function in batches.
+    
+    Exits with status 1 if any entry was rejected or could not be stored.
+    """
+    if not function_url:
+        function_url = get_function_url('simple-log-service-ingest')
+    # Resolve credentials once, before the sending threads need them
+    if aws_session().get_credentials() is None:
+        print("Error: no AWS credentials found", file=sys.stderr)
+        sys.exit(1)
+    
+    if source == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+    else:
+        stream = open(source, encoding='utf-8', errors='replace')
+    
+    shipper = Shipper(function_url, concurrency, max_retries)
+    started = time.monotonic()
+    done = threading.Event()
+    
+    def report():
+        while not done.wait(progress_interval):
+            print(shipper.progress(started), file=sys.stderr)
+    
+    if progress_interval > 0:
+        threading.Thread(target=report, daemon=True).start()
+    for thread in shipper.threads:
+        thread.start()
+    
+    interrupted = False
+    try:
+        with stream:
+            for batch in read_batches(stream, input_format, severity, batch_size, max_bytes, shipper.stats):
+                if shipper.fatal is not None:
+                    break
+                shipper.batches.put(batch)
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        for _ in shipper.threads:
+            shipper.batches.put(None)
+        for thread in shipper.threads:
+            thread.join()
+        shipper.client.close()
+        done.set()
+    
+    print(shipper.progress(started), file=sys.stderr)
+    if shipper.fatal is not None:
+        print(f"Error shipping logs: {shipper.fatal}", file=sys.stderr)
+    stats = shipper.stats
+    if interrupted:
+        sys.exit(130)
+    if shipper.fatal is not None or stats['rejected'] or stats['failed']:
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(
         description='Invoke Simple Log Service Lambda functions with AWS SigV4 authentication'
@@ -100,6 +431,55 @@ def main():
     read_parser = subparsers.add_parser('read-recent', help='Read recent log entries')
     read_parser.add_argument('--url', help='Function URL (optional, will be retrieved if not provided)')
     
+    # Stats command
+    stats_parser = subparsers.add_parser('stats', help='Show entry counts per minute, hour or day')
+    stats_parser.add_argument('--resolution', choices=['minute', 'hour', 'day'], help='Period length (default: hour)')
+    stats_parser.add_argument('--since', help='ISO 8601 start of the range (default: 24 hours ago)')
+    stats_parser.add_argument('--until', help='ISO 8601 end of the range (default: now)')
+    stats_parser.add_argument('--severity', help='Only count these severities (comma-separated)')
+    stats_parser.add_argument('--url', help='Function URL (optional, will be retrieved if not provided)')
+    
+    # Search command
+    search_parser = subparsers.add_parser('search', help='Find log entries whose message holds every search term')
+    search_parser.add_argument('query', help='Search terms (whole words, case-insensitive)')
+    search_parser.add_argument('-n', '--limit', type=int, default=100, help='Maximum number of entries (default: 100)')
+    search_parser.add_argument('--since', help='ISO 8601 start of the range (default: 30 days ago)')
+    search_parser.add_argument('--until', help='ISO 8601 end of the range (default: now)')
+    search_parser.add_argument('--json', action='store_true', help='Print entries as JSON lines')
+    search_parser.add_argument('--url', help='Function URL (optional, will be retrieved if not provided)')
+    
+    # Ship command
+    ship_parser = subparsers.add_parser('ship', help='Stream a log file or stdin to the ingest function in batches')
+    ship_parser.add_argument('file', nargs='?', default='-', help='NDJSON or plain text log file (default: stdin)')
+    ship_parser.add_argument('--format', choices=['auto', 'ndjson', 'text'], default='auto',
+                             help='Input format; auto treats lines starting with { as JSON (default: auto)')
+    ship_parser.add_argument('--severity', default='info', choices=['info', 'warning', 'error'],
+                             help='Severity of text lines and JSON lines without one (default: info)')
+    ship_parser.add_argument('--batch-size', type=int, default=SHIP_BATCH_SIZE,
+                             help=f'Entries per request, at most {SHIP_BATCH_SIZE} (default: {SHIP_BATCH_SIZE})')
+    ship_parser.add_argument('--max-batch-bytes', type=int, default=SHIP_MAX_BATCH_BYTES,
+                             help=f'Largest request body in bytes (default: {SHIP_MAX_BATCH_BYTES})')
+    ship_parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight (default: 8)')
+    ship_parser.add_argument('--max-retries', type=int, default=8,
+                             help='Retries per batch on throttling or server errors (default: 8)')
+    ship_parser.add_argument('--progress-interval', type=float, default=2.0,
+                             help='Seconds between progress lines on stderr, 0 to disable (default: 2)')
+    ship_parser.add_argument('--url', help='Function URL (optional, will be retrieved if not provided)')
+    
+    # Tail command
+    tail_parser = subparsers.add_parser('tail', help='Print the latest log entries, optionally following new ones')
+    tail_parser.add_argument('-n', '--lines', type=int, default=10,
+                             help='Number of latest entries to print first (default: 10)')
+    tail_parser.add_argument('-f', '--follow', action='store_true',
+                             help='Keep polling and print new entries as they arrive')
+    tail_parser.add_argument('--severity', help='Only show these severities (comma-separated)')
+    tail_parser.add_argument('--interval', type=float, default=1.0,
+                             help='Poll interval in seconds while entries are arriving (default: 1)')
+    tail_parser.add_argument('--max-interval', type=float, default=30.0,
+                             help='Longest poll interval when idle or throttled (default: 30)')
+    tail_parser.add_argument('--json', action='store_true', help='Print entries as JSON lines')
+    tail_parser.add_argument('--url', help='Function URL (optional, will be retrieved if not provided)')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -110,6 +490,22 @@ def main():
         ingest_log(args.severity, args.message, args.url)
     elif args.command == 'read-recent':
         read_recent_logs(args.url)
+    elif args.command == 'stats':
+        params = {name: getattr(args, name) for name in ('resolution', 'since', 'until', 'severity')
+                  if getattr(args, name)}
+        read_stats(args.url, params)
+    elif args.command == 'search':
+        params = {'q': args.query}
+        params.update({name: getattr(args, name) for name in ('since', 'until') if getattr(args, name)})
+        search_logs(args.url, params, args.limit, args.json)
+    elif args.command == 'ship':
+        if not 1 <= args.batch_size <= SHIP_BATCH_SIZE or args.concurrency < 1:
+            parser.error(f'--batch-size must be 1-{SHIP_BATCH_SIZE} and --concurrency at least 1')
+        ship_logs(args.file, args.url, args.format, args.severity, args.batch_size, args.max_batch_bytes,
+                  args.concurrency, args.max_retries, args.progress_interval)
+    elif args.command == 'tail':
+        tail_logs(args.url, args.lines, args.severity, args.follow,
+                  args.interval, args.max_interval, args.json)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+High-throughput Locust profile for the Simple Log Service.
+
+docs/load_tests.py runs closed-loop users: each one waits 1-3 s between
+requests and signs every request on its greenlet, so reaching the
+PERFORMANCE.md throughput targets takes thousands of users, and a slow
+service quietly lowers the offered load (coordinated omission). This
+profile instead offers a fixed load:
+
+- Open-loop arrivals: requests start at --ingest-rate and --read-rate
+  per second in total, with Poisson or evenly spaced inter-arrival times,
+  whether or not earlier requests have completed. Each user schedules
+  its share of the rate (rate / --users) and keeps up to --max-in-flight
+  requests outstanding; arrivals beyond that are counted as "Dropped"
+  failures rather than silently delayed.
+- Workload mix: ingest batch sizes, message sizes and severities, and
+  read page sizes, severity filters and pagination depth, all drawn from
+  configurable weighted distributions ("value:weight,...").
+- Cheap signing: SigV4 headers are cached per (method, URL, body) for
+  SIGNATURE_TTL_SECONDS. Ingest bodies come from a pool of pre-generated
+  bodies per batch size (--body-pool), so steady-state requests reuse a
+  cached signature; only cursor pages, whose URLs are unique, are signed
+  per request.
+- Latency from the intended start: besides Locust's own statistics, every
+  successful request is recorded in an HDR histogram from the moment it
+  was scheduled to start, so queueing in the client or service counts
+  against it. Failed requests (throttling included) are counted
+  separately and do not count towards the achieved throughput.
+  Histograms from distributed workers are merged on the master. With
+  --hdr-dir, each histogram is written as an .hgrm percentile
+  distribution (values in ms), plus summary.json.
+
+At the end, achieved throughput and p99 latency per function are
+compared with the PERFORMANCE.md targets (TARGETS); with
+--check-targets the run exits with status 1 when a target is missed.
+
+The pooled ingest bodies repeat messages. With DEDUP_WINDOW_SECONDS
+enabled on the ingest function, repeats within the window are collapsed,
+so raise --body-pool or disable deduplication for write-path tests.
+
+Requires: pip install locust hdrhistogram
+
+Usage:
+    export INGEST_URL=$(cd terraform && terraform output -raw ingest_function_url)
+    export READ_URL=$(cd terraform && terraform output -raw read_recent_function_url)
+    locust -f scripts/load_profile.py --headless --users 20 --spawn-rate 20 --run-time 5m \\
+        --ingest-rate 1000 --read-rate 500 --hdr-dir load-results --check-targets
+    locust -f scripts/load_profile.py --headless --users 4 --spawn-rate 4 --run-time 1m \\
+        --ingest-rate 200 --read-rate 100 --batch-sizes 25:1 --message-sizes 4096:1
+"""
+
+import json
+import os
+import random
+import re
+import string
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import botocore.session
+import gevent
+import gevent.pool
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from hdrh.histogram import HdrHistogram
+from locust import FastHttpUser, events, task
+from locust.runners import WorkerRunner
+
+INGEST_URL = os.environ.get('INGEST_URL', '')
+READ_URL = os.environ.get('READ_URL', '')
+
+# SigV4 signatures stay valid for 15 minutes; re-sign well before that
+SIGNATURE_TTL_SECONDS = 240
+
+# Recorded latencies, in microseconds (1 µs to 60 s, 3 significant digits)
+HISTOGRAM_RANGE = (1, 60_000_000, 3)
+
+# PERFORMANCE.md targets: minimum throughput (req/s) and maximum p99 (ms)
+TARGETS = {
+    'ingest': {'throughput': 1000.0, 'p99_ms': 100.0},
+    'read': {'throughput': 500.0, 'p99_ms': 200.0},
+}
+
+# Messages stay within ingest's limit and character set
+MAX_MESSAGE_LENGTH = 10240
+WORDS = ('request', 'completed', 'timeout', 'user', 'session', 'cache', 'miss', 'retry', 'upstream',
+         'payment', 'order', 'database', 'connection', 'pool', 'latency', 'worker', 'queue', 'node')
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    group = parser.add_argument_group('load profile')
+    group.add_argument('--ingest-rate', type=float, default=1000.0,
+                       help='Ingest requests started per second, across all users')
+    group.add_argument('--read-rate', type=float, default=500.0,
+                       help='Read requests started per second, across all users')
+    group.add_argument('--arrivals', choices=('poisson', 'uniform'), default='poisson',
+                       help='Inter-arrival times: exponential or evenly spaced')
+    group.add_argument('--max-in-flight', type=int, default=200,
+                       help='Outstanding requests per user before arrivals are dropped')
+    group.add_argument('--batch-sizes', default='1:70,25:25,100:5',
+                       help='Entries per ingest request, as size:weight pairs')
+    group.add_argument('--message-sizes', default='80:70,256:20,1024:8,8192:2',
+                       help='Message length in characters, as length:weight pairs')
+    group.add_argument('--severity-mix', default='info:80,warning:15,error:5',
+                       help='Severity of ingested entries, as severity:weight pairs')
+    group.add_argument('--read-limits', default='100:90,1000:10',
+                       help='Page size of reads, as limit:weight pairs')
+    group.add_argument('--read-severity-share', type=float, default=0.2,
+                       help='Fraction of reads filtered to one severity')
+    group.add_argument('--read-pages', type=int, default=3,
+                       help='Pages a read follows through next_cursor, at most')
+    group.add_argument('--body-pool', type=int, default=512,
+                       help='Pre-generated entries per batch size (bodies are reused)')
+    group.add_argument('--warmup-seconds', type=float, default=0.0,
+                       help='Requests scheduled in the first seconds are not recorded in the histograms')
+    group.add_argument('--hdr-dir', default='',
+                       help='Directory for .hgrm histograms and summary.json')
+    group.add_argument('--check-targets', action='store_true',
+                       help='Exit with status 1 when a PERFORMANCE.md target is missed')
+
+
+def parse_weights(value: str, convert=str) -> Tuple[List[Any], List[float]]:
+    """Parse "value:weight,..." into values and weights for random.choices."""
+    values, weights = [], []
+    for pair in value.split(','):
+        item, _, weight = pair.strip().partition(':')
+        values.append(convert(item))
+        weights.append(float(weight or 1))
+    return values, weights
+
+
+class Signer:
+    """SigV4 headers for Function URL requests, cached per request."""
+
+    def __init__(self):
+        session = botocore.session.get_session()
+        self.credentials = session.get_credentials()
+        if self.credentials is None:
+            raise ValueError('No AWS credentials found for signing')
+        self.region = session.get_config_variable('region') or 'us-east-1'
+        self.cache: Dict[Tuple[str, str, Optional[bytes]], Tuple[float, Dict[str, str]]] = {}
+
+    def headers(self, method: str, url: str, body: Optional[bytes] = None, cache: bool = True) -> Dict[str, str]:
+        key = (method, url, body)
+        now = time.monotonic()
+        cached = self.cache.get(key)
+        if cached and now - cached[0] < SIGNATURE_TTL_SECONDS:
+            return cached[1]
+        request = AWSRequest(method=method, url=url, data=body,
+                             headers={'Content-Type': 'application/json'} if body else {})
+        SigV4Auth(self.credentials.get_frozen_credentials(), 'lambda', self.region).add_auth(request)
+        headers = dict(request.headers.items())
+        if cache:
+            self.cache[key] = (now, headers)
+        return headers
+
+
+class Recorder:
+    """HDR histograms of latency from the intended start, per request name."""
+
+    def __init__(self):
+        self.histograms: Dict[str, HdrHistogram] = {}
+        self.failures: Dict[str, int] = {}
+        self.started: Optional[float] = None
+        self.stopped: Optional[float] = None
+
+    def histogram(self, name: str) -> HdrHistogram:
+        if name not in self.histograms:
+            self.histograms[name] = HdrHistogram(*HISTOGRAM_RANGE)
+        return self.histograms[name]
+
+    def record(self, function: str, name: str, intended: float, succeeded: bool) -> None:
+        if not succeeded:
+            for key in (name, f'{function} (all)'):
+                self.failures[key] = self.failures.get(key, 0) + 1
+            return
+        microseconds = min(HISTOGRAM_RANGE[1], max(1, int((time.monotonic() - intended) * 1_000_000)))
+        self.histogram(name).record_value(microseconds)
+        self.histogram(f'{function} (all)').record_value(microseconds)
+
+    def drain(self) -> Dict[str, Any]:
+        """Encode and reset every histogram (a worker's report to the master)."""
+        encoded = {name: histogram.encode() for name, histogram in self.histograms.items()
+                   if histogram.get_total_count()}
+        for histogram in self.histograms.values():
+            histogram.reset()
+        failures, self.failures = self.failures, {}
+        return {'histograms': encoded, 'failures': failures}
+
+    def merge(self, report: Dict[str, Any]) -> None:
+        for name, data in report.get('histograms', {}).items():
+            self.histogram(name).decode_and_add(data)
+        for name, count in report.get('failures', {}).items():
+            self.failures[name] = self.failures.get(name, 0) + count
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        results = {}
+        for name, histogram in sorted(self.histograms.items()):
+            count = histogram.get_total_count()
+            if not count:
+                continue
+            results[name] = {
+                'count': count,
+                'failures': self.failures.get(name, 0),
+                'throughput': round(count / duration, 1) if duration else None,
+                **{f'p{label}_ms': round(histogram.get_value_at_percentile(percentile) / 1000, 2)
+                   for label, percentile in (('50', 50), ('90', 90), ('99', 99), ('99.9', 99.9))},
+                'max_ms': round(histogram.get_max_value() / 1000, 2),
+            }
+        return results
+
+
+recorder = Recorder()
+
+
+class OpenLoopUser(FastHttpUser):
+    """Starts requests on a fixed schedule, independent of their completion."""
+
+    host = INGEST_URL or READ_URL or None
+    # Connections per user; must cover the requests it keeps in flight
+    concurrency = 64
+    # Pooled bodies and cached signatures are shared by the users of a process
+    signer: Optional[Signer] = None
+    bodies: Dict[int, List[bytes]] = {}
+
+    def on_start(self):
+        if not INGEST_URL or not READ_URL:
+            raise ValueError('Set INGEST_URL and READ_URL environment variables')
+        options = self.environment.parsed_options
+        if OpenLoopUser.signer is None:
+            OpenLoopUser.signer = Signer()
+        self.batch_sizes = parse_weights(options.batch_sizes, int)
+        self.message_sizes = parse_weights(options.message_sizes, int)
+        self.severities = parse_weights(options.severity_mix)
+        self.read_limits = parse_weights(options.read_limits, int)
+        users = max(1, options.num_users or 1)
+        self.ingest_rate = options.ingest_rate / users
+        self.read_rate = options.read_rate / users
+        self.in_flight = gevent.pool.Pool(options.max_in_flight)
+
+    def on_stop(self):
+        self.in_flight.kill(block=False)
+
+    @task
+    def schedule(self):
+        """Run this user's arrival schedule until the test stops."""
+        options = self.environment.parsed_options
+        rate = self.ingest_rate + self.read_rate
+        if rate <= 0:
+            gevent.sleep(1)
+            return
+        ingest_share = self.ingest_rate / rate
+        intended = time.monotonic()
+        while True:
+            intended += random.expovariate(rate) if options.arrivals == 'poisson' else 1 / rate
+            delay = intended - time.monotonic()
+            if delay > 0:
+                gevent.sleep(delay)
+            if self.in_flight.full():
+                self.environment.events.request.fire(
+                    request_type='ARRIVAL', name='Dropped (max in flight)', response_time=0,
+                    response_length=0, exception=RuntimeError('Client saturated'), context={})
+                continue
+            arrival = self.ingest if random.random() < ingest_share else self.read
+            self.in_flight.spawn(arrival, intended)
+
+    def recording(self, intended: float) -> bool:
+        started = recorder.started
+        return started is None or intended - started >= self.environment.parsed_options.warmup_seconds
+
+    def ingest(self, intended: float):
+        batch_size = random.choices(*self.batch_sizes)[0]
+        body = random.choice(self.body_pool(batch_size))
+        name = 'Ingest' if batch_size == 1 else f'Ingest batch {batch_size}'
+        headers = self.signer.headers('POST', INGEST_URL, body)
+        with self.client.post(INGEST_URL, data=body, headers=headers, name=name,
+                              catch_response=True) as response:
+            succeeded = response.status_code in (200, 202)
+            if succeeded:
+                response.success()
+            else:
+                response.failure(f'Status: {response.status_code}')
+        if self.recording(intended):
+            recorder.record('ingest', name, intended, succeeded)
+
+    def body_pool(self, batch_size: int) -> List[bytes]:
+        """Pre-generated bodies of `batch_size` entries, built on first use."""
+        if batch_size not in self.bodies:
+            options = self.environment.parsed_options
+            count = max(8, options.body_pool // batch_size)
+            bodies = []
+            for _ in range(count):
+                entries = [{'severity': random.choices(*self.severities)[0],
+                            'message': message(random.choices(*self.message_sizes)[0])}
+                           for _ in range(batch_size)]
+                bodies.append(json.dumps(entries[0] if batch_size == 1 else entries).encode('utf-8'))
+            self.bodies[batch_size] = bodies
+        return self.bodies[batch_size]
+
+    def read(self, intended: float):
+        options = self.environment.parsed_options
+        query = {'limit': str(random.choices(*self.read_limits)[0])}
+        name = 'Read recent'
+        if random.random() < options.read_severity_share:
+            query['severity'] = random.choices(*self.severities)[0]
+            name = 'Read recent (severity)'
+
+        url, cache = f'{READ_URL}?{urlencode(sorted(query.items()))}', True
+        for page in range(max(1, options.read_pages)):
+            headers = {**self.signer.headers('GET', url, cache=cache), 'Accept-Encoding': 'gzip'}
+            with self.client.get(url, headers=headers, name=name, catch_response=True) as response:
+                next_cursor, succeeded = None, False
+                if response.status_code == 200:
+                    try:
+                        next_cursor = response.json().get('next_cursor')
+                        succeeded = True
+                        response.success()
+                    except ValueError:
+                        response.failure('Invalid JSON response')
+                else:
+                    response.failure(f'Status: {response.status_code}')
+            if page == 0 and self.recording(intended):
+                recorder.record('read', name, intended, succeeded)
+            if not next_cursor:
+                break
+            # Cursor URLs are unique; sign them without filling the cache
+            url, cache = f'{READ_URL}?{urlencode({"cursor": next_cursor, "limit": query["limit"]})}', False
+            name = 'Read recent (next page)'
+
+
+def message(length: int) -> str:
+    """A log message of `length` characters (capped at ingest's limit)."""
+    length = max(1, min(length, MAX_MESSAGE_LENGTH))
+    parts, size = [], 0
+    while size < length:
+        part = random.choice(WORDS) if random.random() < 0.7 else ''.join(random.choices(string.digits, k=6))
+        parts.append(part)
+        size += len(part) + 1
+    return ' '.join(parts)[:length]
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    recorder.histograms.clear()
+    recorder.failures.clear()
+    recorder.started, recorder.stopped = time.monotonic(), None
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    recorder.stopped = time.monotonic()
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data['hdr_report'] = recorder.drain()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    recorder.merge(data.get('hdr_report', {}))
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner) or recorder.started is None:
+        return
+    options = environment.parsed_options
+    duration = max(0.0, (recorder.stopped or time.monotonic()) - recorder.started - options.warmup_seconds)
+    results = recorder.summary(duration)
+
+    print(f"\nLatency from intended start over {duration:.0f} s:")
+    print(f"{'Name':<28} {'count':>9} {'failed':>7} {'req/s':>9} {'p50':>9} {'p90':>9} {'p99':>9} "
+          f"{'p99.9':>9} {'max':>9}")
+    for name, result in results.items():
+        print(f"{name:<28} {result['count']:>9} {result['failures']:>7} {result['throughput'] or 0:>9.1f}"
+              f" {result['p50_ms']:>9.2f}"
+              f" {result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['p99.9_ms']:>9.2f} {result['max_ms']:>9.2f}")
+
+    targets = {}
+    for function, target in TARGETS.items():
+        result = results.get(f'{function} (all)')
+        if result is None:
+            continue
+        met = result['throughput'] >= target['throughput'] and result['p99_ms'] <= target['p99_ms']
+        targets[function] = {**target, 'achieved_throughput': result['throughput'],
+                             'achieved_p99_ms': result['p99_ms'], 'met': met}
+        print(f"{function}: {result['throughput']:.0f} req/s (target {target['throughput']:.0f}+), "
+              f"p99 {result['p99_ms']:.1f} ms (target <{target['p99_ms']:.0f}) "
+              f"{'MET' if met else 'MISSED'}")
+
+    if options.hdr_dir:
+        os.makedirs(options.hdr_dir, exist_ok=True)
+        for name, histogram in recorder.histograms.items():
+            if not histogram.get_total_count():
+                continue
+            filename = re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_')
+            with open(os.path.join(options.hdr_dir, f'{filename}.hgrm'), 'wb') as stream:
+                histogram.output_percentile_distribution(stream, 1000)
+        with open(os.path.join(options.hdr_dir, 'summary.json'), 'w') as stream:
+            json.dump({
+                'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'duration_s': round(duration, 1),
+                'config': {name: getattr(options, name) for name in (
+                    'num_users', 'ingest_rate', 'read_rate', 'arrivals', 'max_in_flight', 'batch_sizes',
+                    'message_sizes', 'severity_mix', 'read_limits', 'read_severity_share', 'read_pages',
+                    'body_pool', 'warmup_seconds')},
+                'results': results,
+                'targets': targets,
+            }, stream, indent=2)
+        print(f"Histograms and summary written to {options.hdr_dir}")
+
+    if options.check_targets and not all(target['met'] for target in targets.values()):
+        environment.process_exit_code = 1
@@ -0,0 +1,411 @@
+"""
+In-memory stand-in for the low-level DynamoDB client, for local benchmarks.
+
+Implements the calls the handlers make against the entries table
+(PutItem, BatchWriteItem, Query on the table or a GSI, GetItem and
+BatchGetItem) with DynamoDB's semantics for key conditions, descending
+order, Limit, LastEvaluatedKey and projections. Every response carries a
+simulated ConsumedCapacity computed with DynamoDB's rounding rules, so the
+handlers' consumed_rcu/consumed_wcu metrics are meaningful offline:
+
+- writes: ceil(item size / 1 KB) per item, once for the table and once per
+  GSI the item appears in (all GSIs project ALL)
+- reads: ceil(bytes read / 4 KB) per request, halved for eventually
+  consistent reads (GSI queries always are)
+
+Each partition is a sorted list, so a query costs O(log n + page) whatever
+the table size. moto stores items in one dict per table and filters the
+whole table on every GSI query, which makes it unusable at a million rows.
+
+Tables can be bulk loaded with compact rows: key attributes as plain
+strings plus a shared dict of the remaining typed attributes. Full items
+are only built when a query returns them, which keeps a million rows at a
+few hundred MB.
+
+Not implemented: UpdateItem, DeleteItem, Scan, filter and condition
+expressions, and throttling. Unsupported calls raise NotImplementedError.
+
+entries_table() builds a client holding the log entries table, preloaded
+with generated entries in the shape ingest writes them.
+"""
+
+import bisect
+import math
+import os
+import re
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lambda', 'common', 'python'))
+
+from log_common import codec, keys  # noqa: E402
+
+# Sorts after every character used in key values
+KEY_CEILING = '\U0010ffff'
+
+KEY_CONDITION = re.compile(
+    r'^\s*(?P<hash>[#\w]+)\s*=\s*(?P<value>:\w+)'
+    r'(?:\s+AND\s+(?P<range>[#\w]+)\s+BETWEEN\s+(?P<lower>:\w+)\s+AND\s+(?P<upper>:\w+))?\s*$',
+    re.IGNORECASE
+)
+
+WRITE_UNIT_BYTES = 1024
+READ_UNIT_BYTES = 4096
+
+# Severity mix of generated entries
+SEVERITY_CYCLE = ('info',) * 16 + ('warning',) * 3 + ('error',)
+
+MESSAGES = (
+    'Request {n} completed with status 200 after {ms} ms',
+    'Cache miss for key session:{n}',
+    'User {n} authenticated via SSO',
+    'Background job {n} finished in {ms} ms',
+    'Retrying upstream call {n} after timeout of {ms} ms',
+    'Database connection pool exhausted, {n} waiters',
+    'Configuration reloaded from revision {n}',
+    'Disk usage at {ms}% on volume vol-{n}',
+)
+
+# Distinct message payloads shared by preloaded rows (keeps 1M rows compact)
+PAYLOAD_VARIANTS = 64
+
+
+def item_size(item: Dict[str, Dict[str, Any]]) -> int:
+    """Approximate DynamoDB item size: attribute names plus values."""
+    return sum(len(name.encode('utf-8')) + _value_size(value) for name, value in item.items())
+
+
+def _value_size(value: Dict[str, Any]) -> int:
+    (kind, content), = value.items()
+    if kind == 'S':
+        return len(content.encode('utf-8'))
+    if kind == 'B':
+        return len(content)
+    if kind == 'N':
+        return len(content.lstrip('-').replace('.', '')) // 2 + 1
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind == 'M':
+        return 3 + item_size(content)
+    if kind == 'L':
+        return 3 + sum(_value_size(element) + 1 for element in content)
+    return sum(len(str(element)) for element in content)
+
+
+def client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+class Table:
+    """One table with its GSIs; partitions are lists sorted by range key."""
+
+    def __init__(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                 indexes: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = {None: (hash_key, range_key), **(indexes or {})}
+        # (index name, hash value) -> sorted [(range value, table hash value, row)]
+        self.partitions: Dict[Tuple[Optional[str], str], List[tuple]] = {}
+        self.items: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        self.row_count = 0
+        self._extra_sizes: Dict[int, int] = {}
+
+    def key_of(self, item: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        return (item[self.hash_key]['S'],
+                item[self.range_key]['S'] if self.range_key else None)
+
+    def bulk_load(self, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        """
+        Load compact rows: one string value per column, then a dict of the
+        other typed attributes (shared between rows to save memory). Rows
+        are only added to the GSIs, so GetItem and table queries do not
+        see them.
+
+        Returns:
+            The number of rows loaded
+        """
+        positions = {
+            index_name: (columns.index(hash_name), columns.index(range_name) if range_name else None)
+            for index_name, (hash_name, range_name) in self.indexes.items()
+            if index_name is not None and hash_name in columns and (range_name is None or range_name in columns)
+        }
+        table_hash = columns.index(self.hash_key)
+        touched = set()
+        count = 0
+        for row in rows:
+            stored = (columns, row)
+            for index_name, (hash_position, range_position) in positions.items():
+                partition = (index_name, row[hash_position])
+                sort_value = row[range_position] if range_position is not None else ''
+                self.partitions.setdefault(partition, []).append((sort_value, row[table_hash], stored))
+                touched.add(partition)
+            count += 1
+        for partition in touched:
+            self.partitions[partition].sort(key=lambda entry: entry[:2])
+        self.row_count += count
+        return count
+
+    def materialize(self, stored: Any) -> Dict[str, Any]:
+        """Return the typed item of a stored row."""
+        if isinstance(stored, dict):
+            return stored
+        columns, row = stored
+        item = dict(row[-1])
+        for name, value in zip(columns, row):
+            item[name] = {'S': value}
+        return item
+
+    def stored_size(self, stored: Any) -> int:
+        if isinstance(stored, dict):
+            return item_size(stored)
+        columns, row = stored
+        extra = row[-1]
+        if id(extra) not in self._extra_sizes:
+            self._extra_sizes[id(extra)] = item_size(extra)
+        return self._extra_sizes[id(extra)] + sum(
+            len(name) + len(value.encode('utf-8')) for name, value in zip(columns, row))
+
+    def put(self, item: Dict[str, Any]) -> float:
+        """Insert or replace an item; returns the write units consumed."""
+        key = self.key_of(item)
+        previous = self.items.pop(key, None)
+        if previous is not None:
+            self._unindex(previous)
+        else:
+            self.row_count += 1
+        self.items[key] = item
+
+        units_per_write = math.ceil(item_size(item) / WRITE_UNIT_BYTES) or 1
+        writes = 0
+        for index_name, (hash_name, range_name) in self.indexes.items():
+            if hash_name not in item or (range_name and range_name not in item):
+                continue
+            entry = (item[range_name]['S'] if range_name else '', key[0], item)
+            bisect.insort(self.partitions.setdefault((index_name, item[hash_name]['S']), []), entry,
+                          key=lambda existing: existing[:2])
+            writes += 1
+        return float(units_per_write * writes)
+
+    def _unindex(self, item: Dict[str, Any]) -> None:
+        for index_name, (hash_name, range_name) in self.indexes.items():
+            partition = self.partitions.get((index_name, item.get(hash_name, {}).get('S')))
+            if not partition:
+                continue
+            probe = (item[range_name]['S'] if range_name else '', item[self.hash_key]['S'])
+            position = bisect.bisect_left(partition, probe, key=lambda existing: existing[:2])
+            if position < len(partition) and partition[position][:2] == probe:
+                del partition[position]
+
+
+class LocalDynamoDB:
+    """Thread-safe stand-in for botocore's DynamoDB client."""
+
+    def __init__(self):
+        self.tables: Dict[str, Table] = {}
+        self._lock = threading.RLock()
+        self.calls: Dict[str, int] = {}
+
+    def create_table(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                     indexes: Optional[Dict[str, Tuple[str, str]]] = None) -> Table:
+        table = Table(name, hash_key, range_key, indexes)
+        self.tables[name] = table
+        return table
+
+    def table(self, name: str, operation: str) -> Table:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        if name not in self.tables:
+            raise client_error('ResourceNotFoundException', 'Requested resource not found', operation)
+        return self.tables[name]
+
+    def put_item(self, TableName: str, Item: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        _unsupported(kwargs, 'PutItem', 'ConditionExpression')
+        with self._lock:
+            units = self.table(TableName, 'PutItem').put(Item)
+        return {'ConsumedCapacity': {'TableName': TableName, 'CapacityUnits': units}}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **kwargs: Any) -> Dict[str, Any]:
+        consumed = []
+        with self._lock:
+            for table_name, requests in RequestItems.items():
+                table = self.table(table_name, 'BatchWriteItem')
+                units = 0.0
+                for request in requests:
+                    if 'PutRequest' not in request:
+                        raise NotImplementedError('Only PutRequest is supported')
+                    units += table.put(request['PutRequest']['Item'])
+                consumed.append({'TableName': table_name, 'CapacityUnits': units})
+        return {'UnprocessedItems': {}, 'ConsumedCapacity': consumed}
+
+    def get_item(self, TableName: str, Key: Dict[str, Any], ConsistentRead: bool = False,
+                 **kwargs: Any) -> Dict[str, Any]:
+        table = self.table(TableName, 'GetItem')
+        item = table.items.get(table.key_of(Key))
+        size = item_size(item) if item else 0
+        units = _read_units(size, ConsistentRead)
+        response: Dict[str, Any] = {'ConsumedCapacity': {'TableName': TableName, 'CapacityUnits': units}}
+        if item is not None:
+            response['Item'] = _project(item, kwargs)
+        return response
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        responses: Dict[str, List[Dict[str, Any]]] = {}
+        consumed = []
+        for table_name, request in RequestItems.items():
+            table = self.table(table_name, 'BatchGetItem')
+            found, units = [], 0.0
+            for key in request['Keys']:
+                item = table.items.get(table.key_of(key))
+                if item is not None:
+                    found.append(_project(item, request))
+                    units += _read_units(item_size(item), request.get('ConsistentRead', False))
+            responses[table_name] = found
+            consumed.append({'TableName': table_name, 'CapacityUnits': units})
+        return {'Responses': responses, 'UnprocessedKeys': {}, 'ConsumedCapacity': consumed}
+
+    def query(self, TableName: str, KeyConditionExpression: str,
+              ExpressionAttributeValues: Dict[str, Any], IndexName: Optional[str] = None,
+              ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+              ScanIndexForward: bool = True, Limit: Optional[int] = None,
+              ExclusiveStartKey: Optional[Dict[str, Any]] = None,
+              ConsistentRead: bool = False, **kwargs: Any) -> Dict[str, Any]:
+        _unsupported(kwargs, 'Query', 'FilterExpression')
+        table = self.table(TableName, 'Query')
+        if IndexName not in table.indexes:
+            raise client_error('ValidationException', f'The table does not have the index {IndexName}', 'Query')
+        hash_name, range_name = table.indexes[IndexName]
+
+        names = ExpressionAttributeNames or {}
+        match = KEY_CONDITION.match(KeyConditionExpression)
+        if not match or names.get(match['hash'], match['hash']) != hash_name or (
+                match['range'] and names.get(match['range'], match['range']) != range_name):
+            raise NotImplementedError(f'Unsupported key condition: {KeyConditionExpression}')
+        partition_value = ExpressionAttributeValues[match['value']]['S']
+        lower, upper = '', KEY_CEILING
+        if match['range']:
+            lower = ExpressionAttributeValues[match['lower']]['S']
+            upper = ExpressionAttributeValues[match['upper']]['S']
+
+        with self._lock:
+            partition = table.partitions.get((IndexName, partition_value), [])
+            start = bisect.bisect_left(partition, (lower,), key=lambda entry: entry[:1])
+            end = bisect.bisect_right(partition, (upper, KEY_CEILING), key=lambda entry: entry[:2])
+            if ExclusiveStartKey:
+                resume = (ExclusiveStartKey[range_name]['S'] if range_name else '',
+                          ExclusiveStartKey[table.hash_key]['S'])
+                if ScanIndexForward:
+                    start = max(start, bisect.bisect_right(partition, resume, key=lambda entry: entry[:2]))
+                else:
+                    end = min(end, bisect.bisect_left(partition, resume, key=lambda entry: entry[:2]))
+            positions = range(start, end) if ScanIndexForward else range(end - 1, start - 1, -1)
+            if Limit is not None:
+                selected = positions[:Limit]
+                more = len(positions) > Limit
+            else:
+                selected, more = positions, False
+            stored = [partition[position][2] for position in selected]
+            last = partition[selected[-1]] if more and len(selected) else None
+
+        items, size = [], 0
+        for row in stored:
+            size += table.stored_size(row)
+            items.append(_project(table.materialize(row), {**kwargs, 'ExpressionAttributeNames': names}))
+        response: Dict[str, Any] = {
+            'Items': items,
+            'Count': len(items),
+            'ScannedCount': len(items),
+            'ConsumedCapacity': {'TableName': TableName,
+                                 'CapacityUnits': _read_units(size, ConsistentRead and IndexName is None)}
+        }
+        if last is not None:
+            item = table.materialize(last[2])
+            key_names = {table.hash_key, table.range_key, hash_name, range_name} - {None}
+            response['LastEvaluatedKey'] = {name: item[name] for name in key_names}
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        raise NotImplementedError(f'LocalDynamoDB does not implement {name}')
+
+
+def _read_units(size: int, consistent: bool) -> float:
+    units = max(1, math.ceil(size / READ_UNIT_BYTES))
+    return float(units if consistent else units / 2)
+
+
+def _project(item: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+    expression = request.get('ProjectionExpression')
+    if not expression:
+        return item
+    names = request.get('ExpressionAttributeNames') or {}
+    projected = {}
+    for token in expression.split(','):
+        name = names.get(token.strip(), token.strip())
+        if name in item:
+            projected[name] = item[name]
+    return projected
+
+
+def _unsupported(kwargs: Dict[str, Any], operation: str, *parameters: str) -> None:
+    for parameter in parameters:
+        if parameter in kwargs:
+            raise NotImplementedError(f'{operation} {parameter} is not supported')
+
+
+def message(number: int) -> str:
+    """Generated log message number `number`."""
+    template = MESSAGES[number % len(MESSAGES)]
+    return template.format(n=number, ms=number % 997)
+
+
+def payloads() -> list:
+    """Typed non-key attributes of PAYLOAD_VARIANTS entries, per severity."""
+    variants = []
+    for number in range(PAYLOAD_VARIANTS):
+        severity = SEVERITY_CYCLE[number % len(SEVERITY_CYCLE)]
+        item = codec.encode({
+            'id': '', 'datetime': '', keys.BUCKET_ATTRIBUTE: '',
+            keys.SEVERITY_BUCKET_ATTRIBUTE: keys.severity_key(severity, ''),
+            'severity': severity, 'message': message(number)
+        })
+        for name in ('id', 'datetime', keys.BUCKET_ATTRIBUTE, keys.SEVERITY_BUCKET_ATTRIBUTE):
+            item.pop(name)
+        variants.append((severity, item))
+    return variants
+
+
+def entries_table(table_name: str, size: int, shard_count: int, span: timedelta,
+                  newest: datetime) -> LocalDynamoDB:
+    """
+    Create a client holding the entries table, with its bucket and severity
+    GSIs, preloaded with `size` entries spread evenly over `span` up to
+    `newest`.
+    """
+    client = LocalDynamoDB()
+    table = client.create_table(table_name, 'id', 'datetime', {
+        keys.TIME_INDEX_NAME: (keys.BUCKET_ATTRIBUTE, 'datetime'),
+        keys.SEVERITY_INDEX_NAME: (keys.SEVERITY_BUCKET_ATTRIBUTE, 'datetime'),
+    })
+    variants = payloads()
+    spacing = span / max(1, size)
+    partitions = {}
+
+    def rows():
+        for number in range(size):
+            timestamp = newest - spacing * number
+            severity, extra = variants[number % PAYLOAD_VARIANTS]
+            bucket = keys.bucket_for(timestamp)
+            shard = number % shard_count
+            if (bucket, shard, severity) not in partitions:
+                partition = keys.shard_key(bucket, shard)
+                partitions[(bucket, shard, severity)] = (partition, keys.severity_key(severity, partition))
+            partition, severity_partition = partitions[(bucket, shard, severity)]
+            yield (f'{number:08x}-0000-4000-8000-000000000000', timestamp.isoformat(),
+                   partition, severity_partition, extra)
+
+    table.bulk_load(('id', 'datetime', keys.BUCKET_ATTRIBUTE, keys.SEVERITY_BUCKET_ATTRIBUTE), rows())
+    return client
@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+"""
+Local HTTP gateway that hosts the Lambda handlers, for load testing.
+
+Serves the ingest and read_recent handlers the way their Function URLs
+do, so Locust (docs/load_tests.py) or scripts/invoke_with_sigv4.py can
+drive them before anything is deployed:
+
+- POST requests invoke ingest; GET and HEAD requests invoke read_recent,
+  whatever the path
+- each request becomes a Function URL event (payload format 2.0: rawPath,
+  rawQueryString, lower-cased headers, queryStringParameters, cookies,
+  requestContext.http, body with isBase64Encoded), and the handler's
+  response is mapped back the same way
+- SigV4 signatures are not verified; --require-signature only checks that
+  the request carries one
+
+Each function runs in execution environments: worker processes started
+with a fresh interpreter that import the handler once and then serve one
+invocation at a time, so module-level state (clients, caches, templates)
+stays warm between invocations as in a real container. The gateway
+mimics Lambda scaling:
+
+- a request is routed to an idle environment; when none is idle, a new
+  one is started (a cold start: interpreter start, handler import and
+  --init-ms of extra initialisation, all on the request's latency)
+- once --concurrency environments are busy, further requests are
+  throttled with 429, as with reserved concurrency
+- environments idle for --idle-timeout seconds are shut down, so traffic
+  after a lull pays cold starts again; --warm starts environments ahead
+  of traffic, like provisioned concurrency
+- an invocation running past --timeout fails with 502 and its
+  environment is replaced; a handler that raises also gets 502, but its
+  environment stays warm
+
+All environments share one in-memory DynamoDB stand-in
+(scripts/local_dynamodb.py), running in its own process, so entries
+written by ingest are read back by read_recent. It can be preloaded with
+generated entries (--preload). The views table (snapshot, watermark,
+rollups, templates), the write queue and the search index are not
+available locally, so the handlers run without them.
+
+Request parsing and dispatch run on one asyncio event loop (uvloop when
+it is installed); handler work runs in the environments, so throughput
+scales with --concurrency up to the number of cores.
+
+Usage:
+    python scripts/local_gateway.py --port 8080 --concurrency 8 --preload 100000
+    python scripts/invoke_with_sigv4.py read-recent --url http://127.0.0.1:8080/
+    INGEST_URL=http://127.0.0.1:8080/ READ_URL=http://127.0.0.1:8080/ locust -f docs/load_tests.py
+"""
+
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+import multiprocessing
+import os
+import secrets
+import shutil
+import signal
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http import HTTPStatus
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from local_dynamodb import entries_table  # noqa: E402
+
+TABLE_NAME = 'local-log-entries'
+
+# Handler for each HTTP method
+ROUTES = {'POST': 'ingest', 'GET': 'read_recent', 'HEAD': 'read_recent'}
+
+# Function URL limits
+MAX_REQUEST_BYTES = 6 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+# Bodies passed to the handler as text; everything else is base64 encoded
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/xml',
+                      'application/javascript', 'application/x-www-form-urlencoded')
+
+# Latencies kept per function for the periodic report
+LATENCY_SAMPLES = 100000
+
+
+class LambdaContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    def __init__(self, function_name: str, request_id: str, timeout: float, memory_mb: int):
+        self.function_name = function_name
+        self.function_version = '$LATEST'
+        self.invoked_function_arn = f'arn:aws:lambda:local:000000000000:function:{function_name}'
+        self.memory_limit_in_mb = memory_mb
+        self.aws_request_id = request_id
+        self.log_group_name = f'/aws/lambda/{function_name}'
+        self.log_stream_name = f'local/{os.getpid()}'
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+class StoreClient:
+    """DynamoDB client of one environment; calls run in the store process."""
+
+    def __init__(self, address: str):
+        self.connection = Client(address, family='AF_UNIX', authkey=multiprocessing.current_process().authkey)
+        # Handlers call the client from thread pools; one call is in flight at a time
+        self.lock = threading.Lock()
+
+    def __getattr__(self, operation: str):
+        if operation.startswith('_'):
+            raise AttributeError(operation)
+
+        def call(**kwargs: Any) -> Dict[str, Any]:
+            with self.lock:
+                self.connection.send((operation, kwargs))
+                succeeded, result = self.connection.recv()
+            if not succeeded:
+                raise result
+            return result
+
+        return call
+
+
+def serve_store(address: str, preload: int, shard_count: int, span_days: int, ready: Any) -> None:
+    """Store process: hold the entries table and serve every environment's calls."""
+    # Ctrl-C reaches the whole process group; the gateway shuts this process down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    client = entries_table(TABLE_NAME, preload, shard_count, timedelta(days=span_days), datetime.now(timezone.utc))
+    listener = Listener(address, family='AF_UNIX', backlog=1024,
+                        authkey=multiprocessing.current_process().authkey)
+    ready.send(True)
+    ready.close()
+
+    def serve(connection):
+        with connection:
+            while True:
+                try:
+                    operation, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if operation.startswith('_'):
+                        raise NotImplementedError(operation)
+                    connection.send((True, getattr(client, operation)(**kwargs)))
+                except Exception as e:
+                    connection.send((False, e))
+
+    while True:
+        connection = listener.accept()
+        threading.Thread(target=serve, args=(connection,), daemon=True).start()
+
+
+def serve_environment(function: str, connection: Any, store_address: str, init_ms: float,
+                      memory_mb: int, log_path: Optional[str]) -> None:
+    """
+    Environment process: import the handler, then serve invocations until
+    the gateway closes the connection.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Handler output goes where CloudWatch Logs would
+    sys.stdout = open(log_path or os.devnull, 'a', buffering=1)
+    os.environ['AWS_LAMBDA_FUNCTION_NAME'] = f'local-{function}'
+    sys.path[:0] = [os.path.join(REPO_ROOT, 'lambda', function),
+                    os.path.join(REPO_ROOT, 'lambda', 'common', 'python')]
+
+    from log_common import clients
+    store = StoreClient(store_address)
+    clients.dynamodb = lambda: store
+    handler = importlib.import_module('index').lambda_handler
+    time.sleep(init_ms / 1000)
+    connection.send(True)
+
+    while True:
+        try:
+            event, timeout = connection.recv()
+        except (EOFError, OSError):
+            return
+        context = LambdaContext(f'local-{function}', event['requestContext']['requestId'], timeout, memory_mb)
+        try:
+            result = (True, handler(event, context))
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+            result = (False, {'errorType': type(e).__name__, 'errorMessage': str(e)})
+        connection.send(result)
+
+
+class Environment:
+    """Gateway side of one execution environment."""
+
+    def __init__(self, mp_context: Any, function: str, options: argparse.Namespace, store_address: str):
+        self.connection, child = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=serve_environment,
+            args=(function, child, store_address, options.init_ms, options.memory, options.handler_log),
+            daemon=True
+        )
+        self._child = child
+        self.last_used = time.monotonic()
+
+    async def start(self, timeout: float) -> float:
+        """Start the process and wait for the handler import; returns the init duration in ms."""
+        started = time.perf_counter()
+        self.process.start()
+        self._child.close()
+        await asyncio.wait_for(self.receive(), timeout)
+        return (time.perf_counter() - started) * 1000
+
+    async def invoke(self, event: Dict[str, Any], timeout: float) -> Tuple[bool, Any]:
+        self.connection.send((event, timeout))
+        return await asyncio.wait_for(self.receive(), timeout)
+
+    async def receive(self) -> Any:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        descriptor = self.connection.fileno()
+        loop.add_reader(descriptor, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(descriptor)
+        return self.connection.recv()
+
+    def stop(self) -> None:
+        self.connection.close()
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class Function:
+    """The environments of one function, scaled like Lambda."""
+
+    def __init__(self, name: str, mp_context: Any, options: argparse.Namespace, store_address: str):
+        self.name = name
+        self.mp_context = mp_context
+        self.options = options
+        self.store_address = store_address
+        # Most recently used last, so surplus environments idle out first
+        self.idle: List[Environment] = []
+        self.size = 0
+        self.totals = {'invocations': 0, 'cold_starts': 0, 'throttles': 0, 'errors': 0}
+        self.latencies: List[float] = []
+        self.init_ms: List[float] = []
+
+    async def start_environment(self) -> Environment:
+        environment = Environment(self.mp_context, self.name, self.options, self.store_address)
+        self.size += 1
+        try:
+            self.init_ms.append(await environment.start(self.options.timeout + 30))
+        except BaseException:
+            self.size -= 1
+            environment.stop()
+            raise
+        self.totals['cold_starts'] += 1
+        return environment
+
+    async def warm(self, count: int) -> None:
+        environments = await asyncio.gather(*(self.start_environment() for _ in range(count)))
+        self.idle.extend(environments)
+
+    async def invoke(self, event: Dict[str, Any]) -> Optional[Tuple[bool, Any]]:
+        """
+        Run one invocation; returns (succeeded, response or error), or
+        None when the function is throttled.
+        """
+        started = time.perf_counter()
+        if self.idle:
+            environment = self.idle.pop()
+        elif self.size < self.options.concurrency:
+            try:
+                environment = await self.start_environment()
+            except (asyncio.TimeoutError, EOFError, OSError) as e:
+                self.totals['errors'] += 1
+                return False, {'errorType': 'InitError', 'errorMessage': str(e)}
+        else:
+            self.totals['throttles'] += 1
+            return None
+
+        try:
+            result = await environment.invoke(event, self.options.timeout)
+        except (asyncio.TimeoutError, EOFError, OSError) as e:
+            # The environment is reset, as Lambda does after a timeout or crash
+            environment.stop()
+            self.size -= 1
+            result = (False, {'errorType': type(e).__name__, 'errorMessage': 'Task timed out or crashed'})
+        else:
+            environment.last_used = time.monotonic()
+            self.idle.append(environment)
+
+        self.totals['invocations'] += 1
+        if not result[0]:
+            self.totals['errors'] += 1
+        if len(self.latencies) < LATENCY_SAMPLES:
+            self.latencies.append((time.perf_counter() - started) * 1000)
+        return result
+
+    def reap(self, now: float) -> None:
+        """Shut down environments idle for longer than --idle-timeout."""
+        expired = [environment for environment in self.idle
+                   if now - environment.last_used > self.options.idle_timeout]
+        for environment in expired:
+            self.idle.remove(environment)
+            environment.stop()
+            self.size -= 1
+
+    def stop(self) -> None:
+        for environment in self.idle:
+            environment.stop()
+        self.size -= len(self.idle)
+        self.idle.clear()
+
+    def report(self, interval: Optional[float]) -> str:
+        """One status line; drains the latency samples."""
+        samples, self.latencies = sorted(self.latencies), []
+        line = f'{self.name:<12} envs {self.size:3d} (idle {len(self.idle):3d})'
+        if interval:
+            line += f'  {len(samples) / interval:8.1f} req/s'
+        if samples:
+            line += (f'  p50 {samples[len(samples) // 2]:7.2f} ms'
+                     f'  p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))]:7.2f} ms')
+        if self.init_ms:
+            line += f'  init p50 {statistics.median(self.init_ms):6.0f} ms'
+        totals = self.totals
+        return (line + f'  total {totals["invocations"]}  cold {totals["cold_starts"]}'
+                f'  throttled {totals["throttles"]}  errors {totals["errors"]}')
+
+
+def function_url_event(method: str, target: str, version: str, headers: Dict[str, str],
+                       body: bytes, source_ip: str) -> Dict[str, Any]:
+    """Build a Function URL (payload format 2.0) event."""
+    path, _, raw_query = target.partition('?')
+    now = datetime.now(timezone.utc)
+    host = headers.get('host', 'localhost')
+    event: Dict[str, Any] = {
+        'version': '2.0',
+        'routeKey': '$default',
+        'rawPath': path,
+        'rawQueryString': raw_query,
+        'headers': {name: value for name, value in headers.items() if name != 'cookie'},
+        'requestContext': {
+            'accountId': 'anonymous',
+            'apiId': 'local',
+            'domainName': host,
+            'domainPrefix': host.split('.')[0],
+            'http': {
+                'method': method,
+                'path': path,
+                'protocol': version,
+                'sourceIp': source_ip,
+                'userAgent': headers.get('user-agent', '')
+            },
+            'requestId': str(uuid.uuid4()),
+            'routeKey': '$default',
+            'stage': '$default',
+            'time': now.strftime('%d/%b/%Y:%H:%M:%S +0000'),
+            'timeEpoch': int(now.timestamp() * 1000)
+        },
+        'isBase64Encoded': False
+    }
+    if raw_query:
+        parameters: Dict[str, str] = {}
+        for name, value in parse_qsl(raw_query, keep_blank_values=True):
+            parameters[name] = f'{parameters[name]},{value}' if name in parameters else value
+        event['queryStringParameters'] = parameters
+    if 'cookie' in headers:
+        event['cookies'] = [cookie.strip() for cookie in headers['cookie'].split(';')]
+    if body:
+        content_type = headers.get('content-type', '').lower()
+        try:
+            if 'content-encoding' in headers or not content_type.startswith(TEXT_CONTENT_TYPES):
+                raise UnicodeDecodeError('utf-8', body, 0, 0, 'binary body')
+            event['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            event['body'] = base64.b64encode(body).decode('ascii')
+            event['isBase64Encoded'] = True
+    return event
+
+
+def http_response(result: Any) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """Map a handler's return value to an HTTP response, as Function URLs do."""
+    if not isinstance(result, dict) or 'statusCode' not in result:
+        return 200, [('Content-Type', 'application/json')], json.dumps(result).encode('utf-8')
+    headers = [(str(name), str(value)) for name, value in (result.get('headers') or {}).items()]
+    if not any(name.lower() == 'content-type' for name, _ in headers):
+        headers.append(('Content-Type', 'application/json'))
+    headers.extend(('Set-Cookie', cookie) for cookie in result.get('cookies') or [])
+    body = result.get('body') or ''
+    if result.get('isBase64Encoded'):
+        encoded = base64.b64decode(body)
+    else:
+        encoded = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+    return int(result['statusCode']), headers, encoded
+
+
+def error_response(status: int, message: str, error_type: Optional[str] = None) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    headers = [('Content-Type', 'application/json')]
+    if error_type:
+        headers.append(('x-amzn-ErrorType', error_type))
+    return status, headers, json.dumps({'Message': message}).encode('utf-8')
+
+
+class BadRequest(Exception):
+    """The request could not be parsed; the connection is closed."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Gateway:
+    """HTTP/1.1 front end: parses requests and dispatches them to functions."""
+
+    def __init__(self, functions: Dict[str, Function], options: argparse.Namespace):
+        self.functions = functions
+        self.options = options
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info('peername')
+        source_ip = peer[0] if isinstance(peer, tuple) else '127.0.0.1'
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except BadRequest as e:
+                    self.write_response(writer, 'HTTP/1.1', *error_response(e.status, str(e)), keep_alive=False)
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, target, version, headers, body = request
+                keep_alive = self.keep_alive(version, headers)
+                status, response_headers, response_body = await self.dispatch(
+                    method, target, version, headers, body, source_ip)
+                if method == 'HEAD':
+                    response_headers.append(('Content-Length', str(len(response_body))))
+                    response_body = b''
+                self.write_response(writer, version, status, response_headers, response_body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader):
+        """Read one request; returns None when the client closed the connection."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise BadRequest(400, 'Incomplete request')
+            return None
+        except asyncio.LimitOverrunError:
+            raise BadRequest(431, 'Request headers too large')
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise BadRequest(400, 'Malformed request line')
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, separator, value = line.partition(':')
+            if not separator:
+                raise BadRequest(400, 'Malformed header')
+            name, value = name.strip().lower(), value.strip()
+            headers[name] = f'{headers[name]},{value}' if name in headers else value
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            body = await self.read_chunked(reader)
+        else:
+            try:
+                length = int(headers.get('content-length', '0'))
+            except ValueError:
+                raise BadRequest(400, 'Malformed Content-Length')
+            if length > MAX_REQUEST_BYTES:
+                raise BadRequest(413, 'Request must be smaller than 6291456 bytes')
+            body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, version, headers, body
+
+    async def read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        chunks, total = [], 0
+        while True:
+            size_line = await reader.readuntil(b'\r\n')
+            try:
+                size = int(size_line.split(b';')[0], 16)
+            except ValueError:
+                raise BadRequest(400, 'Malformed chunk')
+            if size == 0:
+                # Skip trailers
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return b''.join(chunks)
+            total += size
+            if total > MAX_REQUEST_BYTES:
+                raise BadRequest(413, 'Request must be smaller than 6291456 bytes')
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    def keep_alive(self, version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    async def dispatch(self, method: str, target: str, version: str, headers: Dict[str, str],
+                       body: bytes, source_ip: str) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        if method not in ROUTES:
+            status, response_headers, response_body = error_response(405, 'Method Not Allowed')
+            return status, response_headers + [('Allow', ', '.join(ROUTES))], response_body
+        if self.options.require_signature and not headers.get('authorization', '').startswith('AWS4-HMAC-SHA256'):
+            return error_response(403, 'Forbidden', 'AccessDeniedException')
+
+        event = function_url_event(method, target, version, headers, body, source_ip)
+        result = await self.functions[ROUTES[method]].invoke(event)
+        request_id = [('x-amzn-RequestId', event['requestContext']['requestId'])]
+        if result is None:
+            status, response_headers, response_body = error_response(429, 'Rate Exceeded.', 'TooManyRequestsException')
+        elif not result[0]:
+            status, response_headers, response_body = error_response(502, 'Internal Server Error')
+        else:
+            try:
+                status, response_headers, response_body = http_response(result[1])
+            except (TypeError, ValueError):
+                status, response_headers, response_body = error_response(502, 'Internal Server Error')
+        return status, response_headers + request_id, response_body
+
+    def write_response(self, writer: asyncio.StreamWriter, version: str, status: int,
+                       headers: List[Tuple[str, str]], body: bytes, keep_alive: bool) -> None:
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+        lines = [f'{"HTTP/1.0" if version == "HTTP/1.0" else "HTTP/1.1"} {status} {reason}',
+                 f'Date: {formatdate(usegmt=True)}']
+        lines.extend(f'{name}: {value}' for name, value in headers)
+        if not any(name.lower() == 'content-length' for name, _ in headers):
+            lines.append(f'Content-Length: {len(body)}')
+        lines.append(f'Connection: {"keep-alive" if keep_alive else "close"}')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+
+async def serve(options: argparse.Namespace, mp_context: Any, store_address: str) -> Dict[str, Function]:
+    functions = {name: Function(name, mp_context, options, store_address) for name in sorted(set(ROUTES.values()))}
+    try:
+        if options.warm:
+            await asyncio.gather(*(function.warm(min(options.warm, options.concurrency))
+                                   for function in functions.values()))
+
+        gateway = Gateway(functions, options)
+        server = await asyncio.start_server(gateway.handle_connection, options.host, options.port,
+                                            backlog=options.backlog, limit=MAX_HEADER_BYTES)
+        print(f"Serving ingest (POST) and read_recent (GET) on http://{options.host}:{options.port}/ "
+              f"with up to {options.concurrency} environments each", file=sys.stderr)
+
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopping.set)
+
+        last_report = time.monotonic()
+        async with server:
+            while not stopping.is_set():
+                try:
+                    await asyncio.wait_for(stopping.wait(), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+                now = time.monotonic()
+                for function in functions.values():
+                    function.reap(now)
+                if options.stats_interval and now - last_report >= options.stats_interval:
+                    for function in functions.values():
+                        if function.latencies:
+                            print(function.report(now - last_report), file=sys.stderr)
+                    last_report = now
+    finally:
+        for function in functions.values():
+            function.stop()
+    return functions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the Lambda handlers locally over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Environments per function; requests beyond it get 429')
+    parser.add_argument('--warm', type=int, default=0, help='Environments per function started ahead of traffic')
+    parser.add_argument('--idle-timeout', type=float, default=300.0,
+                        help='Seconds after which an idle environment is shut down')
+    parser.add_argument('--init-ms', type=float, default=0.0,
+                        help='Extra initialisation added to every cold start, in ms')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Invocation timeout in seconds')
+    parser.add_argument('--memory', type=int, default=256, help='Memory size reported in the context, in MB')
+    parser.add_argument('--preload', type=int, default=0, help='Entries to preload into the table')
+    parser.add_argument('--shards', type=int, default=int(os.environ.get('SHARD_COUNT', '1')),
+                        help='Write shards per time bucket (SHARD_COUNT)')
+    parser.add_argument('--span-days', type=int, default=30, help='Days the preloaded entries span')
+    parser.add_argument('--require-signature', action='store_true',
+                        help='Reject requests without a SigV4 Authorization header (not verified)')
+    parser.add_argument('--handler-log', help='Append handler output (EMF lines, errors) to this file')
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help='Seconds between status lines on stderr (0 disables)')
+    parser.add_argument('--backlog', type=int, default=4096, help='Listen backlog')
+    args = parser.parse_args()
+
+    if args.concurrency < 1 or args.shards < 1:
+        parser.error('--concurrency and --shards must be at least 1')
+
+    # Environments inherit this configuration; the views table, write queue
+    # and search index have no local stand-in
+    os.environ.update({
+        'TABLE_NAME': TABLE_NAME,
+        'SHARD_COUNT': str(args.shards),
+        'SCAN_FALLBACK': 'false',
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        'AWS_REGION': os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')),
+        # Cursors must verify in every environment, as with the deployed secret
+        'CURSOR_SECRET': os.environ.get('CURSOR_SECRET') or secrets.token_hex(32),
+    })
+    for name in ('VIEWS_TABLE_NAME', 'WRITE_QUEUE_URL', 'SEARCH_TABLE_NAME'):
+        os.environ.pop(name, None)
+
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    mp_context = multiprocessing.get_context('spawn')
+    directory = tempfile.mkdtemp(prefix='local-gateway-')
+    store_address = os.path.join(directory, 'dynamodb.sock')
+    ready, child = mp_context.Pipe(duplex=False)
+    store = mp_context.Process(target=serve_store, args=(store_address, args.preload, args.shards,
+                                                         args.span_days, child), daemon=True)
+    started = time.perf_counter()
+    store.start()
+    child.close()
+    try:
+        ready.recv()
+        print(f"DynamoDB stand-in ready with {args.preload:,} entries in {time.perf_counter() - started:.1f} s",
+              file=sys.stderr)
+        functions = asyncio.run(serve(args, mp_context, store_address))
+        for function in functions.values():
+            print(function.report(None), file=sys.stderr)
+    except EOFError:
+        print("DynamoDB stand-in failed to start", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        store.terminate()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
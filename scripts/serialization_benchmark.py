@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of read_recent response serialization.
+
+Compares two ways of turning a page of items, as returned by the
+low-level DynamoDB client, into a response body:
+
+- previous: deserialize every attribute with boto3's TypeDeserializer, as
+  the resource layer did, copy the public fields into a new dict and encode
+  through a JSONEncoder subclass that converts Decimals
+- render: pick the public string fields straight out of the typed maps
+  (render.public_entries) and encode with render.dumps, once with the
+  standard library and once with orjson when it is installed
+
+Each path is timed on pages of 100 and 1000 entries (--sizes) and the
+median of --runs repetitions is reported.
+
+Usage:
+    python scripts/serialization_benchmark.py
+    python scripts/serialization_benchmark.py --sizes 100 1000 --runs 7 --json serialization.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lambda', 'common', 'python'))
+
+from boto3.dynamodb.types import TypeDeserializer  # noqa: E402
+from log_common import codec, keys, render  # noqa: E402
+
+DESERIALIZER = TypeDeserializer()
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """The encoder read_recent used before the render module."""
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def make_items(count: int) -> list:
+    """Build typed plain (version 1) items, which both paths can read, newest first."""
+    newest = datetime(2026, 1, 29, 12, tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        timestamp = newest - timedelta(seconds=i)
+        partition = keys.shard_key(keys.bucket_for(timestamp), i % 4)
+        severity = ('info', 'warning', 'error')[i % 3]
+        items.append(codec.encode({
+            'id': f'{i:08d}-0000-4000-8000-000000000000',
+            'datetime': timestamp.isoformat(),
+            keys.BUCKET_ATTRIBUTE: partition,
+            keys.SEVERITY_BUCKET_ATTRIBUTE: keys.severity_key(severity, partition),
+            'severity': severity,
+            'message': f'Request {i} completed with status 200 after {i % 250} ms on worker {i % 16}'
+        }, version=1))
+    return items
+
+
+def previous_path(items: list) -> str:
+    entries = [{name: DESERIALIZER.deserialize(value) for name, value in item.items()} for item in items]
+    logs = [{field: entry[field] for field in keys.PUBLIC_FIELDS if field in entry} for entry in entries]
+    return json.dumps({'count': len(logs), 'logs': logs, 'query_method': 'time_bucket_query'},
+                      cls=DecimalEncoder)
+
+
+def render_path(items: list) -> str:
+    logs = render.public_entries(items)
+    return render.dumps({'count': len(logs), 'logs': logs, 'query_method': 'time_bucket_query'})
+
+
+def time_path(function, items: list, runs: int) -> float:
+    """Median time of one call in microseconds."""
+    timer = timeit.Timer(lambda: function(items))
+    number, _ = timer.autorange()
+    samples = timer.repeat(repeat=runs, number=number)
+    return statistics.median(samples) / number * 1e6
+
+
+def benchmark(size: int, runs: int) -> dict:
+    """Time every path on a page of `size` entries."""
+    items = make_items(size)
+    assert json.loads(previous_path(items)) == json.loads(render_path(items))
+
+    result = {'entries': size, 'previous_us': round(time_path(previous_path, items, runs), 1)}
+    with patch.object(render, 'orjson', None):
+        result['render_json_us'] = round(time_path(render_path, items, runs), 1)
+    if render.orjson is not None:
+        result['render_orjson_us'] = round(time_path(render_path, items, runs), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare read_recent response serialization paths'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000],
+                        help='Entries per page (default: 100 1000)')
+    parser.add_argument('--runs', type=int, default=5, help='Repetitions per measurement (default: 5)')
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file')
+
+    args = parser.parse_args()
+    if render.orjson is None:
+        print('orjson is not installed; timing the standard library backend only')
+
+    results = []
+    for size in args.sizes:
+        result = benchmark(size, args.runs)
+        results.append(result)
+
+        print(f"{size} entries:")
+        print(f"    previous        {result['previous_us']:10.1f} us")
+        for name in ('render_json', 'render_orjson'):
+            if f'{name}_us' in result:
+                speedup = result['previous_us'] / result[f'{name}_us']
+                print(f"    {name:15} {result[f'{name}_us']:10.1f} us  ({speedup:.1f}x)")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
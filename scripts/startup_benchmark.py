@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Simple Log Service Lambda handlers.
+
+Imports each handler's index.py in a fresh interpreter under
+`python -X importtime`, the same way Lambda loads it on a cold start. It
+reports the module import time, the time to build the DynamoDB client on
+first use, and the slowest imports underneath the handler. Every
+measurement is repeated and the median is reported.
+
+The exit status is 1 when a handler is slower than --max-import-ms or
+imports a forbidden module (boto3 by default; the handlers use the
+low-level botocore client). This lets CI catch cold-start regressions
+before deploy.
+
+Usage:
+    python scripts/startup_benchmark.py
+    python scripts/startup_benchmark.py --runs 10 --max-import-ms 400 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+HANDLERS = {
+    'ingest': os.path.join(REPO_ROOT, 'lambda', 'ingest'),
+    'read_recent': os.path.join(REPO_ROOT, 'lambda', 'read_recent'),
+    'update_snapshot': os.path.join(REPO_ROOT, 'lambda', 'update_snapshot'),
+}
+
+COMMON_LAYER = os.path.join(REPO_ROOT, 'lambda', 'common', 'python')
+
+# Runs in the child interpreter: import the handler, then build the client
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import index
+imported = time.perf_counter()
+from log_common import clients
+clients.dynamodb()
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "client_ms": (ready - imported) * 1000,
+    "modules": sorted(sys.modules)
+}))
+'''
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse `-X importtime` output into (level, name, self_us, cumulative_us).
+
+    Nested imports are indented by two spaces per level in the name column.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name[1:]
+        level = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((level, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def handler_imports(rows: list) -> list:
+    """Return the direct imports of the index module as (name, cumulative_us)."""
+    for position in range(len(rows) - 1, -1, -1):
+        if rows[position][0] == 0 and rows[position][1] == 'index':
+            break
+    else:
+        return []
+
+    children = []
+    for level, name, _, cumulative_us in reversed(rows[:position]):
+        if level == 0:
+            break
+        if level == 1:
+            children.append((name, cumulative_us))
+    return children
+
+
+def measure(handler_dir: str) -> dict:
+    """Cold-import one handler in a fresh interpreter."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([handler_dir, COMMON_LAYER])
+    env.setdefault('TABLE_NAME', 'benchmark-log-entries')
+    env.setdefault('VIEWS_TABLE_NAME', 'benchmark-log-views')
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=handler_dir, env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing {handler_dir} failed:\n{result.stderr[-2000:]}')
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    probe['imports'] = handler_imports(parse_importtime(result.stderr))
+    return probe
+
+
+def benchmark(name: str, handler_dir: str, runs: int, forbidden: list, top: int) -> dict:
+    """Measure a handler `runs` times and summarize the medians."""
+    # The first run compiles bytecode; Lambda ships without it, but every
+    # later cold start of the same container image reuses the cache
+    measure(handler_dir)
+    samples = [measure(handler_dir) for _ in range(runs)]
+
+    slowest = {}
+    for sample in samples:
+        for module, cumulative_us in sample['imports']:
+            slowest.setdefault(module, []).append(cumulative_us / 1000)
+
+    return {
+        'handler': name,
+        'runs': runs,
+        'import_ms': round(statistics.median(s['import_ms'] for s in samples), 2),
+        'client_ms': round(statistics.median(s['client_ms'] for s in samples), 2),
+        'slowest_imports': sorted(
+            ((module, round(statistics.median(times), 2)) for module, times in slowest.items()),
+            key=lambda pair: pair[1], reverse=True
+        )[:top],
+        'forbidden_imports': sorted(
+            module for module in samples[-1]['modules']
+            if any(module == f or module.startswith(f + '.') for f in forbidden)
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure cold-start import time of the Lambda handlers'
+    )
+    parser.add_argument('--handler', action='append', choices=sorted(HANDLERS),
+                        help='Handler to measure (default: all)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per handler (default: 5)')
+    parser.add_argument('--top', type=int, default=8, help='Number of slowest imports to list (default: 8)')
+    parser.add_argument('--max-import-ms', type=float,
+                        help='Fail if a handler imports slower than this (median)')
+    parser.add_argument('--forbid', action='append', default=None,
+                        help='Module that must not be imported at cold start (default: boto3)')
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file')
+
+    args = parser.parse_args()
+    forbidden = args.forbid if args.forbid is not None else ['boto3']
+
+    results = []
+    failed = False
+    for name in args.handler or sorted(HANDLERS):
+        result = benchmark(name, HANDLERS[name], args.runs, forbidden, args.top)
+        results.append(result)
+
+        print(f"{name}: import {result['import_ms']:.1f} ms, "
+              f"first client {result['client_ms']:.1f} ms (median of {args.runs})")
+        for module, milliseconds in result['slowest_imports']:
+            print(f"    {milliseconds:8.1f} ms  {module}")
+
+        if result['forbidden_imports']:
+            failed = True
+            print(f"  FAIL: imports forbidden modules: {', '.join(result['forbidden_imports'][:5])}")
+        if args.max_import_ms is not None and result['import_ms'] > args.max_import_ms:
+            failed = True
+            print(f"  FAIL: import time exceeds {args.max_import_ms:.0f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
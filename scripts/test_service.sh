@@ -6,12 +6,14 @@ echo "Simple Log Service Integration Tests"
 echo "=========================================="
 echo ""
 
-# Get function URLs from Terraform outputs
-echo "Retrieving function URLs..."
-cd terraform
-INGEST_URL=$(terraform output -raw ingest_function_url)
-READ_URL=$(terraform output -raw read_recent_function_url)
-cd ..
+# Get function URLs from Terraform outputs, unless given (e.g. scripts/local_gateway.py)
+if [ -z "$INGEST_URL" ] || [ -z "$READ_URL" ]; then
+  echo "Retrieving function URLs..."
+  cd terraform
+  INGEST_URL=$(terraform output -raw ingest_function_url)
+  READ_URL=$(terraform output -raw read_recent_function_url)
+  cd ..
+fi
 
 echo "Ingest URL: $INGEST_URL"
 echo "Read Recent URL: $READ_URL"
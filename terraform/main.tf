@@ -12,6 +12,10 @@ terraform {
       source  = "hashicorp/archive"
       version = "~> 2.4"
     }
+    random = {
+      source  = "hashicorp/random"
+      version = "~> 3.6"
+    }
   }
 }
 
@@ -119,6 +123,10 @@ resource "aws_dynamodb_table" "log_entries" {
   hash_key       = "id"
   range_key      = "datetime"
 
+  # Feeds the update_snapshot Lambda
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "id"
     type = "S"
@@ -129,9 +137,29 @@ resource "aws_dynamodb_table" "log_entries" {
     type = "S"
   }
 
+  attribute {
+    name = "bucket"
+    type = "S"
+  }
+
+  attribute {
+    name = "severity_bucket"
+    type = "S"
+  }
+
+  # Time-series index: daily bucket partitions, sorted by datetime
   global_secondary_index {
-    name            = "datetime-index"
-    hash_key        = "datetime"
+    name            = "bucket-datetime-index"
+    hash_key        = "bucket"
+    range_key       = "datetime"
+    projection_type = "ALL"
+  }
+
+  # Per-severity time-series index: severity + bucket partitions, sorted by datetime
+  global_secondary_index {
+    name            = "severity-datetime-index"
+    hash_key        = "severity_bucket"
+    range_key       = "datetime"
     projection_type = "ALL"
   }
 
@@ -151,6 +179,97 @@ resource "aws_dynamodb_table" "log_entries" {
   }
 }
 
+# DynamoDB table for materialized views (latest entries snapshot)
+resource "aws_dynamodb_table" "log_views" {
+  name         = "${var.project_name}-views"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  # Minute and hour rollups (log_common.rollups) expire
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.log_service.arn
+  }
+
+  tags = {
+    Name = "${var.project_name}-views-table"
+  }
+}
+
+# Token inverted index for the search function (log_common.search); ingest
+# writes postings here only when enable_search_index is set
+resource "aws_dynamodb_table" "log_search" {
+  name         = "${var.project_name}-search"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+  range_key    = "sk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk"
+    type = "S"
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.log_service.arn
+  }
+
+  tags = {
+    Name = "${var.project_name}-search-table"
+  }
+}
+
+# SQS write-behind buffer between ingest and the write consumer (enable_async_ingest)
+resource "aws_sqs_queue" "log_writes_dlq" {
+  name                      = "${var.project_name}-log-writes-dlq"
+  message_retention_seconds = 1209600
+  kms_master_key_id         = aws_kms_key.log_service.arn
+
+  tags = {
+    Name = "${var.project_name}-log-writes-dlq"
+  }
+}
+
+resource "aws_sqs_queue" "log_writes" {
+  name                              = "${var.project_name}-log-writes"
+  visibility_timeout_seconds        = 180 # 6x the consumer timeout
+  message_retention_seconds         = 345600
+  kms_master_key_id                 = aws_kms_key.log_service.arn
+  kms_data_key_reuse_period_seconds = 3600
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.log_writes_dlq.arn
+    maxReceiveCount     = 5
+  })
+
+  tags = {
+    Name = "${var.project_name}-log-writes"
+  }
+}
+
 # CloudWatch Log Groups
 resource "aws_cloudwatch_log_group" "ingest_lambda" {
   name              = "/aws/lambda/${var.project_name}-ingest"
@@ -172,6 +291,46 @@ resource "aws_cloudwatch_log_group" "read_recent_lambda" {
   }
 }
 
+resource "aws_cloudwatch_log_group" "update_snapshot_lambda" {
+  name              = "/aws/lambda/${var.project_name}-update-snapshot"
+  retention_in_days = var.log_retention_days
+  kms_key_id        = aws_kms_key.log_service.arn
+
+  tags = {
+    Name = "${var.project_name}-update-snapshot-logs"
+  }
+}
+
+resource "aws_cloudwatch_log_group" "stats_lambda" {
+  name              = "/aws/lambda/${var.project_name}-stats"
+  retention_in_days = var.log_retention_days
+  kms_key_id        = aws_kms_key.log_service.arn
+
+  tags = {
+    Name = "${var.project_name}-stats-logs"
+  }
+}
+
+resource "aws_cloudwatch_log_group" "search_lambda" {
+  name              = "/aws/lambda/${var.project_name}-search"
+  retention_in_days = var.log_retention_days
+  kms_key_id        = aws_kms_key.log_service.arn
+
+  tags = {
+    Name = "${var.project_name}-search-logs"
+  }
+}
+
+resource "aws_cloudwatch_log_group" "write_consumer_lambda" {
+  name              = "/aws/lambda/${var.project_name}-write-consumer"
+  retention_in_days = var.log_retention_days
+  kms_key_id        = aws_kms_key.log_service.arn
+
+  tags = {
+    Name = "${var.project_name}-write-consumer-logs"
+  }
+}
+
 # IAM Role for Ingest Lambda
 resource "aws_iam_role" "ingest_lambda" {
   name = "${var.project_name}-ingest-lambda-role"
@@ -204,10 +363,34 @@ resource "aws_iam_role_policy" "ingest_lambda" {
       {
         Effect = "Allow"
         Action = [
-          "dynamodb:PutItem"
+          "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:UpdateItem"
         ]
         Resource = aws_dynamodb_table.log_entries.arn
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:UpdateItem",
+          "dynamodb:PutItem"
+        ]
+        Resource = aws_dynamodb_table.log_views.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:BatchWriteItem"
+        ]
+        Resource = aws_dynamodb_table.log_search.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:SendMessage"
+        ]
+        Resource = aws_sqs_queue.log_writes.arn
+      },
       {
         Effect = "Allow"
         Action = [
@@ -228,6 +411,87 @@ resource "aws_iam_role_policy" "ingest_lambda" {
   })
 }
 
+# IAM Role for Write Consumer Lambda
+resource "aws_iam_role" "write_consumer_lambda" {
+  name = "${var.project_name}-write-consumer-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    Name = "${var.project_name}-write-consumer-role"
+  }
+}
+
+resource "aws_iam_role_policy" "write_consumer_lambda" {
+  name = "${var.project_name}-write-consumer-lambda-policy"
+  role = aws_iam_role.write_consumer_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes"
+        ]
+        Resource = aws_sqs_queue.log_writes.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:BatchWriteItem",
+          "dynamodb:UpdateItem"
+        ]
+        Resource = aws_dynamodb_table.log_entries.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:UpdateItem",
+          "dynamodb:PutItem"
+        ]
+        Resource = aws_dynamodb_table.log_views.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:BatchWriteItem"
+        ]
+        Resource = aws_dynamodb_table.log_search.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "kms:Decrypt",
+          "kms:GenerateDataKey"
+        ]
+        Resource = aws_kms_key.log_service.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Resource = "${aws_cloudwatch_log_group.write_consumer_lambda.arn}:*"
+      }
+    ]
+  })
+}
+
 # IAM Role for Read Recent Lambda
 resource "aws_iam_role" "read_recent_lambda" {
   name = "${var.project_name}-read-recent-lambda-role"
@@ -268,6 +532,14 @@ resource "aws_iam_role_policy" "read_recent_lambda" {
           "${aws_dynamodb_table.log_entries.arn}/index/*"
         ]
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:BatchGetItem"
+        ]
+        Resource = aws_dynamodb_table.log_views.arn
+      },
       {
         Effect = "Allow"
         Action = [
@@ -287,7 +559,216 @@ resource "aws_iam_role_policy" "read_recent_lambda" {
   })
 }
 
+# IAM Role for Stats Lambda
+resource "aws_iam_role" "stats_lambda" {
+  name = "${var.project_name}-stats-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    Name = "${var.project_name}-stats-role"
+  }
+}
+
+resource "aws_iam_role_policy" "stats_lambda" {
+  name = "${var.project_name}-stats-lambda-policy"
+  role = aws_iam_role.stats_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:BatchGetItem"
+        ]
+        Resource = aws_dynamodb_table.log_views.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "kms:Decrypt"
+        ]
+        Resource = aws_kms_key.log_service.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Resource = "${aws_cloudwatch_log_group.stats_lambda.arn}:*"
+      }
+    ]
+  })
+}
+
+# IAM Role for Search Lambda
+resource "aws_iam_role" "search_lambda" {
+  name = "${var.project_name}-search-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    Name = "${var.project_name}-search-role"
+  }
+}
+
+resource "aws_iam_role_policy" "search_lambda" {
+  name = "${var.project_name}-search-lambda-policy"
+  role = aws_iam_role.search_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:Query"
+        ]
+        Resource = aws_dynamodb_table.log_search.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:BatchGetItem"
+        ]
+        Resource = [
+          aws_dynamodb_table.log_entries.arn,
+          aws_dynamodb_table.log_views.arn
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "kms:Decrypt"
+        ]
+        Resource = aws_kms_key.log_service.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Resource = "${aws_cloudwatch_log_group.search_lambda.arn}:*"
+      }
+    ]
+  })
+}
+
+# HMAC key for signing read_recent and search pagination cursors
+resource "random_password" "cursor_secret" {
+  length  = 48
+  special = false
+}
+
+# IAM Role for Update Snapshot Lambda
+resource "aws_iam_role" "update_snapshot_lambda" {
+  name = "${var.project_name}-update-snapshot-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    Name = "${var.project_name}-update-snapshot-role"
+  }
+}
+
+resource "aws_iam_role_policy" "update_snapshot_lambda" {
+  name = "${var.project_name}-update-snapshot-lambda-policy"
+  role = aws_iam_role.update_snapshot_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = aws_dynamodb_table.log_entries.stream_arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:BatchGetItem"
+        ]
+        Resource = aws_dynamodb_table.log_views.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "kms:Decrypt",
+          "kms:GenerateDataKey"
+        ]
+        Resource = aws_kms_key.log_service.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Resource = "${aws_cloudwatch_log_group.update_snapshot_lambda.arn}:*"
+      }
+    ]
+  })
+}
+
 # Package Lambda functions
+data "archive_file" "common_layer" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/common"
+  output_path = "${path.module}/common_layer.zip"
+  excludes    = ["tests", "__pycache__", "*.pyc"]
+}
+
+# Shared code used by both Lambda functions (log_common package)
+resource "aws_lambda_layer_version" "common" {
+  filename            = data.archive_file.common_layer.output_path
+  layer_name          = "${var.project_name}-common"
+  source_code_hash    = data.archive_file.common_layer.output_base64sha256
+  compatible_runtimes = ["python3.11"]
+}
+
 data "archive_file" "ingest_lambda" {
   type        = "zip"
   source_dir  = "${path.module}/../lambda/ingest"
@@ -302,6 +783,27 @@ data "archive_file" "read_recent_lambda" {
   excludes    = ["tests", "__pycache__", "*.pyc"]
 }
 
+data "archive_file" "stats_lambda" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/stats"
+  output_path = "${path.module}/stats_lambda.zip"
+  excludes    = ["tests", "__pycache__", "*.pyc"]
+}
+
+data "archive_file" "search_lambda" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/search"
+  output_path = "${path.module}/search_lambda.zip"
+  excludes    = ["tests", "__pycache__", "*.pyc"]
+}
+
+data "archive_file" "update_snapshot_lambda" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/update_snapshot"
+  output_path = "${path.module}/update_snapshot_lambda.zip"
+  excludes    = ["tests", "__pycache__", "*.pyc"]
+}
+
 # Ingest Lambda Function
 resource "aws_lambda_function" "ingest" {
   filename         = data.archive_file.ingest_lambda.output_path
@@ -312,10 +814,21 @@ resource "aws_lambda_function" "ingest" {
   runtime         = "python3.11"
   timeout         = 30
   memory_size     = 256
+  layers          = [aws_lambda_layer_version.common.arn]
 
   environment {
     variables = {
-      TABLE_NAME = aws_dynamodb_table.log_entries.name
+      TABLE_NAME        = aws_dynamodb_table.log_entries.name
+      SHARD_COUNT       = tostring(var.shard_count)
+      VIEWS_TABLE_NAME  = aws_dynamodb_table.log_views.name
+      METRICS_NAMESPACE = var.metrics_namespace
+
+      STORAGE_CODEC_VERSION = tostring(var.storage_codec_version)
+      TEMPLATE_MINING       = tostring(var.enable_template_mining)
+      DEDUP_WINDOW_SECONDS  = tostring(var.dedup_window_seconds)
+      ROLLUPS_ENABLED       = tostring(var.enable_rollups)
+      SEARCH_TABLE_NAME     = var.enable_search_index ? aws_dynamodb_table.log_search.name : ""
+      WRITE_QUEUE_URL       = var.enable_async_ingest ? aws_sqs_queue.log_writes.url : ""
     }
   }
 
@@ -347,10 +860,19 @@ resource "aws_lambda_function" "read_recent" {
   runtime         = "python3.11"
   timeout         = 30
   memory_size     = 256
+  layers          = [aws_lambda_layer_version.common.arn]
 
   environment {
     variables = {
-      TABLE_NAME = aws_dynamodb_table.log_entries.name
+      TABLE_NAME    = aws_dynamodb_table.log_entries.name
+      SHARD_COUNT   = tostring(coalesce(var.read_shard_count, var.shard_count))
+      SCAN_FALLBACK = tostring(var.enable_scan_fallback)
+      CURSOR_SECRET = random_password.cursor_secret.result
+
+      VIEWS_TABLE_NAME         = aws_dynamodb_table.log_views.name
+      SNAPSHOT_MAX_AGE_SECONDS = tostring(var.snapshot_max_age_seconds)
+      READ_CACHE_TTL_SECONDS   = tostring(var.read_cache_ttl_seconds)
+      METRICS_NAMESPACE        = var.metrics_namespace
     }
   }
 
@@ -372,6 +894,184 @@ resource "aws_lambda_function" "read_recent" {
   ]
 }
 
+# Stats Lambda Function (counts from the rollups in the views table)
+resource "aws_lambda_function" "stats" {
+  filename         = data.archive_file.stats_lambda.output_path
+  function_name    = "${var.project_name}-stats"
+  role            = aws_iam_role.stats_lambda.arn
+  handler         = "index.lambda_handler"
+  source_code_hash = data.archive_file.stats_lambda.output_base64sha256
+  runtime         = "python3.11"
+  timeout         = 10
+  memory_size     = 256
+  layers          = [aws_lambda_layer_version.common.arn]
+
+  environment {
+    variables = {
+      VIEWS_TABLE_NAME  = aws_dynamodb_table.log_views.name
+      SHARD_COUNT       = tostring(coalesce(var.read_shard_count, var.shard_count))
+      METRICS_NAMESPACE = var.metrics_namespace
+    }
+  }
+
+  logging_config {
+    log_format = "JSON"
+    log_group  = aws_cloudwatch_log_group.stats_lambda.name
+  }
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  tags = {
+    Name = "${var.project_name}-stats-function"
+  }
+
+  depends_on = [
+    aws_cloudwatch_log_group.stats_lambda
+  ]
+}
+
+# Search Lambda Function (token index lookups)
+resource "aws_lambda_function" "search" {
+  filename         = data.archive_file.search_lambda.output_path
+  function_name    = "${var.project_name}-search"
+  role            = aws_iam_role.search_lambda.arn
+  handler         = "index.lambda_handler"
+  source_code_hash = data.archive_file.search_lambda.output_base64sha256
+  runtime         = "python3.11"
+  timeout         = 30
+  memory_size     = 256
+  layers          = [aws_lambda_layer_version.common.arn]
+
+  environment {
+    variables = {
+      TABLE_NAME        = aws_dynamodb_table.log_entries.name
+      SEARCH_TABLE_NAME = aws_dynamodb_table.log_search.name
+      VIEWS_TABLE_NAME  = aws_dynamodb_table.log_views.name
+      SHARD_COUNT       = tostring(coalesce(var.read_shard_count, var.shard_count))
+      CURSOR_SECRET     = random_password.cursor_secret.result
+      METRICS_NAMESPACE = var.metrics_namespace
+    }
+  }
+
+  logging_config {
+    log_format = "JSON"
+    log_group  = aws_cloudwatch_log_group.search_lambda.name
+  }
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  tags = {
+    Name = "${var.project_name}-search-function"
+  }
+
+  depends_on = [
+    aws_cloudwatch_log_group.search_lambda
+  ]
+}
+
+# Update Snapshot Lambda Function (DynamoDB Streams consumer)
+resource "aws_lambda_function" "update_snapshot" {
+  filename         = data.archive_file.update_snapshot_lambda.output_path
+  function_name    = "${var.project_name}-update-snapshot"
+  role            = aws_iam_role.update_snapshot_lambda.arn
+  handler         = "index.lambda_handler"
+  source_code_hash = data.archive_file.update_snapshot_lambda.output_base64sha256
+  runtime         = "python3.11"
+  timeout         = 30
+  memory_size     = 256
+  layers          = [aws_lambda_layer_version.common.arn]
+
+  environment {
+    variables = {
+      VIEWS_TABLE_NAME = aws_dynamodb_table.log_views.name
+      SNAPSHOT_SIZE    = tostring(var.snapshot_size)
+    }
+  }
+
+  logging_config {
+    log_format = "JSON"
+    log_group  = aws_cloudwatch_log_group.update_snapshot_lambda.name
+  }
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  tags = {
+    Name = "${var.project_name}-update-snapshot-function"
+  }
+
+  depends_on = [
+    aws_cloudwatch_log_group.update_snapshot_lambda
+  ]
+}
+
+resource "aws_lambda_event_source_mapping" "update_snapshot" {
+  event_source_arn                   = aws_dynamodb_table.log_entries.stream_arn
+  function_name                      = aws_lambda_function.update_snapshot.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 1000
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 10
+  bisect_batch_on_function_error     = true
+}
+
+# Write Consumer Lambda Function (SQS consumer, shares the ingest package)
+resource "aws_lambda_function" "write_consumer" {
+  filename         = data.archive_file.ingest_lambda.output_path
+  function_name    = "${var.project_name}-write-consumer"
+  role            = aws_iam_role.write_consumer_lambda.arn
+  handler         = "consumer.lambda_handler"
+  source_code_hash = data.archive_file.ingest_lambda.output_base64sha256
+  runtime         = "python3.11"
+  timeout         = 30
+  memory_size     = 256
+  layers          = [aws_lambda_layer_version.common.arn]
+
+  environment {
+    variables = {
+      TABLE_NAME        = aws_dynamodb_table.log_entries.name
+      VIEWS_TABLE_NAME  = aws_dynamodb_table.log_views.name
+      METRICS_NAMESPACE = var.metrics_namespace
+
+      STORAGE_CODEC_VERSION = tostring(var.storage_codec_version)
+      TEMPLATE_MINING       = tostring(var.enable_template_mining)
+      DEDUP_WINDOW_SECONDS  = tostring(var.dedup_window_seconds)
+      ROLLUPS_ENABLED       = tostring(var.enable_rollups)
+      SEARCH_TABLE_NAME     = var.enable_search_index ? aws_dynamodb_table.log_search.name : ""
+    }
+  }
+
+  logging_config {
+    log_format = "JSON"
+    log_group  = aws_cloudwatch_log_group.write_consumer_lambda.name
+  }
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  tags = {
+    Name = "${var.project_name}-write-consumer-function"
+  }
+
+  depends_on = [
+    aws_cloudwatch_log_group.write_consumer_lambda
+  ]
+}
+
+resource "aws_lambda_event_source_mapping" "write_consumer" {
+  event_source_arn                   = aws_sqs_queue.log_writes.arn
+  function_name                      = aws_lambda_function.write_consumer.arn
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 1
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
 # Lambda Function URLs with IAM Auth
 resource "aws_lambda_function_url" "ingest" {
   function_name      = aws_lambda_function.ingest.function_name
@@ -390,6 +1090,33 @@ resource "aws_lambda_function_url" "read_recent" {
   function_name      = aws_lambda_function.read_recent.function_name
   authorization_type = "AWS_IAM"
 
+  cors {
+    allow_credentials = true
+    allow_origins     = ["*"]
+    allow_methods     = ["GET"]
+    allow_headers     = ["*"]
+    expose_headers    = ["etag"]
+    max_age          = 86400
+  }
+}
+
+resource "aws_lambda_function_url" "stats" {
+  function_name      = aws_lambda_function.stats.function_name
+  authorization_type = "AWS_IAM"
+
+  cors {
+    allow_credentials = true
+    allow_origins     = ["*"]
+    allow_methods     = ["GET"]
+    allow_headers     = ["*"]
+    max_age          = 86400
+  }
+}
+
+resource "aws_lambda_function_url" "search" {
+  function_name      = aws_lambda_function.search.function_name
+  authorization_type = "AWS_IAM"
+
   cors {
     allow_credentials = true
     allow_origins     = ["*"]
@@ -179,6 +179,27 @@ resource "aws_cloudwatch_metric_alarm" "dynamodb_user_errors" {
   }
 }
 
+resource "aws_cloudwatch_metric_alarm" "log_writes_dlq" {
+  alarm_name          = "${var.project_name}-log-writes-dlq"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = "1"
+  metric_name         = "ApproximateNumberOfMessagesVisible"
+  namespace           = "AWS/SQS"
+  period              = "300"
+  statistic           = "Maximum"
+  threshold           = "0"
+  alarm_description   = "Alert when queued log entries could not be written and reached the dead-letter queue"
+  alarm_actions       = [aws_sns_topic.compliance_alerts.arn]
+
+  dimensions = {
+    QueueName = aws_sqs_queue.log_writes_dlq.name
+  }
+
+  tags = {
+    Name = "${var.project_name}-log-writes-dlq-alarm"
+  }
+}
+
 # CloudWatch Dashboard
 
 resource "aws_cloudwatch_dashboard" "main" {
@@ -237,6 +258,54 @@ resource "aws_cloudwatch_dashboard" "main" {
           region = var.aws_region
           title  = "DynamoDB Capacity Units"
         }
+      },
+      {
+        type = "metric"
+        properties = {
+          metrics = [
+            [var.metrics_namespace, "parse_ms", "Function", "ingest", { label = "parse" }],
+            [".", "validate_ms", ".", ".", { label = "validate" }],
+            [".", "dynamodb_ms", ".", ".", { label = "dynamodb" }],
+            [".", "serialize_ms", ".", ".", { label = "serialize" }],
+            [".", "total_ms", ".", ".", { label = "total" }]
+          ]
+          period = 300
+          stat   = "p99"
+          region = var.aws_region
+          title  = "Ingest p99 by Stage (ms)"
+        }
+      },
+      {
+        type = "metric"
+        properties = {
+          metrics = [
+            [var.metrics_namespace, "cache_ms", "Function", "read_recent", { label = "cache" }],
+            [".", "parse_ms", ".", ".", { label = "parse" }],
+            [".", "dynamodb_ms", ".", ".", { label = "dynamodb" }],
+            [".", "serialize_ms", ".", ".", { label = "serialize" }],
+            [".", "compress_ms", ".", ".", { label = "compress" }],
+            [".", "total_ms", ".", ".", { label = "total" }]
+          ]
+          period = 300
+          stat   = "p99"
+          region = var.aws_region
+          title  = "Read Recent p99 by Stage (ms)"
+        }
+      },
+      {
+        type = "metric"
+        properties = {
+          metrics = [
+            [var.metrics_namespace, "consumed_wcu", "Function", "ingest", { stat = "Sum", label = "Ingest WCU" }],
+            [".", "consumed_rcu", ".", "read_recent", { stat = "Sum", label = "Read Recent RCU" }],
+            [".", "cold_start", ".", "ingest", { stat = "Sum", label = "Ingest Cold Starts" }],
+            [".", ".", ".", "read_recent", { stat = "Sum", label = "Read Recent Cold Starts" }]
+          ]
+          period = 300
+          stat   = "Sum"
+          region = var.aws_region
+          title  = "Capacity and Cold Starts per Function"
+        }
       }
     ]
   })
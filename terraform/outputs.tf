@@ -20,6 +20,16 @@ output "ingest_function_arn" {
   value       = aws_lambda_function.ingest.arn
 }
 
+output "write_queue_url" {
+  description = "URL of the SQS write-behind queue (used when enable_async_ingest is true)"
+  value       = aws_sqs_queue.log_writes.url
+}
+
+output "write_consumer_function_name" {
+  description = "Name of the write consumer Lambda function"
+  value       = aws_lambda_function.write_consumer.function_name
+}
+
 output "ingest_function_url" {
   description = "Function URL for ingest Lambda (requires IAM auth)"
   value       = aws_lambda_function_url.ingest.function_url
@@ -40,6 +50,26 @@ output "read_recent_function_url" {
   value       = aws_lambda_function_url.read_recent.function_url
 }
 
+output "stats_function_name" {
+  description = "Name of the stats Lambda function"
+  value       = aws_lambda_function.stats.function_name
+}
+
+output "stats_function_url" {
+  description = "Function URL for stats Lambda (requires IAM auth)"
+  value       = aws_lambda_function_url.stats.function_url
+}
+
+output "search_function_name" {
+  description = "Name of the search Lambda function"
+  value       = aws_lambda_function.search.function_name
+}
+
+output "search_function_url" {
+  description = "Function URL for search Lambda (requires IAM auth)"
+  value       = aws_lambda_function_url.search.function_url
+}
+
 output "kms_key_id" {
   description = "ID of the KMS key"
   value       = aws_kms_key.log_service.id
@@ -60,4 +90,17 @@ output "config_bucket_name" {
   value       = aws_s3_bucket.config.id
 }
 
+output "views_table_name" {
+  description = "Name of the DynamoDB table holding materialized views"
+  value       = aws_dynamodb_table.log_views.name
+}
+
+output "search_table_name" {
+  description = "Name of the DynamoDB table holding the token index"
+  value       = aws_dynamodb_table.log_search.name
+}
 
+output "update_snapshot_function_name" {
+  description = "Name of the update snapshot Lambda function"
+  value       = aws_lambda_function.update_snapshot.function_name
+}
@@ -36,4 +36,95 @@ variable "compliance_email" {
   default     = ""
 }
 
+variable "enable_scan_fallback" {
+  description = "One-off switch for legacy data: let read_recent scan the table when the time buckets hold fewer entries than requested. Enable only while entries written before bucketing remain; every short unfiltered first page then costs a full scan"
+  type        = bool
+  default     = false
+}
+
+variable "shard_count" {
+  description = "Number of write shards per daily time bucket; raise it when one bucket partition throttles"
+  type        = number
+  default     = 1
+
+  validation {
+    condition     = var.shard_count >= 1 && var.shard_count <= 64
+    error_message = "shard_count must be between 1 and 64."
+  }
+}
+
+variable "read_shard_count" {
+  description = "Shards queried per bucket by read_recent (defaults to shard_count). Keep it at the old value for the lookback window after lowering shard_count"
+  type        = number
+  default     = null
+}
+
+variable "snapshot_size" {
+  description = "Number of newest entries kept in the materialized snapshot read by read_recent"
+  type        = number
+  default     = 100
+}
+
+variable "snapshot_max_age_seconds" {
+  description = "Snapshots not updated for this long are ignored and read_recent queries the table instead"
+  type        = number
+  default     = 60
+}
+
+variable "read_cache_ttl_seconds" {
+  description = "How long read_recent serves a cached response without checking the write watermark (0 disables the cache TTL)"
+  type        = number
+  default     = 2
+}
+
+variable "metrics_namespace" {
+  description = "CloudWatch namespace of the per-stage metrics the Lambda functions emit in Embedded Metric Format"
+  type        = string
+  default     = "SimpleLogService"
+}
+
+variable "storage_codec_version" {
+  description = "Row format written by ingest: 2 for compact rows with compressed long messages, 1 for plain attributes (readers decode both)"
+  type        = number
+  default     = 2
+
+  validation {
+    condition     = contains([1, 2], var.storage_codec_version)
+    error_message = "storage_codec_version must be 1 or 2."
+  }
+}
+
+variable "enable_template_mining" {
+  description = "Store repetitive messages as a mined template id plus parameters; templates are kept in the views table"
+  type        = bool
+  default     = false
+}
+
+variable "dedup_window_seconds" {
+  description = "Collapse repeats of the same severity and message within this many seconds into one entry with a count, dated at the window start so followers using after can miss it (0 disables)"
+  type        = number
+  default     = 0
 
+  validation {
+    condition     = var.dedup_window_seconds >= 0 && var.dedup_window_seconds <= 3600
+    error_message = "dedup_window_seconds must be between 0 and 3600."
+  }
+}
+
+variable "enable_rollups" {
+  description = "Keep per-minute, hour and day entry counts by severity in the views table for the stats function (up to three extra views-table writes per ingest invocation)"
+  type        = bool
+  default     = false
+}
+
+variable "enable_search_index" {
+  description = "Index message tokens at ingest for the search function (one extra write per distinct token)"
+  type        = bool
+  default     = false
+}
+
+variable "enable_async_ingest" {
+  description = "Write-behind ingest: enqueue entries to SQS and return 202; the write consumer function stores them"
+  type        = bool
+  default     = false
+}